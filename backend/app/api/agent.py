@@ -1,9 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.services.agent import chat_with_agent
+from app.services.agent import chat_with_agent, stream_chat_with_agent
+from app.services.tracing import tracer
 from app.schemas.response import APIResponse
 from app.core.security import get_current_user
 from typing import Optional, Any, List, Dict
+import json
 
 router = APIRouter()
 
@@ -19,7 +22,7 @@ async def agent_chat(request: ChatRequest, user = Depends(get_current_user)):
     """
     try:
         # Pass the user_id, history, and timezone to the agent service
-        response_text = chat_with_agent(
+        response_text = await chat_with_agent(
             request.message, 
             user_id=user.id, 
             history=request.history, 
@@ -33,3 +36,35 @@ async def agent_chat(request: ChatRequest, user = Depends(get_current_user)):
     except Exception as e:
         print(f"Agent Error: {e}")
         return APIResponse(success=False, message=str(e), data=None)
+
+@router.post("/chat/stream")
+async def agent_chat_stream(request: ChatRequest, user = Depends(get_current_user)):
+    """
+    Streaming variant of /chat over Server-Sent Events. Emits `token`,
+    `tool_start`, `tool_end` and a final `done` (or `error`) event that
+    carries the event mutations made during the turn.
+    """
+    async def event_source():
+        async for event, data in stream_chat_with_agent(
+            request.message,
+            user_id=user.id,
+            history=request.history,
+            timezone=request.timezone
+        ):
+            yield f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        # Stop proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/stats", response_model=APIResponse)
+async def agent_stats(user = Depends(get_current_user)):
+    """
+    Latency breakdown of the caller's recent agent turns: p50/p95 per turn
+    and per span (model round trips, each tool, DB queries), ordered by how
+    much of the slowest 5% of turns each span accounts for.
+    """
+    return APIResponse(success=True, message="Agent turn stats", data=tracer.stats("agent_turn", user_id=user.id))
@@ -2,9 +2,11 @@ from fastapi import APIRouter, HTTPException, Depends, Body
 from app.schemas.response import APIResponse
 from app.core.config import settings
 from app.services.crypto import crypto
+from app.services.credentials import credential_manager
 from app.db import get_service_db
 from app.core.security import get_current_user
 from pydantic import BaseModel
+from datetime import datetime, timedelta, timezone
 import httpx
 import logging
 
@@ -63,8 +65,13 @@ async def google_auth_exchange(request: GoogleAuthRequest, user = Depends(get_cu
         }
         if enc_refresh:
             data["google_refresh_token"] = enc_refresh
+        if token_data.get("expires_in"):
+            expires_at = datetime.now(timezone.utc) + timedelta(seconds=int(token_data["expires_in"]))
+            data["google_token_expires_at"] = expires_at.isoformat()
 
         result = db.table("user_integrations").upsert(data).execute()
+        # Drop any cached tokens from a previous connection
+        credential_manager.invalidate(user.id)
 
         return APIResponse(success=True, message="Google Calendar connected successfully", data=None)
 
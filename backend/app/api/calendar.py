@@ -1,64 +1,319 @@
-from fastapi import APIRouter, HTTPException, Depends, Body
+from fastapi import APIRouter, HTTPException, Depends, Body, Header, Query, Request, Response, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from datetime import datetime
 from app.schemas.response import APIResponse
-from app.schemas.event import EventSchema
-from app.db import get_db
+from app.schemas.event import EventSchema, BulkDeleteRequest
+from app.db import get_db, get_service_db
 from app.services.google_calendar import get_calendar_service
+from app.services import bulk_events, google_watch, ics_feed
+from app.services.reconcile import reconcile_user
+from app.services.sync_jobs import sync_jobs
 from app.core.security import get_current_user
+from app.core.responses import api_response
+from app.services.invalidation import events_changed
+from app.services.recurrence import contained_filter, expand_rows, series_end, cancel_occurrence
+from app.services.event_listing import parse_fields, select_columns, project, fetch_page, decode_cursor
+from app.services.change_feed import current_version, changes_since, etag, etag_matches, http_date
 from pydantic import BaseModel
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 500
+# Seconds between progress checks on a sync job's event stream
+SYNC_PROGRESS_INTERVAL = 0.5
+
+def _queue_sync(user_id: str):
+    """Finds the user's unsynced events and hands them to a sync job; None if there are none."""
+    result = get_db().table("events") \
+        .select("*") \
+        .eq("user_id", user_id) \
+        .is_("google_event_id", "null") \
+        .execute()
+    if not result.data:
+        return None
+    # Loading (or refreshing) credentials can hit Google's token endpoint
+    return sync_jobs.submit(get_calendar_service(user_id), result.data)
+
 @router.post("/sync", response_model=APIResponse)
 async def sync_to_google(user = Depends(get_current_user)):
     """
-    Pushes all unsynced events for the authenticated user to Google Calendar.
+    Queues a push of all unsynced events for the authenticated user to
+    Google Calendar and returns the job id right away. Progress is at
+    GET /calendar/sync/{job_id} (or streamed from .../events).
+    """
+    try:
+        job = await asyncio.to_thread(_queue_sync, user.id)
+        if job is None:
+            return APIResponse(success=True, message="No new events to sync", data={"synced": 0, "job_id": None})
+        return APIResponse(success=True, message=f"Syncing {job.total} events", data=job.to_dict())
+    except Exception as e:
+        return APIResponse(success=False, message=str(e), data=None)
+
+@router.get("/sync/{job_id}", response_model=APIResponse)
+async def get_sync_job(job_id: str, user = Depends(get_current_user)):
+    """
+    Progress of a sync job: how many events were pushed and how many failed.
+    """
+    job = sync_jobs.get(job_id, user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+    return APIResponse(success=True, message=job.status, data=job.to_dict())
+
+@router.get("/sync/{job_id}/events")
+async def stream_sync_job(job_id: str, user = Depends(get_current_user)):
+    """
+    Server-Sent Events for a sync job: a `progress` event whenever the
+    counts move and a final `done` event once the job has finished.
+    """
+    job = sync_jobs.get(job_id, user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Sync job not found")
+
+    async def event_source():
+        seen = -1
+        while True:
+            revision, finished, state = job.revision, job.finished, job.to_dict()
+            if revision != seen:
+                seen = revision
+                yield f"event: {'done' if finished else 'progress'}\ndata: {json.dumps(state, default=str)}\n\n"
+            if finished:
+                return
+            await asyncio.sleep(SYNC_PROGRESS_INTERVAL)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        # Stop proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/pull", response_model=APIResponse)
+async def pull_from_google(user = Depends(get_current_user)):
+    """
+    Pulls edits and deletions made in Google Calendar back into Supabase.
+    Only the delta since the last pull is fetched.
+    """
+    try:
+        # Credential refresh, paginated events.list and the upserts all block
+        service = await asyncio.to_thread(get_calendar_service, user.id)
+        stats = await asyncio.to_thread(service.pull_changes)
+        return APIResponse(success=True, message="Pulled changes from Google Calendar", data=stats)
+    except Exception as e:
+        return APIResponse(success=False, message=str(e), data=None)
+
+@router.post("/reconcile", response_model=APIResponse)
+async def reconcile_with_google(user = Depends(get_current_user)):
+    """
+    Diffs Supabase against Google Calendar, deletes orphaned Google events
+    and repairs broken google_event_id links.
+    """
+    try:
+        # A full Google listing plus the DB diff: keep it off the event loop
+        report = await asyncio.to_thread(reconcile_user, user.id)
+        return APIResponse(success=True, message="Calendar reconciled", data=report)
+    except Exception as e:
+        return APIResponse(success=False, message=str(e), data=None)
+
+@router.post("/watch", response_model=APIResponse)
+async def start_google_watch(user = Depends(get_current_user)):
+    """
+    Subscribes to Google push notifications for the user's CanvasCal calendar,
+    so edits made in Google trigger an incremental pull instead of polling.
     """
+    try:
+        # events.watch (and stopping the old channel) are blocking HTTP calls
+        channel = await asyncio.to_thread(google_watch.start_watch, user.id)
+        return APIResponse(success=True, message="Watching Google Calendar for changes", data=channel)
+    except Exception as e:
+        return APIResponse(success=False, message=str(e), data=None)
+
+@router.delete("/watch", response_model=APIResponse)
+async def stop_google_watch(user = Depends(get_current_user)):
+    """
+    Stops Google push notifications for the authenticated user.
+    """
+    try:
+        stopped = await asyncio.to_thread(google_watch.stop_watch, user.id)
+        return APIResponse(success=True, message="Stopped watching Google Calendar", data={"stopped": stopped})
+    except Exception as e:
+        return APIResponse(success=False, message=str(e), data=None)
+
+@router.post("/webhook")
+async def google_webhook(
+    channel_id: Optional[str] = Header(None, alias="X-Goog-Channel-ID"),
+    channel_token: Optional[str] = Header(None, alias="X-Goog-Channel-Token"),
+    resource_state: Optional[str] = Header(None, alias="X-Goog-Resource-State"),
+):
+    """
+    Receives Google Calendar push notifications. Google only tells us that
+    something changed; the debounced pull fetches what.
+    """
+    # Looks the channel up in user_integrations
+    if not await asyncio.to_thread(google_watch.handle_notification, channel_id, channel_token, resource_state):
+        raise HTTPException(status_code=404, detail="Unknown channel")
+    return Response(status_code=200)
+
+def _cache_validators(db, user_id: str, variant: str) -> dict:
+    """ETag/Last-Modified headers for a listing, or {} if the version is unavailable."""
+    try:
+        version, changed_at = current_version(db, user_id)
+        headers = {
+            "ETag": etag(version, variant),
+            # Per-user bodies behind one URL: revalidate every time, never share
+            "Cache-Control": "private, no-cache",
+            "Vary": "Authorization",
+        }
+        if changed_at:
+            headers["Last-Modified"] = http_date(changed_at)
+        return headers
+    except Exception as e:
+        logger.warning(f"Could not read change version for {user_id}: {e}")
+        return {}
+
+@router.get("/changes", response_model=APIResponse)
+async def list_changes(
+    since: Optional[int] = Query(None, ge=0, description="cursor from the previous call; omit to get the current one"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated event fields to return"),
+    compact: bool = Query(False, description="Return only the fields the calendar grid renders"),
+    user = Depends(get_current_user)
+):
+    """
+    Events inserted, updated or deleted after `since`, as a patch for a list
+    fetched with the same start/end. Without `since` only the current cursor
+    is returned; take it before the full fetch so nothing falls in between.
+    """
+    try:
+        projection = parse_fields(fields, compact)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     db = get_db()
+    if not db:
+        return APIResponse(success=False, message="Database not connected", data=None)
     try:
-        # 1. Fetch unsynced events for this user
-        result = db.table("events") \
-            .select("*") \
-            .eq("user_id", user.id) \
-            .is_("google_event_id", "null") \
-            .execute()
-        
-        events = result.data
-        if not events:
-            return APIResponse(success=True, message="No new events to sync", data={"synced": 0})
+        if since is None:
+            version, _ = await asyncio.to_thread(current_version, db, user.id)
+            return APIResponse(success=True, message="Current change cursor", data={"cursor": str(version)})
+        changes = await asyncio.to_thread(changes_since, db, user.id, since, start, end, projection)
+        return api_response(True, f"{len(changes['upserted'])} updated, {len(changes['removed'])} removed", changes)
+    except Exception as e:
+        return APIResponse(success=False, message=str(e), data=None)
 
-        # 2. Trigger Sync Service
-        service = get_calendar_service(user.id)
-        count = service.sync_events(events)
+@router.get("/feed", response_model=APIResponse)
+async def get_feed_url(request: Request, user = Depends(get_current_user)):
+    """
+    Returns the user's private ICS subscription URL, creating it on first use.
+    """
+    try:
+        token = await asyncio.to_thread(ics_feed.get_feed_token, user.id)
+        return APIResponse(success=True, message="Calendar feed URL", data={"url": str(request.url_for("ics_feed", token=token))})
+    except Exception as e:
+        return APIResponse(success=False, message=str(e), data=None)
 
-        return APIResponse(success=True, message=f"Successfully synced {count} events", data={"synced": count})
+@router.post("/feed/rotate", response_model=APIResponse)
+async def rotate_feed_url(request: Request, user = Depends(get_current_user)):
+    """
+    Replaces the subscription URL; clients subscribed to the old one stop updating.
+    """
+    try:
+        token = await asyncio.to_thread(ics_feed.get_feed_token, user.id, rotate=True)
+        return APIResponse(success=True, message="Calendar feed URL rotated", data={"url": str(request.url_for("ics_feed", token=token))})
     except Exception as e:
         return APIResponse(success=False, message=str(e), data=None)
 
+@router.get("/feed/{token}.ics", name="ics_feed")
+async def ics_feed_export(token: str, if_none_match: Optional[str] = Header(None)):
+    """
+    The user's calendar as an ICS subscription. Polls with a matching
+    If-None-Match cost one version lookup; a changed calendar is served from
+    the cache when this version was already rendered, else streamed page by
+    page and cached on the way out.
+    """
+    # Calendar apps poll this unauthenticated: keep both lookups off the event loop
+    user_id = await asyncio.to_thread(ics_feed.resolve_feed_token, token)
+    if not user_id:
+        raise HTTPException(status_code=404, detail="Unknown feed")
+
+    db = get_service_db()
+    version, changed_at = await asyncio.to_thread(current_version, db, user_id)
+    headers = {
+        "ETag": etag(version, "ics"),
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": 'inline; filename="canvascal.ics"',
+    }
+    if changed_at:
+        headers["Last-Modified"] = http_date(changed_at)
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    media_type = "text/calendar; charset=utf-8"
+    body = ics_feed.feed_cache.get(user_id, version)
+    if body is not None:
+        return Response(content=body, media_type=media_type, headers=headers)
+    return StreamingResponse(ics_feed.feed_cache.stream(db, user_id, version), media_type=media_type, headers=headers)
+
 @router.get("/events", response_model=APIResponse)
 async def list_events(
+    request: Request,
     start: Optional[datetime] = None, 
     end: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated event fields to return"),
+    compact: bool = Query(False, description="Return only the fields the calendar grid renders"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; enables cursor pagination"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    if_none_match: Optional[str] = Header(None),
     user = Depends(get_current_user)
 ):
     """
     Returns existing events from Supabase for the authenticated user.
+
+    Without `limit` every matching event is returned as a list. With it,
+    events come in pages ordered by (start_time, id) and data is
+    {"events": [...], "next_cursor": str | None}.
+
+    Responses carry an ETag derived from the user's change version; a
+    matching If-None-Match gets 304 without reading any events.
     """
+    try:
+        projection = parse_fields(fields, compact)
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     db = get_db()
     if not db:
         return APIResponse(success=False, message="Database not connected", data=[])
+
+    validators = await asyncio.to_thread(_cache_validators, db, user.id, str(request.url.query))
+    if validators and etag_matches(if_none_match, validators["ETag"]):
+        return Response(status_code=304, headers=validators)
+
     try:
-        query = db.table("events").select("*").eq("user_id", user.id)
+        if limit is not None or cursor:
+            events, next_cursor = await asyncio.to_thread(
+                fetch_page, db, user.id, start, end, limit or DEFAULT_PAGE_SIZE, cursor, projection
+            )
+            return api_response(True, "Events fetched successfully", {"events": events, "next_cursor": next_cursor}, headers=validators)
+
+        query = db.table("events").select(select_columns(projection)).eq("user_id", user.id)
         
-        if start:
-            query = query.gte("start_time", start.isoformat())
-        if end:
-            query = query.lte("end_time", end.isoformat())
+        if start or end:
+            # Single events inside the range, plus any series that may repeat into it
+            query = query.or_(contained_filter(start, end))
             
-        result = query.execute()
-        events = result.data
-        return APIResponse(success=True, message="Events fetched successfully", data=events)
+        result = await asyncio.to_thread(query.execute)
+        events = project(expand_rows(result.data, start, end), projection)
+        return api_response(True, "Events fetched successfully", events, headers=validators)
     except Exception as e:
         print(f"Error fetching events: {e}")
         return APIResponse(success=False, message=str(e), data=[])
@@ -76,27 +331,121 @@ async def add_event(event: EventSchema, user = Depends(get_current_user)):
         event_data = event.model_dump(mode='json')
         # Inject user_id
         event_data["user_id"] = user.id
+        if event_data.get("recurrence"):
+            event_data["recurrence_end"] = series_end(event_data)
         
         result = db.table("events").insert(event_data).execute()
+        events_changed(user.id)
         return APIResponse(success=True, message="Event created successfully", data=result.data)
     except Exception as e:
         print(f"Error creating event: {e}")
         return APIResponse(success=False, message=str(e), data=None)
 
+def push_to_google(user_id: str, events: List[dict]):
+    """Background task: pushes changed rows (e.g. a series' new EXDATE) to Google Calendar."""
+    try:
+        get_calendar_service(user_id).sync_events(events)
+    except Exception as e:
+        print(f"Error pushing events to Google: {e}")
+
+def delete_from_google(user_id: str, google_event_ids: List[str]):
+    """Background task: removes deleted rows' events from Google Calendar."""
+    try:
+        get_calendar_service(user_id).delete_events(google_event_ids)
+    except Exception as e:
+        print(f"Error deleting events from Google: {e}")
+
+def sync_batch_to_google(user_id: str, events: List[dict], google_event_ids: List[str]):
+    """Background task: one combined Google push for a bulk request."""
+    try:
+        service = get_calendar_service(user_id)
+        if google_event_ids:
+            service.delete_events(google_event_ids)
+        if events:
+            service.sync_events(events)
+    except Exception as e:
+        print(f"Error syncing bulk changes to Google: {e}")
+
+def _bulk_response(outcome: bulk_events.BulkOutcome, user_id: str, background_tasks: BackgroundTasks) -> APIResponse:
+    counts = outcome.counts()
+    if any(counts.get(status) for status in ("created", "updated", "deleted")):
+        events_changed(user_id)
+    if outcome.to_push or outcome.google_deletes:
+        background_tasks.add_task(sync_batch_to_google, user_id, outcome.to_push, outcome.google_deletes)
+    message = ", ".join(f"{n} {status}" for status, n in counts.items()) or "Nothing to do"
+    return APIResponse(success=True, message=message, data={"results": outcome.results, "counts": counts})
+
+def _check_bulk_size(items: list):
+    if len(items) > bulk_events.MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {bulk_events.MAX_BULK_ITEMS} items per request")
+
+@router.post("/events/bulk", response_model=APIResponse)
+async def bulk_create_events(background_tasks: BackgroundTasks, events: List[dict] = Body(...), user = Depends(get_current_user)):
+    """
+    Creates many events at once. Each item is validated on its own; the
+    results list reports created/error per item in request order.
+    """
+    _check_bulk_size(events)
+    db = get_db()
+    if not db:
+        return APIResponse(success=False, message="Database not connected", data=None)
+    outcome = await asyncio.to_thread(bulk_events.bulk_create, db, user.id, events)
+    return _bulk_response(outcome, user.id, background_tasks)
+
+@router.patch("/events/bulk", response_model=APIResponse)
+async def bulk_update_events(background_tasks: BackgroundTasks, updates: List[dict] = Body(...), user = Depends(get_current_user)):
+    """
+    Applies partial updates ({"id": ..., <fields to change>}) to many events.
+    """
+    _check_bulk_size(updates)
+    db = get_db()
+    if not db:
+        return APIResponse(success=False, message="Database not connected", data=None)
+    outcome = await asyncio.to_thread(bulk_events.bulk_update, db, user.id, updates)
+    return _bulk_response(outcome, user.id, background_tasks)
+
+@router.post("/events/bulk/delete", response_model=APIResponse)
+async def bulk_delete_events(request: BulkDeleteRequest, background_tasks: BackgroundTasks, user = Depends(get_current_user)):
+    """
+    Deletes many events (or single occurrences of series) at once.
+    """
+    _check_bulk_size(request.ids)
+    db = get_db()
+    if not db:
+        return APIResponse(success=False, message="Database not connected", data=None)
+    outcome = await asyncio.to_thread(bulk_events.bulk_delete, db, user.id, request.ids)
+    return _bulk_response(outcome, user.id, background_tasks)
+
 @router.delete("/events/{event_id}", response_model=APIResponse)
-async def delete_event(event_id: str, user = Depends(get_current_user)):
+async def delete_event(event_id: str, background_tasks: BackgroundTasks, user = Depends(get_current_user)):
     """
-    Deletes an event from Supabase (ensuring it belongs to the user).
+    Deletes an event from Supabase (ensuring it belongs to the user),
+    then removes its Google Calendar copy in the background.
+    Deleting one occurrence of a series ("<series id>_<start>") cancels just
+    that occurrence on the series instead.
     """
     db = get_db()
     if not db:
         return APIResponse(success=False, message="Database not connected", data=None)
     try:
+        master = cancel_occurrence(db, user.id, event_id)
+        if master:
+            events_changed(user.id)
+            if master.get("google_event_id"):
+                background_tasks.add_task(push_to_google, user.id, [master])
+            return APIResponse(success=True, message="Occurrence deleted successfully", data=[master])
+
         result = db.table("events") \
             .delete() \
             .eq("id", event_id) \
             .eq("user_id", user.id) \
             .execute()
+        events_changed(user.id)
+
+        google_event_ids = [row["google_event_id"] for row in result.data if row.get("google_event_id")]
+        if google_event_ids:
+            background_tasks.add_task(delete_from_google, user.id, google_event_ids)
+
         return APIResponse(success=True, message="Event deleted successfully", data=result.data)
     except Exception as e:
         print(f"Error deleting event: {e}")
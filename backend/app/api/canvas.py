@@ -8,6 +8,8 @@ from app.schemas.event import EventSchema
 from app.core.security import get_current_user
 from app.db import get_db
 from app.services.google_calendar import get_calendar_service
+from app.services.invalidation import events_changed
+from app.services.write_behind import WriteBehind
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 import logging
@@ -287,6 +289,73 @@ async def process_specific_course(course_id: int, user = Depends(get_current_use
         logger.error(f"Process Course Error: {e}")
         return APIResponse(success=False, message=str(e), data=None)
 
+def _save_canvas_data(db, courses, user, background_tasks: BackgroundTasks) -> int:
+    """
+    Upserts assignments for each course, queues syllabus parsing and the
+    Google push. Returns how many assignments were saved.
+    """
+    new_events_count = 0
+
+    for course in courses:
+        # A. Assignments
+        try:
+            assignments = course.get_assignments()
+            for assign in assignments:
+                if not getattr(assign, 'due_at', None):
+                    continue
+            
+                # Parse due_at and ensure valid range
+                try:
+                    due_dt = datetime.fromisoformat(assign.due_at.replace('Z', '+00:00'))
+                    # Google requires a duration, so we set start to 30 mins before
+                    start_dt = due_dt - timedelta(minutes=30)
+                except Exception as e:
+                    logger.warning(f"Failed to parse due_at '{assign.due_at}': {e}")
+                    continue
+
+                # Generate deterministic ID
+                unique_string = f"{user.id}-{assign.name}-{assign.due_at}"
+                event_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, unique_string))
+
+                event_data = {
+                    "id": event_id,
+                    "user_id": user.id,
+                    "summary": assign.name,
+                    "description": getattr(assign, 'description', '') or '',
+                    "start_time": start_dt.isoformat(),
+                    "end_time": due_dt.isoformat(),
+                    "location": "Canvas",
+                    "event_type": "assignment",
+                    "course_id": str(course.id),
+                    "source": "canvas_api",
+                    "verified": True
+                }
+            
+                # Upsert (no on_conflict needed as 'id' is PK)
+                result = db.table("events").upsert(event_data).execute()
+                if result.data: new_events_count += 1
+        except Exception as e:
+            logger.warning(f"Assignment sync failed for {course.id}: {e}")
+
+        # B. Announcements (Convert to events?)
+        # For now, let's just log them or store as 'notification' type events if they have dates
+        # skipping complex NLP on announcements for MVP speed
+
+        # C. Syllabus (AI)
+        # We run this in background as it's slow
+        background_tasks.add_task(process_and_save_syllabus, course, user.id)
+
+    # Trigger Google Sync for what we have so far
+    if new_events_count > 0:
+        events_changed(user.id)
+        gcal = get_calendar_service(user.id)
+        # Fetch what we just inserted (or all unsynced)
+        unsynced = db.table("events").select("*").eq("user_id", user.id).is_("google_event_id", "null").execute()
+        if unsynced.data:
+            background_tasks.add_task(gcal.sync_events, unsynced.data)
+
+    return new_events_count
+
 @router.post("/sync", response_model=APIResponse)
 async def sync_canvas_data(
     background_tasks: BackgroundTasks,
@@ -305,65 +374,9 @@ async def sync_canvas_data(
         canvas_user = canvas.get_current_user()
         courses = canvas_user.get_courses(enrollment_state='active')
         
-        db = get_db()
-        new_events_count = 0
-        
-        for course in courses:
-            # A. Assignments
-            try:
-                assignments = course.get_assignments()
-                for assign in assignments:
-                    if not getattr(assign, 'due_at', None):
-                        continue
-                    
-                    # Parse due_at and ensure valid range
-                    try:
-                        due_dt = datetime.fromisoformat(assign.due_at.replace('Z', '+00:00'))
-                        # Google requires a duration, so we set start to 30 mins before
-                        start_dt = due_dt - timedelta(minutes=30)
-                    except Exception as e:
-                        logger.warning(f"Failed to parse due_at '{assign.due_at}': {e}")
-                        continue
-
-                    # Generate deterministic ID
-                    unique_string = f"{user.id}-{assign.name}-{assign.due_at}"
-                    event_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, unique_string))
-
-                    event_data = {
-                        "id": event_id,
-                        "user_id": user.id,
-                        "summary": assign.name,
-                        "description": getattr(assign, 'description', '') or '',
-                        "start_time": start_dt.isoformat(),
-                        "end_time": due_dt.isoformat(),
-                        "location": "Canvas",
-                        "event_type": "assignment",
-                        "course_id": str(course.id),
-                        "source": "canvas_api",
-                        "verified": True
-                    }
-                    
-                    # Upsert (no on_conflict needed as 'id' is PK)
-                    result = db.table("events").upsert(event_data).execute()
-                    if result.data: new_events_count += 1
-            except Exception as e:
-                logger.warning(f"Assignment sync failed for {course.id}: {e}")
-
-            # B. Announcements (Convert to events?)
-            # For now, let's just log them or store as 'notification' type events if they have dates
-            # skipping complex NLP on announcements for MVP speed
-
-            # C. Syllabus (AI)
-            # We run this in background as it's slow
-            background_tasks.add_task(process_and_save_syllabus, course, user.id)
-
-        # Trigger Google Sync for what we have so far
-        if new_events_count > 0:
-            gcal = get_calendar_service(user.id)
-            # Fetch what we just inserted (or all unsynced)
-            unsynced = db.table("events").select("*").eq("user_id", user.id).is_("google_event_id", "null").execute()
-            if unsynced.data:
-                background_tasks.add_task(gcal.sync_events, unsynced.data)
+        # Assignment upserts are batched; the unsynced read flushes them first
+        with WriteBehind(get_db(), user_id=user.id) as db:
+            new_events_count = _save_canvas_data(db, courses, user, background_tasks)
 
         return APIResponse(success=True, message=f"Sync started. Found {new_events_count} assignments. Syllabus parsing in background.", data={"new_assignments": new_events_count})
 
@@ -377,16 +390,18 @@ async def process_and_save_syllabus(course, user_id: str):
     """
     events = await process_syllabus_for_course(course, user_id)
     if events:
-        db = get_db()
         gcal = get_calendar_service(user_id)
         
         saved_events = []
-        for e in events:
-            data = e.model_dump(mode='json')
-            data['user_id'] = user_id
-            res = db.table("events").insert(data).execute()
-            if res.data:
-                saved_events.extend(res.data)
+        # One multi-row insert instead of one per extracted event
+        with WriteBehind(get_db(), user_id=user_id) as db:
+            for e in events:
+                data = e.model_dump(mode='json')
+                data['user_id'] = user_id
+                res = db.table("events").insert(data).execute()
+                if res.data:
+                    saved_events.extend(res.data)
+        events_changed(user_id)
         
         # Sync found syllabus events to Google
         if saved_events:
@@ -3,6 +3,7 @@ from app.schemas.response import APIResponse
 from app.services import parser, storage
 from app.schemas.event import EventSchema
 from app.core.security import get_current_user
+from app.core.responses import api_response
 from typing import List
 
 router = APIRouter()
@@ -42,10 +43,21 @@ async def process_syllabus(file: UploadFile = File(...), user = Depends(get_curr
 @router.get("/syllabus", response_model=APIResponse)
 async def get_all_syllabi(user = Depends(get_current_user)):
     """
-    Fetch all syllabi for the user.
+    List the user's syllabi: id, course name, PDF link and timestamps.
+    Raw text and insights come from GET /syllabus/{syllabus_id}.
     """
     try:
         data = storage.get_syllabi(user.id)
-        return APIResponse(success=True, message="Syllabi fetched", data=data)
+        return api_response(True, "Syllabi fetched", data)
     except Exception as e:
         return APIResponse(success=False, message=str(e), data=None)
+
+@router.get("/syllabus/{syllabus_id}", response_model=APIResponse)
+async def get_syllabus(syllabus_id: str, user = Depends(get_current_user)):
+    """
+    Fetch one syllabus with its raw text and AI insights.
+    """
+    data = storage.get_syllabus(user.id, syllabus_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Syllabus not found")
+    return api_response(True, "Syllabus fetched", data)
@@ -0,0 +1,102 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import List, Optional
+import anyio.to_thread
+import gzip
+
+try:
+    import brotli
+except ImportError:  # optional: without it only gzip is offered
+    brotli = None
+
+THREAD_MINIMUM_SIZE = 256 * 1024
+COMPRESSIBLE_TYPES = ("application/json", "text/calendar", "text/plain", "text/html", "text/csv")
+
+def negotiate(accept_encoding: str, available: List[str]) -> Optional[str]:
+    """Best encoding in `available` order the client accepts (q > 0), or None."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        if name:
+            accepted[name.strip().lower()] = q
+    for encoding in available:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+class CompressionMiddleware:
+    """
+    Compresses complete response bodies of at least `minimum_size` bytes
+    with brotli (when installed) or gzip, whichever the client prefers in
+    that order. Streaming responses (SSE, the ICS feed's first render) pass
+    through untouched so chunks are not held back in a compressor.
+    """
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.available = (["br"] if brotli is not None else []) + ["gzip"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.available)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if message.get("more_body") or not self._compressible(headers, body):
+                # Streamed or not worth it: send as is
+                passthrough = True
+                await send(start)
+                await send(message)
+                return
+
+            if len(body) >= THREAD_MINIMUM_SIZE:
+                # Big bodies take milliseconds to compress; keep the event loop free
+                compressed = await anyio.to_thread.run_sync(self._compress, body, encoding)
+            else:
+                compressed = self._compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                # The compressed bytes differ, so a strong tag no longer matches them
+                headers["ETag"] = "W/" + headers["etag"]
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compressible(self, headers: MutableHeaders, body: bytes) -> bool:
+        if len(body) < self.minimum_size or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return content_type in COMPRESSIBLE_TYPES
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
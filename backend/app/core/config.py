@@ -17,6 +17,40 @@ class Settings(BaseSettings):
 
     # Google Gemini
     GEMINI_API_KEY: str = ""
+    AGENT_TURN_TIMEOUT_SECONDS: float = 45.0
+    AGENT_TOOL_TIMEOUT_SECONDS: float = 15.0
+    # Chat history beyond this (estimated) token count is folded into a summary
+    AGENT_HISTORY_TOKEN_BUDGET: int = 4000
+    AGENT_HISTORY_SUMMARY_TOKENS: int = 400
+    # Syllabus search keeps this many users' indexes in memory (least recently used evicted)
+    SYLLABUS_INDEX_MAX_USERS: int = 200
+
+    # Agent turn traces (JSON lines; empty path disables the file sink)
+    TRACE_SINK_PATH: str = "backend/data/agent_traces.jsonl"
+    # The sink rolls over to .1, .2, ... at this size, keeping this many old files
+    TRACE_SINK_MAX_BYTES: int = 10 * 1024 * 1024
+    TRACE_SINK_BACKUPS: int = 3
+    TRACE_BUFFER_SIZE: int = 1000
+
+    # Write-behind buffer for event writes: flushed this long after the first
+    # buffered write, or as soon as this many rows are waiting
+    WRITE_BEHIND_WINDOW_SECONDS: float = 0.25
+    WRITE_BEHIND_MAX_PENDING: int = 200
+
+    # Responses: orjson envelopes for list-heavy endpoints, compression above a size threshold
+    FAST_JSON_RESPONSES: bool = True
+    COMPRESSION_MIN_BYTES: int = 1024
+
+    # ICS subscription feed (VEVENTs rendered per page; rendered feeds cached in memory)
+    ICS_FEED_PAGE_SIZE: int = 500
+    ICS_FEED_CACHE_BYTES: int = 64 * 1024 * 1024
+
+    # Database backend: "supabase", or "sqlite" to run the whole app on a local
+    # file (offline development, single-machine load tests)
+    DB_BACKEND: str = "supabase"
+    # The SQLite file (WAL mode); also the storage fallback when Supabase is not configured
+    LOCAL_DB_PATH: str = "backend/data/canvascal.db"
+    LOCAL_DB_BUSY_TIMEOUT_SECONDS: float = 5.0
 
     # Supabase
     SUPABASE_URL: str = ""
@@ -28,6 +62,18 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str = ""
     GOOGLE_REDIRECT_URI: str = "http://localhost:5173"
 
+    # Google Sync (Calendar API default quota is 600 queries/minute/user)
+    GOOGLE_SYNC_MAX_WORKERS: int = 8
+    GOOGLE_USER_QPS: float = 5.0
+    GOOGLE_USER_BURST: int = 10
+    GOOGLE_SYNC_MAX_ATTEMPTS: int = 5
+
+    # Google push notifications (public HTTPS URL of /calendar/webhook)
+    GOOGLE_WEBHOOK_URL: str = ""
+    GOOGLE_WATCH_TTL_SECONDS: int = 7 * 24 * 3600
+    GOOGLE_WATCH_RENEW_INTERVAL_SECONDS: int = 3600
+    GOOGLE_PULL_DEBOUNCE_SECONDS: float = 5.0
+
     # Security
     SECRET_KEY: str = ""
 
@@ -0,0 +1,41 @@
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.schemas.response import APIResponse
+import json
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+def _default(value: Any):
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    return str(value)
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+class FastJSONResponse(JSONResponse):
+    """JSON rendered in one pass by orjson (or compact stdlib json without it)."""
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def api_response(success: bool, message: str, data: Any = None, status_code: int = 200,
+                 headers: Optional[Dict[str, str]] = None):
+    """
+    The APIResponse envelope for list-heavy endpoints. Rows from the DB are
+    already JSON-shaped, so validating them into a model and serializing it
+    back out is pure overhead; this writes the envelope straight to bytes.
+    Headers must be passed here: a returned Response skips the injected one.
+    """
+    if not settings.FAST_JSON_RESPONSES:
+        return JSONResponse(
+            APIResponse(success=success, message=message, data=data).model_dump(mode="json"),
+            status_code=status_code, headers=headers
+        )
+    return FastJSONResponse({"success": success, "message": message, "data": data}, status_code=status_code, headers=headers)
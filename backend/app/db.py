@@ -1,12 +1,18 @@
 import os
 from supabase import create_client, Client
 from app.core.config import settings
+from app.db_local import LocalClient
 
 class Database:
     client: Client = None
     service_client: Client = None
 
     def __init__(self):
+        if settings.DB_BACKEND == "sqlite":
+            # One local database serves both roles; there is no RLS to bypass
+            self.client = self.service_client = LocalClient(settings.LOCAL_DB_PATH)
+            return
+
         url = settings.SUPABASE_URL
         key = settings.SUPABASE_KEY
         service_key = settings.SUPABASE_SERVICE_ROLE_KEY
@@ -0,0 +1,524 @@
+"""
+SQLite implementation of the slice of the supabase-py client the app uses,
+selected with DB_BACKEND=sqlite. Routers and services keep calling
+get_db().table(...).select/eq/or_/.../execute() and get rows shaped the way
+PostgREST returns them, so the whole app runs on one machine: offline
+development, and load tests whose numbers come from real query plans
+rather than network latency.
+
+Tables mirror schema.sql, including the indexes and the event_changes
+trigger. Auth accepts HS256 tokens signed with SECRET_KEY (see
+LocalAuth.issue_token) in place of Supabase Auth.
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+import base64
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%f000+00:00', 'now')"
+
+# Column types: uuid/text are TEXT, timestamps are fixed-width UTC text so
+# they compare and sort as strings, bool is 0/1 and json is encoded text
+TABLES: Dict[str, dict] = {
+    "events": {
+        "columns": {
+            "id": "uuid", "created_at": "timestamp", "summary": "text", "description": "text",
+            "start_time": "timestamp", "end_time": "timestamp", "location": "text", "event_type": "text",
+            "weight": "real", "google_event_id": "text", "google_sync_hash": "json", "recurrence": "text",
+            "recurrence_exceptions": "json", "recurrence_end": "timestamp", "recurrence_timezone": "text",
+            "user_id": "uuid", "course_id": "text", "source": "text", "verified": "bool", "color_hex": "text",
+        },
+        "primary_key": ("id",),
+        "not_null": ("summary", "start_time", "end_time", "event_type"),
+        "defaults": {"created_at": NOW_SQL, "source": "'manual'", "verified": "0"},
+        "indexes": [("user_id", "start_time", "id"), ("google_event_id",), ("user_id", "recurrence")],
+    },
+    "user_integrations": {
+        "columns": {
+            "user_id": "uuid", "email": "text",
+            "canvas_base_url": "text", "canvas_access_token": "text", "canvas_refresh_token": "text",
+            "canvas_token_expires_at": "timestamp",
+            "google_access_token": "text", "google_refresh_token": "text", "google_calendar_id": "text",
+            "google_token_expires_at": "timestamp", "google_sync_token": "text",
+            "google_channel_id": "text", "google_channel_resource_id": "text", "google_channel_token": "text",
+            "google_channel_expires_at": "timestamp", "ics_feed_token": "text",
+            "created_at": "timestamp", "updated_at": "timestamp",
+        },
+        "primary_key": ("user_id",),
+        "unique": [("ics_feed_token",)],
+        "defaults": {"google_calendar_id": "'primary'", "created_at": NOW_SQL, "updated_at": NOW_SQL},
+        "indexes": [("google_channel_id",)],
+    },
+    "syllabi": {
+        "columns": {
+            "id": "uuid", "user_id": "uuid", "course_name": "text", "raw_text": "text",
+            "raw_text_compressed": "text", "ai_insights": "json",
+            "pdf_url": "text", "created_at": "timestamp", "updated_at": "timestamp",
+        },
+        "primary_key": ("id",),
+        "not_null": ("course_name",),
+        "unique": [("user_id", "course_name")],
+        "defaults": {"created_at": NOW_SQL, "updated_at": NOW_SQL},
+        "indexes": [],
+    },
+    "event_changes": {
+        "columns": {"seq": "int", "user_id": "uuid", "event_id": "uuid", "op": "text", "changed_at": "timestamp"},
+        "primary_key": ("seq",),
+        "not_null": ("user_id", "event_id", "op"),
+        "defaults": {"changed_at": NOW_SQL},
+        "indexes": [("user_id", "seq"), ("user_id", "changed_at")],
+    },
+}
+
+# Columns only push write-backs touch; updates to nothing else are not logged
+SYNC_COLUMNS = ("google_event_id", "google_sync_hash")
+# How long event_changes keeps a user's entries
+CHANGE_RETENTION_DAYS = 30
+
+_VISIBLE_CHANGE = " OR ".join(
+    f'OLD."{column}" IS NOT NEW."{column}"' for column in TABLES["events"]["columns"] if column not in SYNC_COLUMNS
+)
+
+# Mirrors record_event_change() and prune_event_changes() in schema.sql
+TRIGGERS = f"""
+CREATE TRIGGER IF NOT EXISTS record_event_insert AFTER INSERT ON events
+WHEN NEW.user_id IS NOT NULL BEGIN
+  INSERT INTO event_changes (user_id, event_id, op) VALUES (NEW.user_id, NEW.id, 'upsert');
+END;
+DROP TRIGGER IF EXISTS record_event_update;
+CREATE TRIGGER record_event_update AFTER UPDATE ON events
+WHEN {_VISIBLE_CHANGE} BEGIN
+  INSERT INTO event_changes (user_id, event_id, op)
+    SELECT OLD.user_id, OLD.id, 'delete' WHERE OLD.user_id IS NOT NULL AND OLD.user_id IS NOT NEW.user_id;
+  INSERT INTO event_changes (user_id, event_id, op)
+    SELECT NEW.user_id, NEW.id, 'upsert' WHERE NEW.user_id IS NOT NULL;
+END;
+CREATE TRIGGER IF NOT EXISTS record_event_delete AFTER DELETE ON events
+WHEN OLD.user_id IS NOT NULL BEGIN
+  INSERT INTO event_changes (user_id, event_id, op) VALUES (OLD.user_id, OLD.id, 'delete');
+END;
+CREATE TRIGGER IF NOT EXISTS prune_event_changes AFTER INSERT ON event_changes BEGIN
+  DELETE FROM event_changes
+  WHERE user_id = NEW.user_id
+    AND changed_at < strftime('%Y-%m-%dT%H:%M:%f000+00:00', 'now', '-{CHANGE_RETENTION_DAYS} days');
+END;
+"""
+
+SQL_TYPES = {"uuid": "TEXT", "text": "TEXT", "timestamp": "TEXT", "json": "TEXT", "bool": "INTEGER", "real": "REAL", "int": "INTEGER"}
+# SQLITE_MAX_VARIABLE_NUMBER since 3.32
+MAX_VARIABLES = 32766
+
+class LocalDBError(Exception):
+    pass
+
+def _table_sql(name: str, spec: dict) -> str:
+    lines = []
+    for column, kind in spec["columns"].items():
+        line = f'"{column}" {SQL_TYPES[kind]}'
+        if spec["primary_key"] == (column,) and kind == "int":
+            line += " PRIMARY KEY AUTOINCREMENT"
+        if column in spec.get("not_null", ()) or column in spec["primary_key"]:
+            line += " NOT NULL"
+        if column in spec.get("defaults", {}):
+            line += f" DEFAULT ({spec['defaults'][column]})"
+        lines.append(line)
+    if spec["columns"][spec["primary_key"][0]] != "int":
+        lines.append(f"PRIMARY KEY ({', '.join(spec['primary_key'])})")
+    for unique in spec.get("unique", []):
+        lines.append(f"UNIQUE ({', '.join(unique)})")
+    statements = [f"CREATE TABLE IF NOT EXISTS {name} (\n  " + ",\n  ".join(lines) + "\n);"]
+    for columns in spec.get("indexes", []):
+        statements.append(f"CREATE INDEX IF NOT EXISTS {name}_{'_'.join(columns)}_idx ON {name} ({', '.join(columns)});")
+    return "\n".join(statements)
+
+SCHEMA = "\n".join(_table_sql(name, spec) for name, spec in TABLES.items())
+
+def _add_missing_columns(conn: sqlite3.Connection):
+    """ALTER TABLE ... ADD COLUMN for columns added to TABLES after the file was created."""
+    for name, spec in TABLES.items():
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({name})")}
+        for column, kind in spec["columns"].items():
+            if column not in existing:
+                conn.execute(f'ALTER TABLE {name} ADD COLUMN "{column}" {SQL_TYPES[kind]}')
+
+_local = threading.local()
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    One connection per thread and database file, in autocommit mode. WAL
+    lets readers run alongside a writer; writers queue on the busy timeout
+    instead of failing.
+    """
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is None:
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path, timeout=settings.LOCAL_DB_BUSY_TIMEOUT_SECONDS, isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        _add_missing_columns(conn)
+        # After the migration: the update trigger names every events column
+        conn.executescript(TRIGGERS)
+        connections[path] = conn
+    return conn
+
+class write_transaction:
+    """BEGIN IMMEDIATE ... COMMIT: takes the write lock up front so read-modify-write is atomic."""
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+def _now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+def _stamp(value) -> str:
+    if isinstance(value, str):
+        if value.strip().lower() in ("now", "now()"):
+            return _now()
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f+00:00")
+
+def _encode(kind: str, value):
+    if value is None:
+        return None
+    if kind == "timestamp":
+        return _stamp(value)
+    if kind == "bool":
+        return int(value.lower() in ("true", "t", "1")) if isinstance(value, str) else int(bool(value))
+    if kind == "json":
+        return json.dumps(value, default=str)
+    if kind == "real":
+        return float(value)
+    if kind == "int":
+        return int(value)
+    return str(value)
+
+def _decode_row(spec: dict, row: sqlite3.Row) -> dict:
+    decoded = {}
+    for column in row.keys():
+        value, kind = row[column], spec["columns"][column]
+        if value is not None and kind == "bool":
+            value = bool(value)
+        elif value is not None and kind == "json":
+            value = json.loads(value)
+        decoded[column] = value
+    return decoded
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, quoted, current = [], 0, False, ""
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+class LocalResult:
+    def __init__(self, data: List[dict], count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+class LocalQuery:
+    def __init__(self, client: "LocalClient", table: str):
+        if table not in TABLES:
+            raise LocalDBError(f"relation \"{table}\" does not exist")
+        self.client = client
+        self.table = table
+        self.spec = TABLES[table]
+        self.action = "select"
+        self.columns = ["*"]
+        self.count_mode = None
+        self.payload = None
+        self.on_conflict = None
+        self.where: List[Tuple[str, list]] = []
+        self.orderings: List[str] = []
+        self.row_limit: Optional[int] = None
+        self.row_offset: Optional[int] = None
+
+    def _column(self, name: str) -> str:
+        name = name.strip()
+        if name not in self.spec["columns"]:
+            raise LocalDBError(f"column {self.table}.{name} does not exist")
+        return f'"{name}"'
+
+    # Actions
+    def select(self, *columns: str, count: str = None, **kwargs):
+        names = [c.strip() for c in ",".join(columns or ("*",)).split(",") if c.strip()]
+        self.action, self.columns, self.count_mode = "select", names, count
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.action, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict: str = None, **kwargs):
+        self.action, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload, **kwargs):
+        self.action, self.payload = "update", payload
+        return self
+
+    def delete(self, **kwargs):
+        self.action = "delete"
+        return self
+
+    # Filters
+    def _condition(self, column: str, op: str, value, negate: bool = False) -> Tuple[str, list]:
+        sql_column = self._column(column)
+        kind = self.spec["columns"][column.strip()]
+        if op == "is":
+            literal = "NULL" if value is None else {"null": "NULL", "true": "1", "false": "0"}.get(str(value).lower())
+            if literal is None:
+                raise LocalDBError(f"invalid is. value {value!r}")
+            sql, params = f"{sql_column} IS {literal}", []
+        elif op == "in":
+            values = list(value)
+            sql = f"{sql_column} IN ({', '.join('?' for _ in values)})" if values else "0"
+            params = [_encode(kind, v) for v in values]
+        elif op in ("like", "ilike"):
+            pattern = str(value).replace("*", "%")
+            if op == "ilike":
+                # SQLite's LIKE is case-insensitive for ASCII, like ILIKE
+                sql, params = f"{sql_column} LIKE ?", [pattern]
+            else:
+                glob = pattern.replace("[", "[[]").replace("?", "[?]").replace("%", "*").replace("_", "?")
+                sql, params = f"{sql_column} GLOB ?", [glob]
+        else:
+            operator = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}.get(op)
+            if operator is None:
+                raise LocalDBError(f"unsupported operator {op}")
+            sql, params = f"{sql_column} {operator} ?", [_encode(kind, value)]
+        return (f"NOT ({sql})", params) if negate else (sql, params)
+
+    def _parse_tree(self, text: str) -> Tuple[str, list]:
+        """Compiles a PostgREST or()/and() filter body into SQL."""
+        text = text.strip()
+        negate = text.startswith("not.")
+        if negate and (text[4:].startswith("and(") or text[4:].startswith("or(")):
+            sql, params = self._parse_tree(text[4:])
+            return f"NOT ({sql})", params
+        for group, joiner in (("and(", " AND "), ("or(", " OR ")):
+            if text.startswith(group) and text.endswith(")"):
+                children = [self._parse_tree(c) for c in _split_top_level(text[len(group):-1])]
+                return "(" + joiner.join(sql for sql, _ in children) + ")", [p for _, params in children for p in params]
+
+        column, rest = text.split(".", 1)
+        negate = rest.startswith("not.")
+        if negate:
+            rest = rest[4:]
+        op, value = rest.split(".", 1)
+        if op == "in":
+            value = [v.strip().strip('"') for v in _split_top_level(value.strip()[1:-1])]
+        else:
+            value = value.strip('"')
+        return self._condition(column, op, value, negate)
+
+    def _filter(self, column, op, value):
+        self.where.append(self._condition(column, op, value))
+        return self
+
+    def eq(self, column, value): return self._filter(column, "eq", value)
+    def neq(self, column, value): return self._filter(column, "neq", value)
+    def gt(self, column, value): return self._filter(column, "gt", value)
+    def gte(self, column, value): return self._filter(column, "gte", value)
+    def lt(self, column, value): return self._filter(column, "lt", value)
+    def lte(self, column, value): return self._filter(column, "lte", value)
+    def like(self, column, value): return self._filter(column, "like", value)
+    def ilike(self, column, value): return self._filter(column, "ilike", value)
+    def is_(self, column, value): return self._filter(column, "is", value)
+    def in_(self, column, values): return self._filter(column, "in", values)
+
+    def or_(self, filters: str, **kwargs):
+        self.where.append(self._parse_tree(f"or({filters})"))
+        return self
+
+    def order(self, column: str, desc: bool = False, nullsfirst: bool = None, **kwargs):
+        sql = f"{self._column(column)} {'DESC' if desc else 'ASC'}"
+        column = column.strip()
+        if column not in self.spec["primary_key"] and column not in self.spec.get("not_null", ()):
+            # Postgres puts NULLs last ascending and first descending. Only
+            # spelled out for nullable columns: it stops SQLite from
+            # ordering by index
+            nulls_first = desc if nullsfirst is None else nullsfirst
+            sql += f" NULLS {'FIRST' if nulls_first else 'LAST'}"
+        self.orderings.append(sql)
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self.row_limit = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs):
+        self.row_offset, self.row_limit = start, end - start + 1
+        return self
+
+    def execute(self) -> LocalResult:
+        return self.client._execute(self)
+
+    # SQL
+    def _where_sql(self) -> Tuple[str, list]:
+        if not self.where:
+            return "", []
+        return " WHERE " + " AND ".join(sql for sql, _ in self.where), [p for _, params in self.where for p in params]
+
+    def _select_sql(self) -> Tuple[str, list]:
+        projection = "*" if self.columns == ["*"] else ", ".join(self._column(c) for c in self.columns)
+        where, params = self._where_sql()
+        sql = f"SELECT {projection} FROM {self.table}{where}"
+        if self.orderings:
+            sql += " ORDER BY " + ", ".join(self.orderings)
+        if self.row_limit is not None or self.row_offset is not None:
+            sql += " LIMIT ? OFFSET ?"
+            params = params + [self.row_limit if self.row_limit is not None else -1, self.row_offset or 0]
+        return sql, params
+
+    def _rows(self) -> List[dict]:
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        encoded = []
+        for row in rows:
+            row = dict(row)
+            generated = False
+            if self.spec["primary_key"] == ("id",) and row.get("id") is None:
+                row["id"] = str(uuid.uuid4())
+                generated = True
+            item = {}
+            for column, value in row.items():
+                self._column(column)
+                item[column] = _encode(self.spec["columns"][column], value)
+            encoded.append((item, generated))
+        return encoded
+
+    def _write_statements(self) -> List[Tuple[str, list]]:
+        if self.action == "update":
+            changes = dict(self.payload)
+            if "updated_at" in self.spec["columns"] and "updated_at" not in changes:
+                changes["updated_at"] = _now()
+            assignments = ", ".join(f"{self._column(c)} = ?" for c in changes)
+            where, params = self._where_sql()
+            values = [_encode(self.spec["columns"][c], v) for c, v in changes.items()]
+            return [(f"UPDATE {self.table} SET {assignments}{where} RETURNING *", values + params)]
+        if self.action == "delete":
+            where, params = self._where_sql()
+            return [(f"DELETE FROM {self.table}{where} RETURNING *", params)]
+
+        conflict = [c.strip() for c in (self.on_conflict or ",".join(self.spec["primary_key"])).split(",")]
+        # Rows with the same columns share a multi-row statement; missing
+        # columns take their defaults
+        groups: Dict[Tuple[Tuple[str, ...], bool], List[dict]] = {}
+        for item, generated in self._rows():
+            groups.setdefault((tuple(item), generated), []).append(item)
+        statements = []
+        for (columns, generated), items in groups.items():
+            column_sql = ", ".join(self._column(c) for c in columns)
+            per_statement = max(1, MAX_VARIABLES // len(columns))
+            for i in range(0, len(items), per_statement):
+                chunk = items[i:i + per_statement]
+                placeholders = ", ".join("(" + ", ".join("?" for _ in columns) + ")" for _ in chunk)
+                sql = f"INSERT INTO {self.table} ({column_sql}) VALUES {placeholders}"
+                if self.action == "upsert":
+                    # A generated id must not replace the existing row's id
+                    updated = [c for c in columns if c not in conflict and not (generated and c == "id")]
+                    if "updated_at" in self.spec["columns"] and "updated_at" not in columns:
+                        updated.append("updated_at")
+                    assignments = ", ".join(
+                        f'"{c}" = ' + (NOW_SQL if c == "updated_at" and c not in columns else f'excluded."{c}"')
+                        for c in updated
+                    )
+                    sql += f" ON CONFLICT ({', '.join(self._column(c) for c in conflict)}) "
+                    sql += f"DO UPDATE SET {assignments}" if assignments else "DO NOTHING"
+                statements.append((sql + " RETURNING *", [item[c] for item in chunk for c in columns]))
+        return statements
+
+class LocalAuth:
+    """
+    Stand-in for Supabase Auth: HS256 JWTs signed with SECRET_KEY, whose
+    `sub` is the user id. Mint them with issue_token for local clients and
+    load tests.
+    """
+    @staticmethod
+    def _b64(data: bytes) -> str:
+        return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+    @staticmethod
+    def _sign(message: str) -> str:
+        return LocalAuth._b64(hmac.new(settings.SECRET_KEY.encode(), message.encode(), hashlib.sha256).digest())
+
+    @staticmethod
+    def issue_token(user_id: str, email: str = None, expires_in: int = 3600) -> str:
+        header = LocalAuth._b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+        claims = LocalAuth._b64(json.dumps({"sub": user_id, "email": email, "exp": int(time.time()) + expires_in}).encode())
+        return f"{header}.{claims}.{LocalAuth._sign(f'{header}.{claims}')}"
+
+    def get_user(self, token: str):
+        try:
+            header, claims, signature = token.split(".")
+        except ValueError:
+            raise LocalDBError("malformed token")
+        if not settings.SECRET_KEY or not hmac.compare_digest(signature, self._sign(f"{header}.{claims}")):
+            raise LocalDBError("invalid token signature")
+        payload = json.loads(base64.urlsafe_b64decode(claims + "=" * (-len(claims) % 4)))
+        if payload.get("exp", 0) < time.time():
+            raise LocalDBError("token expired")
+        return SimpleNamespace(user=SimpleNamespace(id=payload["sub"], email=payload.get("email")))
+
+class LocalClient:
+    """Drop-in for supabase.Client's table() API, backed by one SQLite file."""
+    def __init__(self, path: str):
+        self.path = path
+        self.auth = LocalAuth()
+
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
+
+    def _execute(self, query: LocalQuery) -> LocalResult:
+        conn = connect(self.path)
+        try:
+            if query.action == "select":
+                sql, params = query._select_sql()
+                rows = [_decode_row(query.spec, r) for r in conn.execute(sql, params).fetchall()]
+                count = None
+                if query.count_mode:
+                    where, where_params = query._where_sql()
+                    count = conn.execute(f"SELECT COUNT(*) FROM {query.table}{where}", where_params).fetchone()[0]
+                return LocalResult(rows, count)
+
+            written = []
+            with write_transaction(conn):
+                for sql, params in query._write_statements():
+                    written.extend(_decode_row(query.spec, r) for r in conn.execute(sql, params).fetchall())
+            return LocalResult(written, len(written) if query.count_mode else None)
+        except sqlite3.Error as e:
+            raise LocalDBError(str(e)) from e
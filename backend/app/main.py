@@ -2,6 +2,8 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import auth, syllabus, canvas, calendar, agent
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+import asyncio
 import logging
 import time
 
@@ -24,6 +26,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large bodies (event lists, syllabi) for clients that accept gzip/br
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_BYTES)
+
 # Request Logging Middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -39,6 +44,28 @@ app.include_router(canvas.router, prefix="/canvas", tags=["Canvas Integration"])
 app.include_router(calendar.router, prefix="/calendar", tags=["Google Calendar"])
 app.include_router(agent.router, prefix="/agent", tags=["AI Agent"])
 
+async def renew_watch_channels_forever():
+    from app.services.google_watch import renew_expiring_channels
+    while True:
+        try:
+            renewed = await asyncio.to_thread(renew_expiring_channels)
+            if renewed:
+                logger.info(f"Renewed {renewed} Google watch channels")
+        except Exception as e:
+            logger.error(f"Watch channel renewal failed: {e}")
+        await asyncio.sleep(settings.GOOGLE_WATCH_RENEW_INTERVAL_SECONDS)
+
+@app.on_event("startup")
+async def start_background_jobs():
+    # Push notifications are only possible with a public webhook URL
+    if settings.GOOGLE_WEBHOOK_URL:
+        asyncio.create_task(renew_watch_channels_forever())
+
+@app.on_event("shutdown")
+async def flush_traces():
+    from app.services.tracing import tracer
+    await asyncio.to_thread(tracer.flush)
+
 @app.get("/")
 async def root():
     logger.info("Root endpoint accessed")
@@ -16,10 +16,35 @@ class EventSchema(BaseModel):
     
     # UX & DB Metadata
     course_id: Optional[str] = Field(None, description="ID of the associated course")
-    source: Literal["ai", "canvas", "manual"] = Field("manual", description="Origin of the event")
+    source: Literal["ai", "canvas", "manual", "google"] = Field("manual", description="Origin of the event")
     verified: bool = Field(False, description="Whether the user has confirmed this event")
     color_hex: Optional[str] = Field(None, description="UI color for the event card")
 
+    # Recurring series (master row only; occurrences are expanded on read)
+    recurrence: Optional[str] = Field(None, description="RRULE line, e.g. 'RRULE:FREQ=WEEKLY;COUNT=10'")
+    recurrence_exceptions: Optional[List[str]] = Field(None, description="UTC start times of cancelled occurrences")
+    recurrence_timezone: Optional[str] = Field(None, description="IANA timezone the rule repeats in")
+
+class EventUpdateSchema(BaseModel):
+    """Partial update of one event; only the fields sent are changed."""
+    id: str = Field(..., description="ID of the event to update")
+    summary: Optional[str] = None
+    description: Optional[str] = None
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    location: Optional[str] = None
+    event_type: Optional[Literal["class", "assignment", "exam", "study", "travel"]] = None
+    weight: Optional[float] = None
+    course_id: Optional[str] = None
+    verified: Optional[bool] = None
+    color_hex: Optional[str] = None
+    recurrence: Optional[str] = None
+    recurrence_exceptions: Optional[List[str]] = None
+    recurrence_timezone: Optional[str] = None
+
+class BulkDeleteRequest(BaseModel):
+    ids: List[str] = Field(..., description="Event or occurrence IDs to delete")
+
 class CalendarSyncRequest(BaseModel):
     events: List[EventSchema]
     google_token: str
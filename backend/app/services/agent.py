@@ -1,133 +1,162 @@
 from google import genai
 from google.genai import types
 from app.core.config import settings
+from app.db import get_db
 from app.services.campus_logic import calculate_transit_time
-from datetime import datetime, timedelta
+from app.services.invalidation import events_changed
+from app.services.agent_context import agent_context_cache
+from app.services.agent_history import history_manager
+from app.services.tracing import tracer
+from app.services.syllabus_index import syllabus_index
+from app.services.recurrence import build_rrule, series_end, contained_filter, expand_rows, cancel_occurrence, split_instance_id
+from datetime import datetime
 from typing import Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
-def chat_with_agent(message: str, user_id: str, history: list = None, timezone: str = "UTC"):
+AGENT_MODEL = 'gemini-2.0-flash'
+# Upper bound on model <-> tool round trips within a single turn
+MAX_TOOL_ROUNDS = 8
+# Passages returned by search_syllabus: enough to answer from, small enough for the prompt
+SYLLABUS_SEARCH_TOP_K = 3
+SYLLABUS_SEARCH_MAX_K = 10
+
+# Strong references to fire-and-forget tasks so they are not garbage collected
+_background_tasks = set()
+
+def get_client() -> genai.Client:
+    return genai.Client(api_key=settings.GEMINI_API_KEY)
+
+async def _execute(query):
+    """Runs a blocking Supabase query off the event loop."""
+    with tracer.span("db", "db"):
+        return await asyncio.to_thread(query.execute)
+
+def _run_in_background(func, *args):
+    """Schedules blocking work (Google pushes) without holding up the turn."""
+    task = asyncio.create_task(asyncio.to_thread(func, *args))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+def _sync_to_google(user_id: str, events: list):
+    try:
+        from app.services.google_calendar import get_calendar_service
+        get_calendar_service(user_id).sync_events(events)
+    except Exception as e:
+        logger.error(f"Failed to auto-sync agent events: {e}")
+
+def _delete_from_google(user_id: str, google_event_id: str):
+    try:
+        from app.services.google_calendar import get_calendar_service
+        get_calendar_service(user_id).delete_event(google_event_id)
+    except Exception as e:
+        logger.error(f"Failed to delete from Google Calendar: {e}")
+
+def build_agent_tools(user_id: str, mutations: list = None, timezone: str = "UTC") -> list:
     """
-    Sends a message to the Gemini Agent with access to tools.
-    The tools are defined locally to capture the user_id.
+    Builds the agent's tools. They are defined inside to capture the user_id
+    closure, so the model never sees (or chooses) whose calendar it touches.
+    Every write is also recorded in `mutations` so callers can tell the
+    client which events changed.
     """
-    if not settings.GEMINI_API_KEY:
-        return "Gemini API Key is not configured."
+    if mutations is None:
+        mutations = []
 
-    # Define tools inside to capture user_id closure
-    def get_calendar_events(start_time: str, end_time: str, keyword: Optional[str] = None):
+    async def get_calendar_events(start_time: str, end_time: str, keyword: Optional[str] = None):
         """
         List events from the calendar between two ISO 8601 timestamps.
         Optional 'keyword' filters events where the summary contains the given text (case-insensitive).
         """
-        from app.db import get_db
         db = get_db()
         try:
-            query = db.table("events").select("*").eq("user_id", user_id).gte("start_time", start_time).lte("end_time", end_time)
-            
+            query = db.table("events").select("*").eq("user_id", user_id).or_(contained_filter(start_time, end_time))
+
             if keyword:
                 query = query.ilike("summary", f"%{keyword}%")
-                
-            result = query.execute()
-            return result.data
+
+            result = await _execute(query)
+            return expand_rows(result.data, start_time, end_time)
         except Exception as e:
             return {"error": str(e)}
 
-    def add_calendar_event(summary: str, start_time: str, end_time: str, description: Optional[str] = None, location: Optional[str] = None, event_type: Optional[str] = None, repeat_frequency: Optional[str] = None, repeat_count: Optional[int] = None, repeat_until: Optional[str] = None):
+    async def add_calendar_event(summary: str, start_time: str, end_time: str, description: Optional[str] = None, location: Optional[str] = None, event_type: Optional[str] = None, repeat_frequency: Optional[str] = None, repeat_count: Optional[int] = None, repeat_until: Optional[str] = None):
         """
         Add a new event to the calendar. Can be a single event or a recurring series.
         """
-        from app.db import get_db
         db = get_db()
-        created_events = []
-        
+
         # Apply defaults manually since Gemini API schema doesn't support them in signature
         final_event_type = event_type or "study"
-        
+
         try:
-            start_dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-            end_dt = datetime.fromisoformat(end_time.replace('Z', '+00:00'))
-            
-            delta = None
-            if repeat_frequency == 'daily': delta = timedelta(days=1)
-            elif repeat_frequency == 'weekly': delta = timedelta(weeks=1)
-                
-            count = 1
-            if delta:
-                if repeat_until:
-                    until_dt = datetime.fromisoformat(repeat_until.replace('Z', '+00:00'))
-                    temp_curr, temp_count = start_dt, 0
-                    while temp_curr <= until_dt:
-                        temp_count += 1
-                        temp_curr += delta
-                    count = temp_count
-                elif repeat_count: count = repeat_count
-            
-            for i in range(count):
-                current_start = start_dt + (delta * i) if delta else start_dt
-                current_end = end_dt + (delta * i) if delta else end_dt
-                
-                event_data = {
-                    "user_id": user_id,
-                    "summary": summary,
-                    "start_time": current_start.isoformat(),
-                    "end_time": current_end.isoformat(),
-                    "description": description or "",
-                    "location": location or "",
-                    "event_type": final_event_type,
-                    "source": "ai"
-                }
-                result = db.table("events").insert(event_data).execute()
-                created_events.extend(result.data)
-                
+            event_data = {
+                "user_id": user_id,
+                "summary": summary,
+                "start_time": start_time,
+                "end_time": end_time,
+                "description": description or "",
+                "location": location or "",
+                "event_type": final_event_type,
+                "source": "ai"
+            }
+
+            # A series is one master row with an RRULE, expanded on read
+            recurrence = build_rrule(repeat_frequency, repeat_count, repeat_until)
+            if recurrence:
+                event_data["recurrence"] = recurrence
+                event_data["recurrence_timezone"] = timezone
+                event_data["recurrence_end"] = series_end(event_data)
+
+            result = await _execute(db.table("events").insert(event_data))
+            created_events = result.data
+
+            events_changed(user_id)
+            mutations.append({"action": "created", "events": created_events})
+
             # Trigger background sync to Google
-            try:
-                from app.services.google_calendar import get_calendar_service
-                service = get_calendar_service(user_id)
-                service.sync_events(created_events)
-            except Exception as e:
-                logger.error(f"Failed to auto-sync agent events: {e}")
-
-            return {"status": "success", "events_created": len(created_events)}
+            _run_in_background(_sync_to_google, user_id, created_events)
+
+            return {"status": "success", "events_created": len(created_events), "recurrence": recurrence}
         except Exception as e:
             return {"error": str(e)}
 
-    def delete_calendar_event(event_id: str):
-        """Delete an event by ID."""
-        from app.db import get_db
-        from app.services.google_calendar import get_calendar_service
-        
+    async def delete_calendar_event(event_id: str):
+        """Delete an event by ID. Deleting one occurrence of a recurring series only cancels that occurrence."""
         db = get_db()
         try:
+            master = await asyncio.to_thread(cancel_occurrence, db, user_id, event_id)
+            if master:
+                events_changed(user_id)
+                mutations.append({"action": "updated", "event": master})
+                _run_in_background(_sync_to_google, user_id, [master])
+                return {"status": "success", "deleted_count": 1, "google_deleted": bool(master.get("google_event_id"))}
+
             # 1. Fetch event to check for Google ID
-            event_res = db.table("events").select("google_event_id").eq("id", event_id).eq("user_id", user_id).execute()
+            event_res = await _execute(db.table("events").select("google_event_id").eq("id", event_id).eq("user_id", user_id))
             if not event_res.data:
                 return {"error": "Event not found or access denied"}
-            
+
             google_event_id = event_res.data[0].get("google_event_id")
-            
+
             # 2. Delete from Google Calendar if exists
             if google_event_id:
-                try:
-                    service = get_calendar_service(user_id)
-                    service.delete_event(google_event_id)
-                except Exception as e:
-                    logger.error(f"Failed to delete from Google Calendar: {e}")
+                _run_in_background(_delete_from_google, user_id, google_event_id)
 
             # 3. Delete from DB
-            result = db.table("events").delete().eq("id", event_id).eq("user_id", user_id).execute()
+            result = await _execute(db.table("events").delete().eq("id", event_id).eq("user_id", user_id))
+            events_changed(user_id)
+            mutations.append({"action": "deleted", "event_id": event_id})
             return {"status": "success", "deleted_count": len(result.data), "google_deleted": bool(google_event_id)}
         except Exception as e:
             return {"error": str(e)}
 
-    def update_calendar_event(event_id: str, summary: Optional[str] = None, start_time: Optional[str] = None, end_time: Optional[str] = None, description: Optional[str] = None, location: Optional[str] = None):
+    async def update_calendar_event(event_id: str, summary: Optional[str] = None, start_time: Optional[str] = None, end_time: Optional[str] = None, description: Optional[str] = None, location: Optional[str] = None):
         """
         Update an existing event. Only provided fields will be updated.
         """
-        from app.db import get_db
-        from app.services.google_calendar import get_calendar_service
         db = get_db()
         try:
             # 1. Prepare Update Data
@@ -137,144 +166,318 @@ def chat_with_agent(message: str, user_id: str, history: list = None, timezone:
             if end_time: update_data["end_time"] = end_time
             if description: update_data["description"] = description
             if location: update_data["location"] = location
-            
+
             if not update_data:
                 return {"error": "No fields provided to update"}
 
+            # Editing one occurrence detaches it from its series as a standalone event
+            master = await asyncio.to_thread(cancel_occurrence, db, user_id, event_id)
+            if master:
+                _, occurrence_start = split_instance_id(event_id)
+                duration = datetime.fromisoformat(master["end_time"].replace('Z', '+00:00')) - \
+                    datetime.fromisoformat(master["start_time"].replace('Z', '+00:00'))
+                detached = {
+                    "user_id": user_id,
+                    "summary": master["summary"],
+                    "start_time": occurrence_start.isoformat(),
+                    "end_time": (occurrence_start + duration).isoformat(),
+                    "description": master.get("description") or "",
+                    "location": master.get("location") or "",
+                    "event_type": master["event_type"],
+                    "source": master.get("source") or "ai",
+                    **update_data
+                }
+                result = await _execute(db.table("events").insert(detached))
+                events_changed(user_id)
+                mutations.append({"action": "updated", "event": master})
+                mutations.append({"action": "created", "events": result.data})
+                _run_in_background(_sync_to_google, user_id, [master] + result.data)
+                return {"status": "success", "event": result.data[0] if result.data else detached}
+
             # 2. Update DB
-            result = db.table("events").update(update_data).eq("id", event_id).eq("user_id", user_id).execute()
+            result = await _execute(db.table("events").update(update_data).eq("id", event_id).eq("user_id", user_id))
             if not result.data:
                 return {"error": "Event not found or update failed"}
-            
+
             updated_event = result.data[0]
+            if updated_event.get("recurrence") and ("start_time" in update_data or "end_time" in update_data):
+                updated_event["recurrence_end"] = series_end(updated_event)
+                await _execute(db.table("events").update({"recurrence_end": updated_event["recurrence_end"]}).eq("id", event_id).eq("user_id", user_id))
+            events_changed(user_id)
+            mutations.append({"action": "updated", "event": updated_event})
 
             # 3. Sync to Google
-            try:
-                service = get_calendar_service(user_id)
-                service.sync_events([updated_event])
-            except Exception as e:
-                logger.error(f"Failed to sync updated event: {e}")
+            _run_in_background(_sync_to_google, user_id, [updated_event])
 
             return {"status": "success", "event": updated_event}
         except Exception as e:
             return {"error": str(e)}
 
-    def check_calendar_availability(start_time: str, end_time: str):
-        """Check if the user is free between the given times."""
-        from app.db import get_db
-        db = get_db()
+    async def check_calendar_availability(start_time: str, end_time: str):
+        """
+        Check if the user is free between the given times, across their CanvasCal
+        events and their other Google calendars. Cheap to call repeatedly for
+        candidate slots in the same week.
+        """
+        from app.services.availability import availability_service
         try:
-            query = db.table("events").select("id").eq("user_id", user_id).lte("start_time", end_time).gte("end_time", start_time)
-            data = query.execute().data
-            return {"available": len(data) == 0, "conflicting_events": len(data)}
+            return await asyncio.to_thread(availability_service.check, user_id, start_time, end_time)
         except Exception as e:
             return {"error": str(e)}
 
-    def get_transit_time(origin: str, destination: str):
+    async def get_transit_time(origin: str, destination: str):
         """Calculate transit time between two locations in minutes."""
         return {"minutes": calculate_transit_time(origin, destination)}
 
-    agent_tools = [
+    async def search_syllabus(query: str, course_name: Optional[str] = None, top_k: Optional[int] = None):
+        """
+        Search the user's uploaded syllabi for passages relevant to a question,
+        e.g. grading weights, late policy, office hours or exam rules.
+        Optionally restrict to one course. Returns the best matching passages.
+        """
+        k = min(top_k or SYLLABUS_SEARCH_TOP_K, SYLLABUS_SEARCH_MAX_K)
+        try:
+            with tracer.span("syllabus_search", "index"):
+                passages = await asyncio.to_thread(syllabus_index.search, user_id, query, k, course_name)
+            if not passages:
+                return {"passages": [], "message": "No matching syllabus passages found."}
+            return {"passages": passages}
+        except Exception as e:
+            return {"error": str(e)}
+
+    return [
         get_calendar_events,
         add_calendar_event,
         delete_calendar_event,
         update_calendar_event,
         check_calendar_availability,
-        get_transit_time
+        get_transit_time,
+        search_syllabus
     ]
 
-    try:
-        # CONTEXT INJECTION: Fetch upcoming 7 days of events
-        from app.db import get_db
-        db = get_db()
-        
-        ctx_start = datetime.now()
-        ctx_end = ctx_start + timedelta(days=7)
-        
-        try:
-            ctx_res = db.table("events").select("id, summary, start_time, end_time, event_type") \
-                .eq("user_id", user_id) \
-                .gte("start_time", ctx_start.isoformat()) \
-                .lte("end_time", ctx_end.isoformat()) \
-                .execute()
-            
-            upcoming_events_text = "No upcoming events found."
-            if ctx_res.data:
-                lines = []
-                for e in ctx_res.data:
-                    # Include ID so agent can act immediately
-                    try:
-                        s = datetime.fromisoformat(e['start_time'].replace('Z', '+00:00'))
-                        day_str = s.strftime('%A, %b %d @ %I:%M %p')
-                        lines.append(f"- [{e['id']}] {day_str}: {e['summary']} ({e['event_type']})")
-                    except:
-                        continue
-                upcoming_events_text = "\n".join(lines)
-        except Exception as e:
-            upcoming_events_text = f"Error loading context: {e}"
-
-        client = genai.Client(api_key=settings.GEMINI_API_KEY)
-        current_date = datetime.now()
-        system_instruction = f"""
+def build_system_instruction(user_id: str, timezone: str, upcoming_events_text: str, history_summary: Optional[str] = None) -> str:
+    current_date = datetime.now()
+    earlier = f"""
+        === EARLIER IN THIS CONVERSATION (summary) ===
+        {history_summary}
+        ==============================================
+""" if history_summary else ""
+    return f"""
         You are an intelligent Academic Calendar Assistant.
         Current Date: {current_date.strftime('%A, %Y-%m-%d')}
         Current Year: {current_date.year}
         User ID: {user_id}
         User Timezone: {timezone}
-        
+
         === YOUR CONTEXT (Next 7 Days) ===
         {upcoming_events_text}
         ==================================
-        
+{earlier}
         Your Goal: Help the user manage their schedule. Be fast, concise, and smart.
         1. YOU HAVE IDS: The IDs in brackets [like-this] are the database IDs. If the user asks to delete/update an event listed above, use that ID directly.
         2. INFER information. Calculate relative dates like 'next Tuesday'.
         3. Use tools to check availability before adding events if appropriate.
         4. TIMEZONE: The user is in {timezone}. When calling tools, generate ISO 8601 timestamps with the correct offset for this timezone.
         5. DELETING/UPDATING: If the event isn't in the context above, use `get_calendar_events` with the `keyword` to find it first.
+        6. SYLLABUS QUESTIONS: For course policies (grading, late work, office hours, exams), use `search_syllabus` and answer from the passages it returns. Say so if nothing relevant is found.
         """
 
-        # Construct full conversation history
-        contents = []
-        if history:
-            for turn in history:
-                # Ensure parts is a list of strings for now (simple text history)
-                # If complex parts come in, we might need better parsing
-                raw_parts = turn.get("parts", [])
-                parts_list = []
-                
-                if isinstance(raw_parts, str):
-                    parts_list.append(types.Part(text=raw_parts))
-                elif isinstance(raw_parts, list):
-                    for p in raw_parts:
-                        # p could be a dict like {'text': '...'} or just a string if simplified
-                        if isinstance(p, dict) and 'text' in p:
-                            parts_list.append(types.Part(text=p['text']))
-                        elif isinstance(p, str):
-                            parts_list.append(types.Part(text=p))
-                
-                if parts_list:
-                    contents.append(types.Content(
-                        role=turn.get("role", "user"),
-                        parts=parts_list
-                    ))
-        
-        # Add current user message
-        contents.append(types.Content(
-            role="user",
-            parts=[types.Part(text=message)]
-        ))
-        
-        response = client.models.generate_content(
-            model='gemini-2.0-flash',
-            contents=contents,
-            config=types.GenerateContentConfig(
-                tools=agent_tools,
-                system_instruction=system_instruction,
-                automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=False)
-            )
-        )
-        return response.text
+def build_history(history: list = None) -> list:
+    """Converts client-supplied history into Content turns."""
+    contents = []
+    if history:
+        for turn in history:
+            # Ensure parts is a list of strings for now (simple text history)
+            # If complex parts come in, we might need better parsing
+            raw_parts = turn.get("parts", [])
+            parts_list = []
+
+            if isinstance(raw_parts, str):
+                parts_list.append(types.Part(text=raw_parts))
+            elif isinstance(raw_parts, list):
+                for p in raw_parts:
+                    # p could be a dict like {'text': '...'} or just a string if simplified
+                    if isinstance(p, dict) and 'text' in p:
+                        parts_list.append(types.Part(text=p['text']))
+                    elif isinstance(p, str):
+                        parts_list.append(types.Part(text=p))
+
+            if parts_list:
+                contents.append(types.Content(
+                    role=turn.get("role", "user"),
+                    parts=parts_list
+                ))
+
+    return contents
+
+async def call_tool(tools_by_name: dict, call: types.FunctionCall, timeout: float = None) -> types.Part:
+    """Runs one model-requested tool call under the per-tool timeout."""
+    func = tools_by_name.get(call.name)
+    if timeout is None:
+        timeout = settings.AGENT_TOOL_TIMEOUT_SECONDS
+    with tracer.span(call.name, "tool"):
+        response = await _invoke_tool(func, call, timeout)
+    return types.Part.from_function_response(name=call.name, response=response)
+
+async def _invoke_tool(func, call: types.FunctionCall, timeout: float) -> dict:
+    try:
+        if func is None:
+            raise ValueError(f"Unknown tool: {call.name}")
+        result = await asyncio.wait_for(func(**(call.args or {})), timeout=timeout)
+        response = {"result": result}
+    except asyncio.TimeoutError:
+        logger.warning(f"Tool {call.name} timed out")
+        response = {"error": f"{call.name} timed out"}
     except Exception as e:
-        logger.error(f"Agent Error: {e}")
-        return f"I encountered an error: {str(e)}"
\ No newline at end of file
+        response = {"error": str(e)}
+    return response
+
+async def run_agent_turn(client, contents: list, config: types.GenerateContentConfig, tools_by_name: dict) -> str:
+    """
+    Model <-> tool loop. Tool calls from one model response run concurrently;
+    their results are fed back until the model answers in text.
+    """
+    for round_number in range(MAX_TOOL_ROUNDS):
+        with tracer.span("model", "model", round=round_number):
+            response = await client.aio.models.generate_content(
+                model=AGENT_MODEL,
+                contents=contents,
+                config=config
+            )
+        calls = response.function_calls
+        if not calls:
+            return response.text
+
+        contents.append(response.candidates[0].content)
+        parts = await asyncio.gather(*(call_tool(tools_by_name, call) for call in calls))
+        contents.append(types.Content(role="user", parts=list(parts)))
+
+    return "I couldn't finish that request in a reasonable number of steps. Please try rephrasing it."
+
+async def _traced(name: str, coro):
+    with tracer.span(name, "prepare"):
+        return await coro
+
+async def prepare_turn(message: str, user_id: str, history: list, timezone: str, mutations: list = None):
+    """Loads context and builds everything one agent turn needs."""
+    agent_tools = build_agent_tools(user_id, mutations, timezone)
+    tools_by_name = {tool.__name__: tool for tool in agent_tools}
+
+    client = get_client()
+    # Context lookup and history compaction are independent
+    upcoming_events_text, (history_summary, recent_turns) = await asyncio.gather(
+        _traced("context", agent_context_cache.get(user_id)),
+        _traced("history", history_manager.compact(user_id, build_history(history), client))
+    )
+
+    config = types.GenerateContentConfig(
+        tools=agent_tools,
+        system_instruction=build_system_instruction(user_id, timezone, upcoming_events_text, history_summary),
+        # We run the tool loop ourselves (per-tool timeouts, concurrent calls)
+        automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
+    )
+    contents = recent_turns + [types.Content(role="user", parts=[types.Part(text=message)])]
+    return client, contents, config, tools_by_name
+
+async def chat_with_agent(message: str, user_id: str, history: list = None, timezone: str = "UTC"):
+    """
+    Sends a message to the Gemini Agent with access to tools.
+    Fully async: model calls, DB queries and Google pushes never block the
+    event loop, and the whole turn is bounded by AGENT_TURN_TIMEOUT_SECONDS.
+    """
+    if not settings.GEMINI_API_KEY:
+        return "Gemini API Key is not configured."
+
+    with tracer.trace("agent_turn", user_id=user_id, streaming=False) as turn:
+        async def turn_body():
+            # Context load and history summarization count against the turn too
+            client, contents, config, tools_by_name = await prepare_turn(message, user_id, history, timezone)
+            return await run_agent_turn(client, contents, config, tools_by_name)
+
+        try:
+            return await asyncio.wait_for(turn_body(), timeout=settings.AGENT_TURN_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            turn.root.error = "timeout"
+            logger.error(f"Agent turn timed out for user {user_id}")
+            return "Sorry, that took too long. Please try again."
+        except Exception as e:
+            turn.root.error = type(e).__name__
+            logger.error(f"Agent Error: {e}")
+            return f"I encountered an error: {str(e)}"
+
+async def stream_chat_with_agent(message: str, user_id: str, history: list = None, timezone: str = "UTC"):
+    """
+    Streaming variant of chat_with_agent. Yields (event, data) pairs as they happen:
+    - ("token", {"text"}) for each chunk of model text
+    - ("tool_start", {"name", "args"}) / ("tool_end", {"name", "ok"}) around tool calls
+    - ("done", {"response", "mutations"}) once, with the full reply and every event change
+    - ("error", {"message"}) instead of "done" if the turn fails or times out
+    """
+    if not settings.GEMINI_API_KEY:
+        yield "error", {"message": "Gemini API Key is not configured."}
+        return
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.AGENT_TURN_TIMEOUT_SECONDS
+    remaining = lambda: max(deadline - loop.time(), 0)
+    mutations = []
+    reply = []
+
+    with tracer.trace("agent_turn", user_id=user_id, streaming=True) as turn:
+        try:
+            client, contents, config, tools_by_name = await asyncio.wait_for(
+                prepare_turn(message, user_id, history, timezone, mutations),
+                timeout=remaining()
+            )
+
+            for round_number in range(MAX_TOOL_ROUNDS):
+                stream = await asyncio.wait_for(
+                    client.aio.models.generate_content_stream(model=AGENT_MODEL, contents=contents, config=config),
+                    timeout=remaining()
+                )
+                model_parts, calls = [], []
+                with tracer.span("model", "model", round=round_number, streaming=True):
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(anext(stream), timeout=remaining())
+                        except StopAsyncIteration:
+                            break
+                        if not chunk.candidates or not chunk.candidates[0].content:
+                            continue
+                        for part in chunk.candidates[0].content.parts or []:
+                            model_parts.append(part)
+                            if part.function_call:
+                                calls.append(part.function_call)
+                            elif part.text:
+                                reply.append(part.text)
+                                yield "token", {"text": part.text}
+
+                if not calls:
+                    yield "done", {"response": "".join(reply), "mutations": mutations}
+                    return
+
+                contents.append(types.Content(role="model", parts=model_parts))
+                for call in calls:
+                    yield "tool_start", {"name": call.name, "args": call.args or {}}
+
+                timeout = min(settings.AGENT_TOOL_TIMEOUT_SECONDS, remaining())
+                tasks = [asyncio.create_task(call_tool(tools_by_name, call, timeout)) for call in calls]
+                for finished in asyncio.as_completed(tasks):
+                    part = await finished
+                    response = part.function_response.response
+                    failed = "error" in response or (isinstance(response.get("result"), dict) and "error" in response["result"])
+                    yield "tool_end", {"name": part.function_response.name, "ok": not failed}
+                contents.append(types.Content(role="user", parts=[task.result() for task in tasks]))
+
+            yield "done", {
+                "response": "I couldn't finish that request in a reasonable number of steps. Please try rephrasing it.",
+                "mutations": mutations
+            }
+        except asyncio.TimeoutError:
+            turn.root.error = "timeout"
+            logger.error(f"Agent turn timed out for user {user_id}")
+            yield "error", {"message": "Sorry, that took too long. Please try again.", "mutations": mutations}
+        except Exception as e:
+            turn.root.error = type(e).__name__
+            logger.error(f"Agent Error: {e}")
+            yield "error", {"message": f"I encountered an error: {str(e)}", "mutations": mutations}
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta, timezone
+from app.db import get_db
+from app.services.invalidation import on_events_changed
+from app.services.recurrence import contained_filter, expand_rows
+from typing import Dict
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class ContextSnapshot:
+    """The prebuilt upcoming-events block for one user and one time bucket."""
+    def __init__(self, bucket: int, text: str):
+        self.bucket = bucket
+        self.text = text
+
+class AgentContextCache:
+    """
+    Per-user cache of the agent's "next N days" context block.
+
+    Snapshots are keyed by a time bucket (default 15 minutes) so the window
+    slides forward on its own, and dropped by events_changed whenever a write
+    path touches the user's events. A chat turn is then a dict lookup.
+    """
+    def __init__(self, window: timedelta = timedelta(days=7), bucket_seconds: int = 900):
+        self.window = window
+        self.bucket_seconds = bucket_seconds
+        self._snapshots: Dict[str, ContextSnapshot] = {}
+        # Bumped on invalidation so a build racing a write is not cached
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, now: datetime) -> int:
+        return int(now.timestamp()) // self.bucket_seconds
+
+    async def get(self, user_id: str) -> str:
+        bucket = self._bucket(datetime.now())
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot and snapshot.bucket == bucket:
+                return snapshot.text
+            generation = self._generations.get(user_id, 0)
+
+        try:
+            text = await asyncio.to_thread(self._build, user_id, bucket)
+        except Exception as e:
+            # Not cached: the next turn retries
+            return f"Error loading context: {e}"
+
+        with self._lock:
+            if self._generations.get(user_id, 0) == generation:
+                self._snapshots[user_id] = ContextSnapshot(bucket, text)
+        return text
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._snapshots.pop(user_id, None)
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def _build(self, user_id: str, bucket: int) -> str:
+        """CONTEXT INJECTION: the user's events in the window, one line each."""
+        ctx_start = datetime.fromtimestamp(bucket * self.bucket_seconds, tz=timezone.utc)
+        ctx_end = ctx_start + self.window
+
+        ctx_res = get_db().table("events") \
+            .select("id, summary, start_time, end_time, event_type, recurrence, recurrence_exceptions, recurrence_timezone") \
+            .eq("user_id", user_id) \
+            .or_(contained_filter(ctx_start, ctx_end)) \
+            .execute()
+
+        events = sorted(expand_rows(ctx_res.data, ctx_start, ctx_end), key=lambda e: e["start_time"])
+        if not events:
+            return "No upcoming events found."
+
+        lines = []
+        for e in events:
+            # Include ID so agent can act immediately
+            try:
+                s = datetime.fromisoformat(e['start_time'].replace('Z', '+00:00'))
+                day_str = s.strftime('%A, %b %d @ %I:%M %p')
+                lines.append(f"- [{e['id']}] {day_str}: {e['summary']} ({e['event_type']})")
+            except:
+                continue
+        return "\n".join(lines)
+
+agent_context_cache = AgentContextCache()
+on_events_changed(agent_context_cache.invalidate)
@@ -0,0 +1,120 @@
+from google.genai import types
+from app.core.config import settings
+from typing import Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MODEL = 'gemini-2.0-flash'
+SUMMARY_PROMPT = """Summarize this conversation between a student and their calendar assistant.
+Keep every fact the assistant may need later: events created, moved or deleted
+(with their IDs), dates and times agreed on, and the student's stated preferences.
+Be terse. Do not add anything that was not said.
+
+{previous}
+{turns}"""
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text; close enough for budgeting
+    # and free, unlike a count_tokens round trip on every turn
+    return len(text) // 4 + 1
+
+def content_text(content: types.Content) -> str:
+    return " ".join(part.text for part in content.parts or [] if part.text)
+
+def content_tokens(content: types.Content) -> int:
+    return estimate_tokens(content_text(content))
+
+def _prefix_hash(turns: List[types.Content]) -> str:
+    digest = hashlib.sha256()
+    for turn in turns:
+        digest.update(f"{turn.role}\x00{content_text(turn)}\x01".encode())
+    return digest.hexdigest()
+
+class HistorySummary:
+    """A rolling summary of the first `count` turns of a user's conversation."""
+    def __init__(self, count: int, prefix_hash: str, text: str):
+        self.count = count
+        self.prefix_hash = prefix_hash
+        self.text = text
+
+class HistoryManager:
+    """
+    Keeps the history sent to the model under a token budget.
+
+    Clients resend the whole conversation every turn. While it fits the budget
+    it goes through verbatim. Past that, older turns are folded into a rolling
+    summary and only the most recent half of the budget stays verbatim. The
+    summary is cached per user and reused for as long as the turns after it
+    still fit, so summarization runs once per half-budget of new conversation,
+    not every turn.
+    """
+    def __init__(self, budget: int = None, summary_tokens: int = None):
+        self.budget = budget or settings.AGENT_HISTORY_TOKEN_BUDGET
+        self.summary_tokens = summary_tokens or settings.AGENT_HISTORY_SUMMARY_TOKENS
+        self._summaries: Dict[str, HistorySummary] = {}
+        self._lock = threading.Lock()
+
+    async def compact(self, user_id: str, turns: List[types.Content], client) -> Tuple[Optional[str], List[types.Content]]:
+        """Returns (summary of folded turns or None, turns to send verbatim)."""
+        with self._lock:
+            cached = self._summaries.get(user_id)
+        if cached and (cached.count > len(turns) or _prefix_hash(turns[:cached.count]) != cached.prefix_hash):
+            # A different (or edited) conversation
+            cached = None
+
+        start = cached.count if cached else 0
+        if sum(content_tokens(t) for t in turns[start:]) <= self.budget:
+            return (cached.text if cached else None), turns[start:]
+
+        fold = self._fold_point(turns, start)
+        previous = cached.text if cached else None
+        summary = await self._summarize(client, previous, turns[start:fold])
+
+        with self._lock:
+            self._summaries[user_id] = HistorySummary(fold, _prefix_hash(turns[:fold]), summary)
+        return summary, turns[fold:]
+
+    def _fold_point(self, turns: List[types.Content], start: int) -> int:
+        """Index of the first verbatim turn: the newest turns within half the budget."""
+        keep_budget = self.budget // 2
+        fold, used = len(turns), 0
+        while fold > start + 1:
+            cost = content_tokens(turns[fold - 1])
+            if used + cost > keep_budget and fold < len(turns):
+                break
+            used += cost
+            fold -= 1
+        # Verbatim history should open on a user turn
+        while fold < len(turns) - 1 and turns[fold].role != "user":
+            fold += 1
+        return fold
+
+    async def _summarize(self, client, previous: Optional[str], turns: List[types.Content]) -> str:
+        transcript = "\n".join(f"{t.role}: {content_text(t)}" for t in turns)
+        prompt = SUMMARY_PROMPT.format(
+            previous=f"Summary so far:\n{previous}\n\nNew turns:" if previous else "Conversation:",
+            turns=transcript
+        )
+        try:
+            response = await asyncio.wait_for(
+                client.aio.models.generate_content(
+                    model=SUMMARY_MODEL,
+                    contents=prompt,
+                    config=types.GenerateContentConfig(max_output_tokens=self.summary_tokens)
+                ),
+                timeout=settings.AGENT_TOOL_TIMEOUT_SECONDS
+            )
+            if response.text:
+                return response.text.strip()
+        except Exception as e:
+            logger.warning(f"History summarization failed, truncating instead: {e}")
+
+        # Fallback: keep the most recent part of the raw transcript within the summary budget
+        text = f"{previous}\n{transcript}" if previous else transcript
+        return text[-self.summary_tokens * 4:]
+
+history_manager = HistoryManager()
@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta, timezone
+from app.db import get_db
+from app.services.invalidation import on_events_changed
+from app.services.recurrence import overlap_filter, expand_rows
+from typing import Dict, List
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Google caps a single FreeBusy query at 50 calendars
+FREEBUSY_MAX_CALENDARS = 50
+
+def _parse(value) -> datetime:
+    dt = value if isinstance(value, datetime) else datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+class BusyWindow:
+    """Busy intervals for one user over [start, end), fetched in one go."""
+    def __init__(self, start: datetime, end: datetime, busy: List[dict], expires_at: float):
+        self.start = start
+        self.end = end
+        self.busy = busy
+        self.expires_at = expires_at
+
+    def covers(self, start: datetime, end: datetime) -> bool:
+        return self.start <= start and end <= self.end and time.monotonic() < self.expires_at
+
+    def conflicts(self, start: datetime, end: datetime) -> List[dict]:
+        # Overlap logic: (StartA < EndB) and (EndA > StartB)
+        return [b for b in self.busy if b["start"] < end and b["end"] > start]
+
+class AvailabilityService:
+    """
+    Answers "is the user free?" from a cached per-user busy window.
+
+    A window merges our own `events` rows with the user's other Google
+    calendars (one batched FreeBusy query), so the agent can test many
+    candidate slots against a single upstream call.
+    """
+    def __init__(self, window: timedelta = timedelta(days=7), ttl_seconds: int = 300, calendars_ttl_seconds: int = 3600):
+        self.window = window
+        self.ttl_seconds = ttl_seconds
+        self.calendars_ttl_seconds = calendars_ttl_seconds
+        self._windows: Dict[str, List[BusyWindow]] = {}
+        self._calendars: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def check(self, user_id: str, start_time, end_time) -> dict:
+        start, end = _parse(start_time), _parse(end_time)
+        conflicts = self._get_window(user_id, start, end).conflicts(start, end)
+        return {
+            "available": len(conflicts) == 0,
+            "conflicting_events": len(conflicts),
+            "conflicts": [
+                {
+                    "start": c["start"].isoformat(),
+                    "end": c["end"].isoformat(),
+                    "source": c["source"],
+                    "summary": c.get("summary"),
+                }
+                for c in conflicts
+            ],
+        }
+
+    def get_busy(self, user_id: str, start_time, end_time) -> List[dict]:
+        start, end = _parse(start_time), _parse(end_time)
+        return self._get_window(user_id, start, end).conflicts(start, end)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._windows.pop(user_id, None)
+
+    def _get_window(self, user_id: str, start: datetime, end: datetime) -> BusyWindow:
+        with self._lock:
+            windows = [w for w in self._windows.get(user_id, []) if time.monotonic() < w.expires_at]
+            self._windows[user_id] = windows
+            for w in windows:
+                if w.covers(start, end):
+                    return w
+
+        # Day-aligned window so nearby checks land in the same cache entry
+        window_start = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        window_end = max(end, window_start + self.window)
+        busy = self._load_db_busy(user_id, window_start, window_end) + \
+            self._load_google_busy(user_id, window_start, window_end)
+        window = BusyWindow(window_start, window_end, busy, time.monotonic() + self.ttl_seconds)
+
+        with self._lock:
+            self._windows.setdefault(user_id, []).append(window)
+        return window
+
+    def _load_db_busy(self, user_id: str, start: datetime, end: datetime) -> List[dict]:
+        db = get_db()
+        if not db:
+            return []
+        result = db.table("events") \
+            .select("id, summary, start_time, end_time, recurrence, recurrence_exceptions, recurrence_timezone") \
+            .eq("user_id", user_id) \
+            .lte("start_time", end.isoformat()) \
+            .or_(overlap_filter(start)) \
+            .execute()
+        return [
+            {"start": _parse(e["start_time"]), "end": _parse(e["end_time"]), "source": "canvascal", "summary": e.get("summary"), "id": e.get("id")}
+            for e in expand_rows(result.data, start, end, overlap=True)
+        ]
+
+    def _load_google_busy(self, user_id: str, start: datetime, end: datetime) -> List[dict]:
+        try:
+            from app.services.google_calendar import get_calendar_service
+            service = get_calendar_service(user_id)
+            calendar_ids = self._get_calendar_ids(user_id, service)
+            if not calendar_ids:
+                return []
+
+            response = service.service.freebusy().query(body={
+                "timeMin": start.isoformat(),
+                "timeMax": end.isoformat(),
+                "items": [{"id": cid} for cid in calendar_ids],
+            }).execute()
+        except Exception as e:
+            # Google not connected or unavailable: fall back to our own events
+            logger.warning(f"FreeBusy lookup failed for user {user_id}: {e}")
+            return []
+
+        busy = []
+        for calendar_id, calendar in response.get("calendars", {}).items():
+            if calendar.get("errors"):
+                logger.warning(f"FreeBusy error for calendar {calendar_id}: {calendar['errors']}")
+            for interval in calendar.get("busy", []):
+                busy.append({"start": _parse(interval["start"]), "end": _parse(interval["end"]), "source": calendar_id})
+        return busy
+
+    def _get_calendar_ids(self, user_id: str, service) -> List[str]:
+        """The user's other calendars; ours is already covered by `events`."""
+        with self._lock:
+            cached = self._calendars.get(user_id)
+        if cached and time.monotonic() < cached[1]:
+            return cached[0]
+
+        calendar_ids = []
+        page_token = None
+        while True:
+            response = service.service.calendarList().list(
+                minAccessRole="freeBusyReader", pageToken=page_token
+            ).execute()
+            for entry in response.get("items", []):
+                if entry["id"] != service.calendar_id:
+                    calendar_ids.append(entry["id"])
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
+
+        calendar_ids = calendar_ids[:FREEBUSY_MAX_CALENDARS]
+        with self._lock:
+            self._calendars[user_id] = (calendar_ids, time.monotonic() + self.calendars_ttl_seconds)
+        return calendar_ids
+
+availability_service = AvailabilityService()
+on_events_changed(availability_service.invalidate)
@@ -0,0 +1,213 @@
+from typing import Dict, List
+from pydantic import ValidationError
+from app.schemas.event import EventSchema, EventUpdateSchema
+from app.services.recurrence import series_end, split_instance_id, with_exception
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows per insert/upsert/delete statement
+BULK_CHUNK_SIZE = 100
+# Items accepted per request
+MAX_BULK_ITEMS = 1000
+
+RECURRENCE_INPUTS = ("start_time", "end_time", "recurrence", "recurrence_timezone")
+
+class BulkOutcome:
+    """Per-item results in request order, plus what Google needs to hear about."""
+    def __init__(self, size: int):
+        self.results: List[dict] = [None] * size
+        self.to_push: List[dict] = []
+        self.google_deletes: List[str] = []
+
+    def set(self, index: int, status: str, event_id: str = None, error: str = None):
+        result = {"index": index, "id": event_id, "status": status}
+        if error:
+            result["error"] = error
+        self.results[index] = result
+
+    def counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for result in self.results:
+            counts[result["status"]] = counts.get(result["status"], 0) + 1
+        return counts
+
+def _chunks(items: list, size: int = None):
+    size = size or BULK_CHUNK_SIZE
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+
+def bulk_create(db, user_id: str, items: List[dict]) -> BulkOutcome:
+    """Inserts valid items one chunk per statement; invalid ones are reported, not inserted."""
+    outcome = BulkOutcome(len(items))
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            row = EventSchema.model_validate(item).model_dump(mode='json')
+        except ValidationError as e:
+            outcome.set(index, "error", item.get("id") if isinstance(item, dict) else None, _validation_message(e))
+            continue
+        row["user_id"] = user_id
+        if row.get("recurrence"):
+            row["recurrence_end"] = series_end(row)
+        valid.append((index, row))
+
+    for chunk in _chunks(valid):
+        try:
+            inserted = db.table("events").insert([row for _, row in chunk]).execute().data or []
+        except Exception as e:
+            # One bad row fails the whole statement; retry row by row to isolate it
+            logger.warning(f"Bulk insert of {len(chunk)} events failed, retrying individually: {e}")
+            for index, row in chunk:
+                try:
+                    outcome.to_push.extend(db.table("events").insert(row).execute().data or [row])
+                    outcome.set(index, "created", row["id"])
+                except Exception as row_error:
+                    outcome.set(index, "error", row["id"], str(row_error))
+            continue
+        outcome.to_push.extend(inserted)
+        for index, row in chunk:
+            outcome.set(index, "created", row["id"])
+    return outcome
+
+def bulk_update(db, user_id: str, items: List[dict]) -> BulkOutcome:
+    """
+    Applies partial updates. Each chunk reads the current rows once (to
+    find missing ids and derive recurrence_end), then writes only the
+    changed columns: rows receiving identical changes share one
+    `update ... in (ids)`, the rest get one update each. Columns a request
+    did not touch are never sent, so concurrent writers (Google push/pull
+    setting google_event_id) are not overwritten with stale values.
+    """
+    outcome = BulkOutcome(len(items))
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            changes = EventUpdateSchema.model_validate(item).model_dump(mode='json', exclude_unset=True)
+        except ValidationError as e:
+            outcome.set(index, "error", item.get("id") if isinstance(item, dict) else None, _validation_message(e))
+            continue
+        event_id = changes.pop("id")
+        if split_instance_id(event_id)[1]:
+            outcome.set(index, "error", event_id, "Occurrences cannot be updated in bulk; update the series")
+        elif not changes:
+            outcome.set(index, "error", event_id, "No fields to update")
+        else:
+            valid.append((index, event_id, changes))
+
+    for chunk in _chunks(valid):
+        ids = list(dict.fromkeys(event_id for _, event_id, _ in chunk))
+        try:
+            current = db.table("events").select("*").eq("user_id", user_id).in_("id", ids).execute().data or []
+        except Exception as e:
+            logger.error(f"Bulk update chunk failed: {e}")
+            for index, event_id, _ in chunk:
+                outcome.set(index, "error", event_id, str(e))
+            continue
+
+        rows = {row["id"]: row for row in current}
+        # Per event: the columns to write, with items for the same event applied in request order
+        pending: Dict[str, dict] = {}
+        applied: Dict[str, List[int]] = {}
+        for index, event_id, changes in chunk:
+            row = rows.get(event_id)
+            if row is None:
+                outcome.set(index, "not_found", event_id)
+                continue
+            row.update(changes)
+            written = pending.setdefault(event_id, {})
+            written.update(changes)
+            if row.get("recurrence") and any(k in changes for k in RECURRENCE_INPUTS):
+                written["recurrence_end"] = row["recurrence_end"] = series_end(row)
+            elif "recurrence" in changes and not row.get("recurrence"):
+                written["recurrence_end"] = row["recurrence_end"] = None
+            applied.setdefault(event_id, []).append(index)
+
+        groups: Dict[str, tuple] = {}
+        for event_id, changes in pending.items():
+            key = json.dumps(changes, sort_keys=True, default=str)
+            groups.setdefault(key, (changes, []))[1].append(event_id)
+
+        for changes, event_ids in groups.values():
+            query = db.table("events").update(changes).eq("user_id", user_id)
+            query = query.eq("id", event_ids[0]) if len(event_ids) == 1 else query.in_("id", event_ids)
+            try:
+                written = query.execute().data or [rows[event_id] for event_id in event_ids]
+            except Exception as e:
+                logger.error(f"Bulk update of {len(event_ids)} events failed: {e}")
+                for event_id in event_ids:
+                    for index in applied[event_id]:
+                        outcome.set(index, "error", event_id, str(e))
+                continue
+            outcome.to_push.extend(written)
+            for event_id in event_ids:
+                for index in applied[event_id]:
+                    outcome.set(index, "updated", event_id)
+    return outcome
+
+def bulk_delete(db, user_id: str, ids: List[str]) -> BulkOutcome:
+    """
+    Deletes rows in chunks of `in` deletes. Occurrence ids cancel that
+    occurrence on their series, one update of its exception list per series.
+    """
+    outcome = BulkOutcome(len(ids))
+    plain, occurrences = [], []
+    for index, event_id in enumerate(ids):
+        master_id, occurrence = split_instance_id(event_id)
+        if occurrence:
+            occurrences.append((index, event_id, master_id, occurrence))
+        else:
+            plain.append((index, event_id))
+
+    deleted_ids = set()
+    for chunk in _chunks(plain):
+        chunk_ids = list(dict.fromkeys(event_id for _, event_id in chunk))
+        try:
+            deleted = db.table("events").delete().eq("user_id", user_id).in_("id", chunk_ids).execute().data or []
+        except Exception as e:
+            logger.error(f"Bulk delete chunk failed: {e}")
+            for index, event_id in chunk:
+                outcome.set(index, "error", event_id, str(e))
+            continue
+        for row in deleted:
+            deleted_ids.add(str(row["id"]))
+            if row.get("google_event_id"):
+                outcome.google_deletes.append(row["google_event_id"])
+        for index, event_id in chunk:
+            # Deleted by an earlier chunk counts too (duplicate ids)
+            outcome.set(index, "deleted" if event_id in deleted_ids else "not_found", event_id)
+
+    if occurrences:
+        master_ids = list(dict.fromkeys(m for _, _, m, _ in occurrences if m not in deleted_ids))
+        try:
+            masters = {}
+            for chunk_ids in _chunks(master_ids):
+                rows = db.table("events").select("*").eq("user_id", user_id).in_("id", chunk_ids).execute().data or []
+                masters.update({row["id"]: row for row in rows if row.get("recurrence")})
+            touched = {}
+            for index, event_id, master_id, occurrence in occurrences:
+                if master_id in deleted_ids:
+                    # The whole series went in this request
+                    outcome.set(index, "deleted", event_id)
+                    continue
+                master = masters.get(master_id)
+                if master is None:
+                    outcome.set(index, "not_found", event_id)
+                    continue
+                master["recurrence_exceptions"] = with_exception(master, occurrence)
+                touched[master_id] = master
+                outcome.set(index, "deleted", event_id)
+            # Only the exception list is written; the rest of each master may have moved on
+            for master_id, master in touched.items():
+                written = db.table("events").update({"recurrence_exceptions": master["recurrence_exceptions"]}) \
+                    .eq("user_id", user_id).eq("id", master_id).execute().data or [master]
+                outcome.to_push.extend(row for row in written if row.get("google_event_id"))
+        except Exception as e:
+            logger.error(f"Bulk occurrence cancel failed: {e}")
+            for index, event_id, _, _ in occurrences:
+                outcome.set(index, "error", event_id, str(e))
+    return outcome
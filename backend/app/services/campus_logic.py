@@ -32,7 +32,7 @@ def calculate_transit_time(origin: str, destination: str) -> int:
     # Default buffer for unknown locations
     return 10
 
-def check_availability(start_time: str, end_time: str) -> bool:
+def check_availability(start_time: str, end_time: str, user_id: str = None) -> bool:
     """
     Checks if there are any events overlapping with the given time range.
     Returns True if free, False if busy.
@@ -40,7 +40,17 @@ def check_availability(start_time: str, end_time: str) -> bool:
     Args:
         start_time: ISO 8601 string
         end_time: ISO 8601 string
+        user_id: When given, the check is answered from the user's cached
+            busy window (our events plus their other Google calendars).
     """
+    if user_id:
+        from app.services.availability import availability_service
+        try:
+            return availability_service.check(user_id, start_time, end_time)["available"]
+        except Exception as e:
+            print(f"Error checking availability: {e}")
+            return False
+
     db = get_db()
     if not db:
         # If DB not connected, default to free or handle error
@@ -0,0 +1,125 @@
+from datetime import datetime
+from email.utils import format_datetime
+from typing import List, Optional, Tuple
+from app.services.event_listing import project
+from app.services.recurrence import _parse_utc, expand_rows
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Change log rows read per /calendar/changes call; clients loop on has_more
+MAX_CHANGES = 500
+
+# The event_changes table is appended to by a trigger on events (see
+# schema.sql), so every writer bumps the owner's version. A user's version
+# is their newest seq; 0 means no changes recorded yet. Updates that only
+# write back Google sync columns are not logged, and entries older than the
+# retention window are pruned.
+
+def current_version(db, user_id: str) -> Tuple[int, Optional[datetime]]:
+    """(change version, time of that change) for the user."""
+    result = db.table("event_changes") \
+        .select("seq,changed_at") \
+        .eq("user_id", user_id) \
+        .order("seq", desc=True) \
+        .limit(1) \
+        .execute()
+    if not result.data:
+        return 0, None
+    row = result.data[0]
+    return int(row["seq"]), _parse_utc(row["changed_at"]) if row.get("changed_at") else None
+
+def etag(version: int, variant: str = "") -> str:
+    """
+    Weak ETag for a listing at `version`. `variant` is the query string:
+    different ranges or projections of the same version are different bodies.
+    """
+    digest = hashlib.sha1(variant.encode()).hexdigest()[:12]
+    return f'W/"{version}-{digest}"'
+
+def etag_matches(if_none_match: Optional[str], tag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    # Weak comparison: W/"x" and "x" match
+    bare = tag[2:] if tag.startswith("W/") else tag
+    return "*" in candidates or any((c[2:] if c.startswith("W/") else c) == bare for c in candidates)
+
+def http_date(dt: datetime) -> str:
+    return format_datetime(dt, usegmt=True)
+
+def _in_range(event: dict, start: Optional[datetime], end: Optional[datetime]) -> bool:
+    if start and _parse_utc(event["start_time"]) < _parse_utc(start):
+        return False
+    if end and _parse_utc(event["end_time"]) > _parse_utc(end):
+        return False
+    return True
+
+def changes_since(db, user_id: str, since: int, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                  fields: Optional[List[str]] = None, limit: int = MAX_CHANGES) -> dict:
+    """
+    What changed in the user's events after version `since`, as a patch for
+    a list fetched with the same range:
+
+    - upserted: events to add or replace by id (series come expanded)
+    - removed: ids to drop; a client drops events whose id *or*
+      recurring_event_id is listed, so a changed series replaces all of its
+      occurrences and events that moved out of the range disappear
+    - cursor: version to pass as `since` next time
+    - has_more: more changes are waiting past `cursor`
+    - reset: `since` is ahead of the server or older than the retained
+      log; refetch the full list
+    """
+    latest, _ = current_version(db, user_id)
+    if since > latest:
+        return {"upserted": [], "removed": [], "cursor": str(latest), "has_more": False, "reset": True}
+
+    # Read from the cursor's own entry: if pruning took it, changes after it may be gone too
+    log = db.table("event_changes") \
+        .select("seq,event_id,op") \
+        .eq("user_id", user_id) \
+        .gte("seq", since) \
+        .order("seq") \
+        .limit(limit + 2) \
+        .execute().data or []
+    if since > 0:
+        if not log or int(log[0]["seq"]) != since:
+            return {"upserted": [], "removed": [], "cursor": str(latest), "has_more": False, "reset": True}
+        log = log[1:]
+    log = log[:limit + 1]
+    has_more = len(log) > limit
+    log = log[:limit]
+    if not log:
+        return {"upserted": [], "removed": [], "cursor": str(since), "has_more": False, "reset": False}
+
+    # Several edits to one event collapse to its current state
+    changed_ids = list(dict.fromkeys(str(entry["event_id"]) for entry in log))
+    rows = db.table("events") \
+        .select("*") \
+        .eq("user_id", user_id) \
+        .in_("id", changed_ids) \
+        .execute().data or []
+    current = {str(row["id"]): row for row in rows}
+
+    upserted, removed = [], []
+    for event_id in changed_ids:
+        row = current.get(event_id)
+        if row is None:
+            # Deleted since (tombstone)
+            removed.append(event_id)
+        elif row.get("recurrence"):
+            removed.append(event_id)
+            upserted.extend(expand_rows([row], start, end))
+        elif _in_range(row, start, end):
+            upserted.append(row)
+        else:
+            removed.append(event_id)
+
+    return {
+        "upserted": project(upserted, fields),
+        "removed": removed,
+        "cursor": str(log[-1]["seq"]),
+        "has_more": has_more,
+        "reset": False,
+    }
@@ -0,0 +1,145 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
+from app.core.config import settings
+from app.services.crypto import crypto
+from app.db import get_service_db
+from typing import Dict, Optional
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class CredentialManager:
+    """
+    Process-wide cache of Google OAuth credentials.
+
+    - Tokens are served from memory until shortly before they expire.
+    - Inside the proactive window a refresh is kicked off in the background
+      while callers keep using the still-valid token.
+    - Concurrent refreshes for the same user are coalesced into a single
+      network call and a single DB write.
+    """
+    def __init__(
+        self,
+        refresh_margin: timedelta = timedelta(minutes=2),
+        proactive_window: timedelta = timedelta(minutes=10),
+    ):
+        self.refresh_margin = refresh_margin
+        self.proactive_window = proactive_window
+        self._cache: Dict[str, Credentials] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="oauth-refresh")
+
+    def get_credentials(self, user_id: str) -> Credentials:
+        with self._lock:
+            creds = self._cache.get(user_id)
+        if creds is None:
+            creds = self._load(user_id)
+            with self._lock:
+                creds = self._cache.setdefault(user_id, creds)
+
+        remaining = self._remaining(creds)
+        if remaining is None or remaining <= self.refresh_margin:
+            # Expired (or expiry unknown): wait for the shared refresh
+            try:
+                return self._refresh(user_id).result()
+            except Exception as e:
+                logger.error(f"Failed to refresh token: {e}")
+                # Let the API call fail later with the stale token
+                return creds
+
+        if remaining <= self.proactive_window:
+            self._refresh(user_id)
+        return creds
+
+    def invalidate(self, user_id: str):
+        """Drops cached credentials, e.g. after the user re-connects Google."""
+        with self._lock:
+            self._cache.pop(user_id, None)
+
+    def _remaining(self, creds: Credentials) -> Optional[timedelta]:
+        if not creds.expiry:
+            return None
+        # google-auth keeps expiry as naive UTC
+        return creds.expiry - datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def _refresh(self, user_id: str) -> Future:
+        """Returns the in-flight refresh for this user, starting one if needed."""
+        with self._lock:
+            future = self._inflight.get(user_id)
+            if future is None:
+                future = self._executor.submit(self._do_refresh, user_id)
+                self._inflight[user_id] = future
+                future.add_done_callback(lambda f: self._refresh_done(user_id, f))
+            return future
+
+    def _refresh_done(self, user_id: str, future: Future):
+        with self._lock:
+            if self._inflight.get(user_id) is future:
+                del self._inflight[user_id]
+        if future.exception():
+            logger.warning(f"Token refresh failed for user {user_id}: {future.exception()}")
+
+    def _do_refresh(self, user_id: str) -> Credentials:
+        with self._lock:
+            creds = self._cache.get(user_id)
+        if creds is None:
+            creds = self._load(user_id)
+            with self._lock:
+                creds = self._cache.setdefault(user_id, creds)
+        if not creds.refresh_token:
+            raise Exception("No refresh token available")
+
+        # Refreshing in place means every service built on these creds picks up the new token
+        creds.refresh(Request())
+        logger.info(f"Refreshed Google token for user {user_id}")
+
+        db = get_service_db()
+        db.table("user_integrations").update({
+            "google_access_token": crypto.encrypt(creds.token),
+            "google_token_expires_at": creds.expiry.replace(tzinfo=timezone.utc).isoformat() if creds.expiry else None,
+            "updated_at": "now()"
+        }).eq("user_id", user_id).execute()
+        return creds
+
+    def _load(self, user_id: str) -> Credentials:
+        """Fetches and decrypts user credentials from Supabase."""
+        logger.info(f"Fetching credentials for user_id: {user_id}")
+        db = get_service_db()
+        result = db.table("user_integrations") \
+            .select("google_access_token, google_refresh_token, google_token_expires_at") \
+            .eq("user_id", user_id) \
+            .execute()
+
+        if not result.data:
+            logger.error(f"No integration record found for user_id: {user_id}")
+            raise Exception("User has not connected Google Calendar")
+
+        integration = result.data[0]
+        enc_access = integration.get("google_access_token")
+        enc_refresh = integration.get("google_refresh_token")
+
+        if not enc_access or not enc_refresh:
+            raise Exception("Incomplete Google Calendar tokens")
+
+        creds = Credentials(
+            token=crypto.decrypt(enc_access),
+            refresh_token=crypto.decrypt(enc_refresh),
+            token_uri="https://oauth2.googleapis.com/token",
+            client_id=settings.GOOGLE_CLIENT_ID,
+            client_secret=settings.GOOGLE_CLIENT_SECRET,
+            scopes=['https://www.googleapis.com/auth/calendar']
+        )
+
+        expires_at = integration.get("google_token_expires_at")
+        if expires_at:
+            expiry = datetime.fromisoformat(expires_at.replace('Z', '+00:00'))
+            if expiry.tzinfo:
+                expiry = expiry.astimezone(timezone.utc).replace(tzinfo=None)
+            creds.expiry = expiry
+        return creds
+
+credential_manager = CredentialManager()
@@ -0,0 +1,100 @@
+from datetime import datetime
+from typing import List, Optional, Tuple
+from app.schemas.event import EventSchema
+from app.services.recurrence import DEFAULT_HORIZON, _parse_utc, expand_rows, series_filter, single_filter
+import base64
+import logging
+
+logger = logging.getLogger(__name__)
+
+# What the calendar grid renders; `compact=true` returns only these
+COMPACT_FIELDS = ["id", "summary", "start_time", "end_time", "event_type", "color_hex", "course_id", "recurring_event_id"]
+# Columns expansion and paging need even when the client did not ask for them
+REQUIRED_COLUMNS = ["id", "start_time", "end_time", "recurrence", "recurrence_exceptions", "recurrence_timezone"]
+# Set on expanded occurrences only, never stored
+COMPUTED_FIELDS = {"recurring_event_id"}
+LISTABLE_FIELDS = set(EventSchema.model_fields) | COMPUTED_FIELDS
+
+def parse_fields(fields: Optional[str], compact: bool = False) -> Optional[List[str]]:
+    """Requested fields in order, or None for whole rows. Raises ValueError on unknown names."""
+    if fields:
+        requested = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in requested if f not in LISTABLE_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return requested
+    if compact:
+        return list(COMPACT_FIELDS)
+    return None
+
+def select_columns(fields: Optional[List[str]]) -> str:
+    if fields is None:
+        return "*"
+    columns = REQUIRED_COLUMNS + [f for f in fields if f not in REQUIRED_COLUMNS and f not in COMPUTED_FIELDS]
+    return ",".join(columns)
+
+def project(events: List[dict], fields: Optional[List[str]]) -> List[dict]:
+    if fields is None:
+        return events
+    return [{f: event.get(f) for f in fields} for event in events]
+
+def encode_cursor(event: dict) -> str:
+    raw = f"{_parse_utc(event['start_time']).isoformat()}|{event['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        start, event_id = raw.split("|", 1)
+        return _parse_utc(start), event_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _sort_key(event: dict):
+    return _parse_utc(event["start_time"]), event["id"]
+
+def fetch_page(db, user_id: str, start: Optional[datetime], end: Optional[datetime], limit: int,
+               cursor: Optional[str] = None, fields: Optional[List[str]] = None) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of the user's events (occurrences expanded) ordered by
+    (start_time, id), resuming after `cursor`. Returns (events, next cursor
+    or None on the last page).
+
+    Single events are paged in the DB with a keyset filter, so a page costs
+    `limit + 1` rows however deep it is. Series masters are few; they are
+    fetched whole and their occurrences merged into the page.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    columns = select_columns(fields)
+
+    singles = db.table("events") \
+        .select(columns) \
+        .eq("user_id", user_id) \
+        .or_(single_filter(start, end, after)) \
+        .order("start_time") \
+        .order("id") \
+        .limit(limit + 1) \
+        .execute().data or []
+
+    window_start = max(_parse_utc(start), after[0]) if start and after else (after[0] if after else start)
+    masters = db.table("events") \
+        .select(columns) \
+        .eq("user_id", user_id) \
+        .or_(series_filter(window_start, end)) \
+        .execute().data or []
+
+    # Open-ended ranges stop at the same horizon as the unpaged listing, measured
+    # from the range start (or each series' first occurrence), not from the cursor
+    horizon_end = end or (_parse_utc(start) + DEFAULT_HORIZON if start else None)
+    occurrences = expand_rows(masters, window_start, horizon_end)
+    if horizon_end is None:
+        firsts = {m["id"]: _parse_utc(m["start_time"]) for m in masters}
+        occurrences = [o for o in occurrences if _parse_utc(o["start_time"]) <= firsts[o["recurring_event_id"]] + DEFAULT_HORIZON]
+    if after:
+        occurrences = [o for o in occurrences if _sort_key(o) > after]
+
+    merged = sorted(singles + occurrences, key=_sort_key)
+    page = merged[:limit]
+    next_cursor = encode_cursor(page[-1]) if len(merged) > limit else None
+    return project(page, fields), next_cursor
@@ -1,17 +1,35 @@
-from google.oauth2.credentials import Credentials
-from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
-from app.core.config import settings
-from app.services.crypto import crypto
+from googleapiclient.errors import HttpError
+from google_auth_httplib2 import AuthorizedHttp
 from app.db import get_service_db
+from app.services.credentials import credential_manager
+from app.services.invalidation import events_changed
+from app.services.recurrence import gcal_recurrence
+from app.services.sync_executor import sync_executor, SyncReport
+from app.services.write_behind import WriteBehind
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import hashlib
+import httplib2
+import json
 import logging
+import threading
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# Private extended property stamped on every event we push, so pulls and
+# reconciliation can map a Google event back to its DB row.
+CANVASCAL_ID_PROPERTY = "canvascal_id"
+
+# Google allows at most 50 calls per batch request
+BATCH_SIZE = 50
+
 class GoogleCalendarService:
     def __init__(self, user_id: str):
         self.user_id = user_id
         self.db = get_service_db()
+        self._local = threading.local()
         self.creds = self._get_user_credentials()
         # We build the service immediately to fail fast if creds are bad
         self.service = build('calendar', 'v3', credentials=self.creds)
@@ -20,47 +38,11 @@ class GoogleCalendarService:
         self.calendar_id = self._get_or_create_calendar()
 
     def _get_user_credentials(self):
-        """Fetches and decrypts user credentials from Supabase."""
-        logger.info(f"Fetching credentials for user_id: {self.user_id}")
-        # Query Real Supabase
-        result = self.db.table("user_integrations").select("*").eq("user_id", self.user_id).execute()
-        
-        if not result.data:
-            logger.error(f"No integration record found for user_id: {self.user_id}")
-            raise Exception("User has not connected Google Calendar")
-
-        integration = result.data[0]
-        enc_access = integration.get("google_access_token")
-        enc_refresh = integration.get("google_refresh_token")
-
-        if not enc_access or not enc_refresh:
-            raise Exception("Incomplete Google Calendar tokens")
-
-        # Decrypt
-        creds = Credentials(
-            token=crypto.decrypt(enc_access),
-            refresh_token=crypto.decrypt(enc_refresh),
-            token_uri="https://oauth2.googleapis.com/token",
-            client_id=settings.GOOGLE_CLIENT_ID,
-            client_secret=settings.GOOGLE_CLIENT_SECRET,
-            scopes=['https://www.googleapis.com/auth/calendar']
-        )
-
-        # Auto-Refresh if expired
-        if creds.expired and creds.refresh_token:
-            try:
-                creds.refresh(Request())
-                # Update Real Supabase
-                self.db.table("user_integrations").update({
-                    "google_access_token": crypto.encrypt(creds.token),
-                    "updated_at": "now()"
-                }).eq("user_id", self.user_id).execute()
-            except Exception as e:
-                logger.error(f"Failed to refresh token: {e}")
-                # We might want to re-raise or let it fail later
-                pass
-
-        return creds
+        """
+        Returns the user's Google credentials from the shared credential
+        manager, which caches tokens and coalesces concurrent refreshes.
+        """
+        return credential_manager.get_credentials(self.user_id)
 
     def _get_or_create_calendar(self):
         """
@@ -130,65 +112,290 @@ class GoogleCalendarService:
         except Exception as e:
             logger.error(f"Failed to update calendar_id in DB: {e}")
 
-    def sync_events(self, events: list):
+    def _build_gcal_event(self, event: dict) -> dict:
+        """Converts a DB event row into a Google Calendar event body."""
+        # Robust Time Validation: parse to compare
+        start_dt = _parse_utc(event['start_time'])
+        end_dt = _parse_utc(event['end_time'])
+
+        # If range is zero or negative, force a 30 min duration
+        if end_dt <= start_dt:
+            end_dt = start_dt + timedelta(minutes=30)
+
+        gcal_event = {
+            'summary': event['summary'],
+            'location': event.get('location') or '',
+            'description': event.get('description') or '',
+            'start': {'dateTime': start_dt.isoformat(), 'timeZone': 'UTC'},
+            'end': {'dateTime': end_dt.isoformat(), 'timeZone': 'UTC'},
+        }
+        if event.get('recurrence'):
+            # One Google event for the whole series; it repeats in the series' zone
+            tz_name = event.get('recurrence_timezone') or 'UTC'
+            gcal_event['start'] = {'dateTime': start_dt.isoformat(), 'timeZone': tz_name}
+            gcal_event['end'] = {'dateTime': end_dt.isoformat(), 'timeZone': tz_name}
+            gcal_event['recurrence'] = gcal_recurrence(event)
+        if event.get('id'):
+            gcal_event['extendedProperties'] = {
+                'private': {CANVASCAL_ID_PROPERTY: event['id']}
+            }
+        return gcal_event
+
+    def _execute(self, request):
+        """
+        Executes an API request on a per-thread HTTP transport.
+        httplib2 is not thread-safe, so concurrent pushes must not share one.
+        """
+        http = getattr(self._local, "http", None)
+        if http is None:
+            http = AuthorizedHttp(self.creds, http=httplib2.Http())
+            self._local.http = http
+        return request.execute(http=http)
+
+    def push_event(self, event: dict) -> str:
         """
-        Syncs a list of events to Google Calendar.
-        Supports:
-        - CREATE (if google_event_id is null)
-        - UPDATE (if google_event_id is set)
+        Pushes a single event to Google Calendar and returns the outcome:
+        - "created" (if google_event_id is null)
+        - "patched" (if google_event_id is set), sending only the fields whose
+          hash differs from the last pushed payload
+        - "skipped" (if nothing changed since the last push)
+        Google errors are raised so the caller can decide whether to retry.
         """
-        synced_count = 0
-        from datetime import datetime, timedelta
+        gcal_event = self._build_gcal_event(event)
+        hashes = payload_hashes(gcal_event)
+
+        if event.get("google_event_id"):
+            previous = event.get("google_sync_hash") or {}
+            changed = {k: v for k, v in gcal_event.items() if previous.get(k) != hashes[k]}
+            if not changed:
+                logger.debug(f"Event {event.get('id')} unchanged, skipping push")
+                return "skipped"
+
+            # PATCH
+            self._execute(self.service.events().patch(
+                calendarId=self.calendar_id,
+                eventId=event['google_event_id'],
+                body=changed
+            ))
+
+            self.db.table("events").update({
+                "google_sync_hash": hashes
+            }).eq("id", event["id"]).execute()
+            return "patched"
 
-        for event in events:
+        # CREATE
+        created_event = self._execute(self.service.events().insert(
+            calendarId=self.calendar_id,
+            body=gcal_event
+        ))
+
+        # Update Real Supabase with the new Google ID
+        self.db.table("events").update({
+            "google_event_id": created_event['id'],
+            "google_sync_hash": hashes
+        }).eq("id", event["id"]).execute()
+        if isinstance(self.db, WriteBehind):
+            # Until the id lands, other syncs see the row as unsynced and would create it again
+            self.db.flush()
+        return "created"
+
+    @contextmanager
+    def buffered_writes(self):
+        """
+        Routes this service's DB writes (the hash write-back after each push)
+        through a write-behind buffer for the duration, so push threads go on
+        to the next event instead of waiting on the DB. A new google_event_id
+        is flushed as soon as it is written.
+        """
+        db = self.db
+        with WriteBehind(db, user_id=self.user_id) as writes:
+            self.db = writes
             try:
-                # 1. Robust Time Validation
-                start_str = event['start_time']
-                end_str = event['end_time']
-                
-                # Parse to compare
-                start_dt = datetime.fromisoformat(start_str.replace('Z', '+00:00'))
-                end_dt = datetime.fromisoformat(end_str.replace('Z', '+00:00'))
-                
-                # If range is zero or negative, force a 30 min duration
-                if end_dt <= start_dt:
-                    end_dt = start_dt + timedelta(minutes=30)
-                    end_str = end_dt.isoformat()
-
-                gcal_event = {
-                    'summary': event['summary'],
-                    'location': event.get('location', ''),
-                    'description': event.get('description', ''),
-                    'start': {'dateTime': start_str, 'timeZone': 'UTC'},
-                    'end': {'dateTime': end_str, 'timeZone': 'UTC'},
-                }
-
-                if event.get("google_event_id"):
-                    # UPDATE
-                    self.service.events().update(
-                        calendarId=self.calendar_id,
-                        eventId=event['google_event_id'],
-                        body=gcal_event
-                    ).execute()
-                else:
-                    # CREATE
-                    created_event = self.service.events().insert(
-                        calendarId=self.calendar_id,
-                        body=gcal_event
-                    ).execute()
-                    
-                    # Update Real Supabase with the new Google ID
-                    self.db.table("events").update({
-                        "google_event_id": created_event['id']
-                    }).eq("id", event["id"]).execute()
-                
-                synced_count += 1
-            except Exception as e:
-                logger.error(f"Failed to sync event {event.get('id', 'unknown')}: {e}")
-                # Continue to next event instead of crashing the whole sync
+                yield writes
+            finally:
+                self.db = db
+
+    def push_events(self, events: list):
+        """
+        Pushes events concurrently through the shared sync executor, which
+        paces requests to the user's quota and retries rate-limit errors.
+        Returns a SyncReport with synced/skipped/retried/failed counts.
+        """
+        if not events:
+            return SyncReport()
+        with self.buffered_writes():
+            report = sync_executor.run([(self, events)])[self.user_id]
+        logger.info(f"Google sync for user {self.user_id}: {report.to_dict()}")
+        return report
+
+    def sync_events(self, events: list):
+        """
+        Syncs a list of events to Google Calendar and returns how many were
+        actually pushed. Failed events are logged and reported, never raised.
+        """
+        return self.push_events(events).synced
+
+    def pull_changes(self):
+        """
+        Pulls edits and deletions made in Google Calendar back into `events`.
+        Uses the stored nextSyncToken so each call only fetches the delta since
+        the last pull. If Google has expired the token (410 Gone), the token is
+        dropped and a full resync is performed to obtain a fresh one.
+        """
+        sync_token = self._get_sync_token()
+        full_resync = sync_token is None
+
+        try:
+            items, next_token = self._list_changes(sync_token)
+        except HttpError as e:
+            if e.resp.status != 410:
+                raise
+            logger.info(f"Sync token expired for user {self.user_id}, performing full resync")
+            self._save_sync_token(None)
+            items, next_token = self._list_changes(None)
+            full_resync = True
+
+        stats = self._apply_changes(items)
+        if stats["updated"] or stats["deleted"] or stats["created"]:
+            events_changed(self.user_id)
+        if next_token:
+            self._save_sync_token(next_token)
+
+        stats["full_resync"] = full_resync
+        return stats
+
+    def _get_sync_token(self):
+        result = self.db.table("user_integrations").select("google_sync_token").eq("user_id", self.user_id).execute()
+        if result.data:
+            return result.data[0].get("google_sync_token")
+        return None
+
+    def _save_sync_token(self, sync_token):
+        try:
+            self.db.table("user_integrations").update({
+                "google_sync_token": sync_token
+            }).eq("user_id", self.user_id).execute()
+        except Exception as e:
+            logger.error(f"Failed to store sync token: {e}")
+
+    def _list_changes(self, sync_token):
+        """
+        Pages through events.list. With a sync token only changed events are
+        returned; without one this is the full listing that seeds the token.
+        """
+        items = []
+        page_token = None
+        while True:
+            params = {
+                'calendarId': self.calendar_id,
+                'showDeleted': True,
+                'maxResults': 2500,
+            }
+            if sync_token:
+                params['syncToken'] = sync_token
+            if page_token:
+                params['pageToken'] = page_token
+
+            response = self.service.events().list(**params).execute()
+            items.extend(response.get('items', []))
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                return items, response.get('nextSyncToken')
+
+    def _apply_changes(self, items: list):
+        """
+        Applies a batch of Google events to the DB.
+        - cancelled events delete their linked row
+        - known events update summary/description/location/times
+        - events created directly in Google are inserted as new rows
+        """
+        stats = {"updated": 0, "deleted": 0, "created": 0}
+        if not items:
+            return stats
+
+        # One query to map Google IDs to our rows, with the series columns
+        # the push payload is built from (pulls never change those)
+        result = self.db.table("events") \
+            .select("id, google_event_id, recurrence, recurrence_exceptions, recurrence_timezone") \
+            .eq("user_id", self.user_id) \
+            .execute()
+        rows = {row["id"]: row for row in result.data}
+        row_ids = set(rows)
+        by_google_id = {row["google_event_id"]: row["id"] for row in result.data if row.get("google_event_id")}
+
+        to_delete = []
+        to_insert = []
+        for item in items:
+            google_id = item['id']
+            private = item.get('extendedProperties', {}).get('private', {})
+            row_id = private.get(CANVASCAL_ID_PROPERTY)
+            if row_id not in row_ids:
+                row_id = by_google_id.get(google_id)
+
+            if item.get('status') == 'cancelled':
+                if row_id:
+                    to_delete.append(row_id)
                 continue
 
-        return synced_count
+            # Modified instances of recurring series are not mirrored
+            if item.get('recurringEventId'):
+                continue
+
+            fields = self._fields_from_gcal_event(item)
+            if not fields:
+                continue
+
+            if row_id:
+                fields["google_event_id"] = google_id
+                # Google already holds this content; record it so the next push skips it.
+                # Hash the row as it will be stored, exactly as push_event would
+                fields["google_sync_hash"] = payload_hashes(self._build_gcal_event({**rows[row_id], **fields}))
+                self.db.table("events").update(fields).eq("id", row_id).eq("user_id", self.user_id).execute()
+                stats["updated"] += 1
+            else:
+                fields.update({
+                    "id": str(uuid.uuid4()),
+                    "user_id": self.user_id,
+                    "google_event_id": google_id,
+                    "event_type": "study",
+                    "source": "google",
+                })
+                to_insert.append(fields)
+
+        if to_delete:
+            self.db.table("events").delete().in_("id", to_delete).eq("user_id", self.user_id).execute()
+            stats["deleted"] = len(to_delete)
+        if to_insert:
+            self.db.table("events").insert(to_insert).execute()
+            stats["created"] = len(to_insert)
+
+        return stats
+
+    @staticmethod
+    def _fields_from_gcal_event(item: dict):
+        """Maps a Google event body back onto our `events` columns."""
+        def to_iso(value: dict):
+            if not value:
+                return None
+            if value.get('dateTime'):
+                return value['dateTime']
+            if value.get('date'):
+                # All-day events carry a bare date
+                return f"{value['date']}T00:00:00+00:00"
+            return None
+
+        start_time = to_iso(item.get('start'))
+        end_time = to_iso(item.get('end'))
+        if not start_time or not end_time:
+            return None
+
+        return {
+            "summary": item.get('summary', '(No title)'),
+            "description": item.get('description', ''),
+            "location": item.get('location', ''),
+            "start_time": start_time,
+            "end_time": end_time,
+        }
 
     def delete_event(self, google_event_id: str):
         """
@@ -204,5 +411,48 @@ class GoogleCalendarService:
             logger.error(f"Failed to delete event {google_event_id}: {e}")
             return False
 
+    def delete_events(self, google_event_ids: list):
+        """
+        Deletes many events using batched HTTP requests (50 per round trip).
+        Already-deleted events (404/410) count as deleted.
+        Returns (deleted_ids, failed_ids).
+        """
+        deleted, failed = [], []
+
+        def on_response(request_id, response, exception):
+            if exception is None or (isinstance(exception, HttpError) and exception.resp.status in (404, 410)):
+                deleted.append(request_id)
+            else:
+                logger.error(f"Failed to delete event {request_id}: {exception}")
+                failed.append(request_id)
+
+        for i in range(0, len(google_event_ids), BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for google_event_id in google_event_ids[i:i + BATCH_SIZE]:
+                batch.add(
+                    self.service.events().delete(calendarId=self.calendar_id, eventId=google_event_id),
+                    request_id=google_event_id
+                )
+            self._execute(batch)
+
+        return deleted, failed
+
+def _parse_utc(value) -> datetime:
+    """Parses an ISO 8601 string (or datetime) into an aware UTC datetime."""
+    dt = value if isinstance(value, datetime) else datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def payload_hashes(gcal_event: dict) -> dict:
+    """
+    Per-field digests of a Google event body. Stored on the row after each push
+    so re-syncs can skip unchanged events and patch only the fields that moved.
+    """
+    return {
+        key: hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()[:16]
+        for key, value in gcal_event.items()
+    }
+
 def get_calendar_service(user_id: str):
     return GoogleCalendarService(user_id)
@@ -0,0 +1,186 @@
+from datetime import datetime, timedelta, timezone
+from app.core.config import settings
+from app.db import get_service_db
+from typing import Callable, Dict, Optional
+import hmac
+import logging
+import secrets
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class PullDebouncer:
+    """
+    Coalesces bursts of Google notifications into one incremental pull per user.
+    The first notification schedules a pull `delay` seconds later; anything that
+    arrives meanwhile rides along. Notifications received while a pull is running
+    schedule exactly one follow-up pull.
+    """
+    def __init__(self, delay: float = None, pull: Optional[Callable[[str], None]] = None):
+        self.delay = settings.GOOGLE_PULL_DEBOUNCE_SECONDS if delay is None else delay
+        self._pull = pull or _pull_user
+        self._pending: Dict[str, threading.Timer] = {}
+        self._running = set()
+        self._dirty = set()
+        self._lock = threading.Lock()
+
+    def schedule(self, user_id: str):
+        with self._lock:
+            if user_id in self._running:
+                self._dirty.add(user_id)
+                return
+            if user_id in self._pending:
+                return
+            timer = threading.Timer(self.delay, self._run, args=(user_id,))
+            timer.daemon = True
+            self._pending[user_id] = timer
+            timer.start()
+
+    def _run(self, user_id: str):
+        with self._lock:
+            self._pending.pop(user_id, None)
+            self._running.add(user_id)
+        try:
+            self._pull(user_id)
+        except Exception as e:
+            logger.error(f"Notification-triggered pull failed for user {user_id}: {e}")
+        finally:
+            with self._lock:
+                self._running.discard(user_id)
+                again = user_id in self._dirty
+                self._dirty.discard(user_id)
+            if again:
+                self.schedule(user_id)
+
+def _pull_user(user_id: str):
+    from app.services.google_calendar import get_calendar_service
+    stats = get_calendar_service(user_id).pull_changes()
+    logger.info(f"Pulled Google changes for user {user_id}: {stats}")
+
+pull_debouncer = PullDebouncer()
+
+def start_watch(user_id: str) -> dict:
+    """
+    Opens a push-notification channel on the user's CanvasCal calendar.
+    Any previous channel is stopped once the new one is live, so renewals
+    never leave a gap.
+    """
+    if not settings.GOOGLE_WEBHOOK_URL:
+        raise Exception("GOOGLE_WEBHOOK_URL is not configured")
+
+    from app.services.google_calendar import get_calendar_service
+    service = get_calendar_service(user_id)
+    db = get_service_db()
+    previous = _get_channel(db, user_id)
+
+    # Notifications only make sense against a sync token baseline
+    if not service._get_sync_token():
+        service.pull_changes()
+
+    channel_token = secrets.token_urlsafe(24)
+    response = service.service.events().watch(
+        calendarId=service.calendar_id,
+        body={
+            "id": str(uuid.uuid4()),
+            "type": "web_hook",
+            "address": settings.GOOGLE_WEBHOOK_URL,
+            "token": channel_token,
+            "params": {"ttl": str(settings.GOOGLE_WATCH_TTL_SECONDS)},
+        }
+    ).execute()
+
+    expires_at = None
+    if response.get("expiration"):
+        expires_at = datetime.fromtimestamp(int(response["expiration"]) / 1000, tz=timezone.utc).isoformat()
+
+    channel = {
+        "google_channel_id": response["id"],
+        "google_channel_resource_id": response["resourceId"],
+        "google_channel_token": channel_token,
+        "google_channel_expires_at": expires_at,
+    }
+    db.table("user_integrations").update(channel).eq("user_id", user_id).execute()
+    logger.info(f"Started Google watch channel {response['id']} for user {user_id}")
+
+    if previous and previous.get("google_channel_id"):
+        _stop_channel(service, previous)
+
+    return {"channel_id": response["id"], "expires_at": expires_at}
+
+def stop_watch(user_id: str) -> bool:
+    """Stops the user's channel and forgets it."""
+    from app.services.google_calendar import get_calendar_service
+    db = get_service_db()
+    channel = _get_channel(db, user_id)
+    if not channel or not channel.get("google_channel_id"):
+        return False
+
+    _stop_channel(get_calendar_service(user_id), channel)
+    db.table("user_integrations").update({
+        "google_channel_id": None,
+        "google_channel_resource_id": None,
+        "google_channel_token": None,
+        "google_channel_expires_at": None,
+    }).eq("user_id", user_id).execute()
+    return True
+
+def renew_expiring_channels(within: timedelta = timedelta(hours=24)) -> int:
+    """Re-opens every channel that expires within `within`. Returns how many were renewed."""
+    db = get_service_db()
+    cutoff = (datetime.now(timezone.utc) + within).isoformat()
+    result = db.table("user_integrations").select("user_id") \
+        .lt("google_channel_expires_at", cutoff) \
+        .execute()
+
+    renewed = 0
+    for row in result.data:
+        try:
+            start_watch(row["user_id"])
+            renewed += 1
+        except Exception as e:
+            logger.error(f"Failed to renew watch channel for user {row['user_id']}: {e}")
+    return renewed
+
+def handle_notification(channel_id: str, channel_token: str, resource_state: str) -> bool:
+    """
+    Validates a Google notification against the stored channel and schedules a
+    debounced incremental pull for that user only. Returns False for unknown
+    channels or bad tokens.
+    """
+    if not channel_id:
+        return False
+
+    db = get_service_db()
+    result = db.table("user_integrations").select("user_id, google_channel_token") \
+        .eq("google_channel_id", channel_id) \
+        .execute()
+    if not result.data:
+        return False
+
+    row = result.data[0]
+    if not hmac.compare_digest(row.get("google_channel_token") or "", channel_token or ""):
+        logger.warning(f"Rejected notification with bad token for channel {channel_id}")
+        return False
+
+    # 'sync' is the handshake Google sends when a channel opens
+    if resource_state != "sync":
+        pull_debouncer.schedule(row["user_id"])
+    return True
+
+def _get_channel(db, user_id: str) -> Optional[dict]:
+    result = db.table("user_integrations") \
+        .select("google_channel_id, google_channel_resource_id") \
+        .eq("user_id", user_id) \
+        .execute()
+    return result.data[0] if result.data else None
+
+def _stop_channel(service, channel: dict):
+    try:
+        service.service.channels().stop(body={
+            "id": channel["google_channel_id"],
+            "resourceId": channel["google_channel_resource_id"],
+        }).execute()
+    except Exception as e:
+        # Channels expire on their own; a failed stop is not fatal
+        logger.warning(f"Failed to stop channel {channel['google_channel_id']}: {e}")
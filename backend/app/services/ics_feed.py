@@ -0,0 +1,191 @@
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from app.core.config import settings
+from app.db import get_service_db
+from app.services.recurrence import _parse_utc, _utc_stamp, gcal_recurrence, keyset_filter
+import logging
+import secrets
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PRODID = "-//CanvasCal//Calendar Feed//EN"
+FEED_COLUMNS = "id,summary,description,location,start_time,end_time,event_type,created_at,recurrence,recurrence_exceptions,recurrence_timezone"
+# Token -> user lookups are cached briefly; a rotated token stops working within this
+TOKEN_CACHE_SECONDS = 60
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\\n").replace("\n", "\\n")
+
+def _fold(line: str) -> str:
+    """RFC 5545 line folding: at most 75 octets per line, continuations start with a space."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + "\r\n"
+    parts, current, size = [], "", 0
+    for ch in line:
+        width = len(ch.encode())
+        if size + width > (75 if not parts else 74):
+            parts.append(current)
+            current, size = "", 0
+        current += ch
+        size += width
+    parts.append(current)
+    return "\r\n ".join(parts) + "\r\n"
+
+def render_event(row: dict) -> str:
+    start = _parse_utc(row["start_time"])
+    end = _parse_utc(row["end_time"])
+    # Deterministic so the same version always renders the same bytes
+    stamp = _utc_stamp(_parse_utc(row["created_at"])) if row.get("created_at") else _utc_stamp(start)
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{row['id']}@canvascal",
+        f"DTSTAMP:{stamp}",
+    ]
+    tz_name = row.get("recurrence_timezone")
+    if row.get("recurrence") and tz_name:
+        # Repeat in the series' zone so DST keeps the wall-clock time
+        try:
+            tz = ZoneInfo(tz_name)
+            lines.append(f"DTSTART;TZID={tz_name}:{start.astimezone(tz).strftime('%Y%m%dT%H%M%S')}")
+            lines.append(f"DTEND;TZID={tz_name}:{end.astimezone(tz).strftime('%Y%m%dT%H%M%S')}")
+        except Exception:
+            tz_name = None
+    if not (row.get("recurrence") and tz_name):
+        lines.append(f"DTSTART:{_utc_stamp(start)}")
+        lines.append(f"DTEND:{_utc_stamp(end)}")
+    if row.get("recurrence"):
+        lines.extend(gcal_recurrence(row))
+    lines.append(f"SUMMARY:{_escape(row.get('summary') or '')}")
+    if row.get("description"):
+        lines.append(f"DESCRIPTION:{_escape(row['description'])}")
+    if row.get("location"):
+        lines.append(f"LOCATION:{_escape(row['location'])}")
+    if row.get("event_type"):
+        lines.append(f"CATEGORIES:{_escape(row['event_type'].upper())}")
+    lines.append("END:VEVENT")
+    return "".join(_fold(line) for line in lines)
+
+def _header(name: str) -> str:
+    return "".join(_fold(line) for line in [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+    ])
+
+def iter_rows(db, user_id: str, page_size: int) -> Iterator[dict]:
+    """All of the user's event rows (series unexpanded), one keyset page at a time."""
+    after: Optional[Tuple[datetime, str]] = None
+    while True:
+        query = db.table("events").select(FEED_COLUMNS).eq("user_id", user_id)
+        if after:
+            query = query.or_(keyset_filter(after))
+        rows = query.order("start_time").order("id").limit(page_size).execute().data or []
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after = (_parse_utc(rows[-1]["start_time"]), rows[-1]["id"])
+
+def iter_feed(db, user_id: str, page_size: int = None) -> Iterator[bytes]:
+    """The calendar as chunks: the header, one chunk per page of VEVENTs, the footer."""
+    page_size = page_size or settings.ICS_FEED_PAGE_SIZE
+    yield _header("CanvasCal").encode()
+    chunk: List[str] = []
+    for row in iter_rows(db, user_id, page_size):
+        try:
+            chunk.append(render_event(row))
+        except Exception as e:
+            logger.warning(f"Skipping event {row.get('id')} in ICS feed: {e}")
+        if len(chunk) >= page_size:
+            yield "".join(chunk).encode()
+            chunk = []
+    if chunk:
+        yield "".join(chunk).encode()
+    yield b"END:VCALENDAR\r\n"
+
+class FeedCache:
+    """
+    Rendered feeds keyed by (user, change version), least recently used
+    evicted past `max_bytes`. A new version is a new key, so entries never
+    need invalidating; stale ones just age out.
+    """
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes or settings.ICS_FEED_CACHE_BYTES
+        self._entries: "OrderedDict[Tuple[str, int], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, user_id: str, version: int) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get((user_id, version))
+            if body is not None:
+                self._entries.move_to_end((user_id, version))
+            return body
+
+    def put(self, user_id: str, version: int, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            # Older versions of this user's feed can never be served again
+            for key in [k for k in self._entries if k[0] == user_id]:
+                self._size -= len(self._entries.pop(key))
+            self._entries[(user_id, version)] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stream(self, db, user_id: str, version: int) -> Iterator[bytes]:
+        """Streams a fresh render and keeps a copy for the next poll at this version."""
+        parts = []
+        for chunk in iter_feed(db, user_id):
+            parts.append(chunk)
+            yield chunk
+        self.put(user_id, version, b"".join(parts))
+
+feed_cache = FeedCache()
+
+# --- Subscription tokens ---
+# Calendar clients cannot send a Bearer token, so the feed URL carries a
+# random per-user secret (user_integrations.ics_feed_token). Rotating it
+# revokes every existing subscription.
+
+_token_cache: Dict[str, Tuple[str, float]] = {}
+_token_lock = threading.Lock()
+
+def get_feed_token(user_id: str, rotate: bool = False) -> str:
+    db = get_service_db()
+    if not rotate:
+        result = db.table("user_integrations").select("ics_feed_token").eq("user_id", user_id).execute()
+        if result.data and result.data[0].get("ics_feed_token"):
+            return result.data[0]["ics_feed_token"]
+
+    token = secrets.token_urlsafe(32)
+    db.table("user_integrations").upsert({"user_id": user_id, "ics_feed_token": token}).execute()
+    with _token_lock:
+        for cached in [t for t, (uid, _) in _token_cache.items() if uid == user_id]:
+            del _token_cache[cached]
+    return token
+
+def resolve_feed_token(token: str) -> Optional[str]:
+    """User id for a feed token, or None if it is unknown."""
+    now = time.monotonic()
+    with _token_lock:
+        cached = _token_cache.get(token)
+        if cached and now - cached[1] < TOKEN_CACHE_SECONDS:
+            return cached[0]
+
+    result = get_service_db().table("user_integrations").select("user_id").eq("ics_feed_token", token).execute()
+    if not result.data:
+        return None
+    user_id = result.data[0]["user_id"]
+    with _token_lock:
+        _token_cache[token] = (user_id, now)
+    return user_id
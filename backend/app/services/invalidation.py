@@ -0,0 +1,25 @@
+from typing import Callable, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Per-user caches register here and are told whenever a user's events change.
+_listeners: List[Callable[[str], None]] = []
+
+def on_events_changed(listener: Callable[[str], None]):
+    """Registers a callback invoked with the user_id after any event write."""
+    _listeners.append(listener)
+    return listener
+
+def events_changed(user_id: str):
+    """
+    Called by every write path on `events` (agent tools, calendar router,
+    Canvas sync, syllabus import, Google pulls).
+    """
+    if not user_id:
+        return
+    for listener in _listeners:
+        try:
+            listener(user_id)
+        except Exception as e:
+            logger.error(f"Cache invalidation failed in {getattr(listener, '__qualname__', listener)}: {e}")
@@ -0,0 +1,98 @@
+from app.services.google_calendar import get_calendar_service, CANVASCAL_ID_PROPERTY
+from app.services.invalidation import events_changed
+import logging
+
+logger = logging.getLogger(__name__)
+
+def reconcile_user(user_id: str) -> dict:
+    """
+    Diffs the user's CanvasCal calendar in Google against `events` and repairs drift:
+    - Google events we pushed whose DB row is gone (or that duplicate a row
+      already linked elsewhere) are batch-deleted from Google.
+    - Rows whose Google event was lost but which still own a tagged Google
+      event get re-linked to it.
+    - Rows pointing at Google events that no longer exist have the stale
+      google_event_id cleared, so the next sync re-creates them.
+    Events created directly in Google (no canvascal_id tag) are left to pulls.
+    """
+    service = get_calendar_service(user_id)
+    db = service.db
+
+    # Rows first: a link read here existed before the listing started, so
+    # missing from the listing really means gone, not pushed in between
+    rows = db.table("events").select("id, google_event_id").eq("user_id", user_id).execute().data
+    google_events = _list_google_events(service)
+
+    row_ids = {row["id"] for row in rows}
+    linked = {row["google_event_id"]: row["id"] for row in rows if row.get("google_event_id")}
+    claimed_rows = set(linked.values())
+
+    orphans, relinks = [], {}
+    for item in google_events:
+        google_id = item["id"]
+        if google_id in linked:
+            continue
+        owner = item.get("extendedProperties", {}).get("private", {}).get(CANVASCAL_ID_PROPERTY)
+        if not owner:
+            continue
+        if owner in row_ids and owner not in claimed_rows and owner not in relinks:
+            relinks[owner] = google_id
+        else:
+            orphans.append((google_id, owner))
+
+    # Rows created (and pushed) after the read above own their Google event
+    unknown = list({owner for _, owner in orphans if owner not in row_ids})
+    created_since = set()
+    if unknown:
+        found = db.table("events").select("id").eq("user_id", user_id).in_("id", unknown).execute().data
+        created_since = {row["id"] for row in found}
+    orphans = [google_id for google_id, owner in orphans if owner not in created_since]
+
+    google_ids = {item["id"] for item in google_events}
+    stale = [
+        row["id"] for row in rows
+        if row.get("google_event_id") and row["google_event_id"] not in google_ids and row["id"] not in relinks
+    ]
+
+    deleted, failed = service.delete_events(orphans) if orphans else ([], [])
+
+    for row_id, google_id in relinks.items():
+        db.table("events").update({
+            "google_event_id": google_id,
+            "google_sync_hash": None
+        }).eq("id", row_id).eq("user_id", user_id).execute()
+
+    if stale:
+        db.table("events").update({
+            "google_event_id": None,
+            "google_sync_hash": None
+        }).in_("id", stale).eq("user_id", user_id).execute()
+
+    if relinks or stale:
+        events_changed(user_id)
+
+    report = {
+        "google_events": len(google_events),
+        "orphans_deleted": len(deleted),
+        "orphans_failed": len(failed),
+        "links_fixed": len(relinks),
+        "stale_links_cleared": len(stale),
+    }
+    logger.info(f"Reconciled calendar for user {user_id}: {report}")
+    return report
+
+def _list_google_events(service) -> list:
+    """One paged listing with only the fields the diff needs."""
+    items = []
+    page_token = None
+    while True:
+        response = service.service.events().list(
+            calendarId=service.calendar_id,
+            maxResults=2500,
+            pageToken=page_token,
+            fields="items(id,extendedProperties/private),nextPageToken",
+        ).execute()
+        items.extend(response.get("items", []))
+        page_token = response.get("nextPageToken")
+        if not page_token:
+            return items
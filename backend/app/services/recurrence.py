@@ -0,0 +1,207 @@
+from datetime import datetime, timedelta, timezone
+from dateutil.rrule import rrulestr
+from typing import List, Optional, Tuple
+from zoneinfo import ZoneInfo
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Recurring series are stored as one master row:
+# - start_time / end_time: the first occurrence
+# - recurrence: a single "RRULE:..." line (what Google expects)
+# - recurrence_exceptions: UTC ISO start times of cancelled occurrences (EXDATE)
+# - recurrence_end: end of the last occurrence, or null if the series never ends
+# - recurrence_timezone: IANA zone the rule repeats in, so DST keeps wall-clock times
+# Occurrences are expanded on read. Each one gets the Google-style id
+# "<master id>_<UTC start>" and recurring_event_id pointing at the master.
+
+# Open-ended series are expanded at most this far when the caller gives no range
+DEFAULT_HORIZON = timedelta(days=365)
+INSTANCE_ID_FORMAT = "%Y%m%dT%H%M%SZ"
+
+def _parse_utc(value) -> datetime:
+    dt = value if isinstance(value, datetime) else datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+def _utc_stamp(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime(INSTANCE_ID_FORMAT)
+
+def _filter_stamp(dt: datetime) -> str:
+    # No '+' offsets: they would need escaping inside a PostgREST or() filter
+    return _parse_utc(dt).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def _zone(name: Optional[str]):
+    try:
+        return ZoneInfo(name) if name else timezone.utc
+    except Exception:
+        logger.warning(f"Unknown recurrence timezone {name!r}, falling back to UTC")
+        return timezone.utc
+
+def build_rrule(frequency: str, count: Optional[int] = None, until=None) -> Optional[str]:
+    """RRULE line for the agent's repeat options, or None for a single event."""
+    freq = {"daily": "DAILY", "weekly": "WEEKLY"}.get((frequency or "").lower())
+    if not freq:
+        return None
+    rule = f"RRULE:FREQ={freq}"
+    if until:
+        rule += f";UNTIL={_utc_stamp(_parse_utc(until))}"
+    elif count:
+        rule += f";COUNT={int(count)}"
+    return rule
+
+def _rule(row: dict):
+    tz = _zone(row.get("recurrence_timezone"))
+    dtstart = _parse_utc(row["start_time"]).astimezone(tz)
+    return rrulestr(row["recurrence"], dtstart=dtstart)
+
+def series_end(row: dict) -> Optional[str]:
+    """End of the last occurrence for bounded rules (COUNT/UNTIL), None otherwise."""
+    rule = _rule(row)
+    if not rule._count and not rule._until:
+        return None
+    duration = _parse_utc(row["end_time"]) - _parse_utc(row["start_time"])
+    last = None
+    for last in rule:
+        pass
+    return (last.astimezone(timezone.utc) + duration).isoformat() if last else row["end_time"]
+
+def single_filter(start: Optional[datetime], end: Optional[datetime], after: Optional[Tuple[datetime, str]] = None) -> str:
+    """
+    PostgREST and() filter for single (non-recurring) events inside
+    [start, end]; `after` is a keyset (start_time, id) to resume past.
+    """
+    single = ["recurrence.is.null"]
+    if start:
+        single.append(f"start_time.gte.{_filter_stamp(start)}")
+    if end:
+        single.append(f"end_time.lte.{_filter_stamp(end)}")
+    if after:
+        single.append(f"or({keyset_filter(after)})")
+    return f"and({','.join(single)})"
+
+def keyset_filter(after: Tuple[datetime, str]) -> str:
+    """PostgREST or() body matching rows ordered after (start_time, id)."""
+    after_start, after_id = after
+    stamp = _parse_utc(after_start).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+    # Occurrence ids are "<master uuid>_<stamp>" and order like the master uuid
+    # against other rows, so the master id is the bound
+    after_id = split_instance_id(after_id)[0]
+    return f"start_time.gt.{stamp},and(start_time.eq.{stamp},id.gt.{after_id})"
+
+def series_filter(start: Optional[datetime], end: Optional[datetime]) -> str:
+    """PostgREST and() filter for series masters that may have an occurrence in [start, end]."""
+    series = ["recurrence.not.is.null"]
+    if start:
+        series.append(f"or(recurrence_end.is.null,recurrence_end.gte.{_filter_stamp(start)})")
+    if end:
+        series.append(f"start_time.lte.{_filter_stamp(end)}")
+    return f"and({','.join(series)})"
+
+def contained_filter(start: Optional[datetime], end: Optional[datetime]) -> str:
+    """
+    PostgREST or() filter matching single events inside [start, end] plus
+    every series master that may have an occurrence there.
+    """
+    return f"{single_filter(start, end)},{series_filter(start, end)}"
+
+def overlap_filter(start: datetime) -> str:
+    """
+    PostgREST or() filter (combined with start_time <= end) for rows or series
+    that are still running at `start`.
+    """
+    stamp = _filter_stamp(start)
+    return f"end_time.gte.{stamp},recurrence_end.gte.{stamp},and(recurrence.not.is.null,recurrence_end.is.null)"
+
+def expand(row: dict, start: Optional[datetime] = None, end: Optional[datetime] = None, overlap: bool = False) -> List[dict]:
+    """
+    Occurrences of a master row as standalone event dicts. By default only
+    occurrences fully inside [start, end] are returned; overlap=True keeps any
+    that intersect it.
+    """
+    first_start = _parse_utc(row["start_time"])
+    duration = _parse_utc(row["end_time"]) - first_start
+    start = _parse_utc(start) if start else first_start
+    end = _parse_utc(end) if end else start + DEFAULT_HORIZON
+    exceptions = {_utc_stamp(_parse_utc(e)) for e in row.get("recurrence_exceptions") or []}
+
+    instances = []
+    for occurrence in _rule(row).between(start - duration, end, inc=True):
+        occ_start = occurrence.astimezone(timezone.utc)
+        occ_end = occ_start + duration
+        if overlap:
+            if not (occ_start < end and occ_end > start):
+                continue
+        elif occ_start < start or occ_end > end:
+            continue
+        stamp = _utc_stamp(occ_start)
+        if stamp in exceptions:
+            continue
+        instance = dict(row)
+        instance.update({
+            "id": f"{row['id']}_{stamp}",
+            "recurring_event_id": row["id"],
+            "start_time": occ_start.isoformat(),
+            "end_time": occ_end.isoformat(),
+        })
+        instances.append(instance)
+    return instances
+
+def expand_rows(rows: List[dict], start: Optional[datetime] = None, end: Optional[datetime] = None, overlap: bool = False) -> List[dict]:
+    """Replaces series masters with their occurrences; single events pass through."""
+    expanded = []
+    for row in rows:
+        if row.get("recurrence"):
+            try:
+                expanded.extend(expand(row, start, end, overlap))
+            except Exception as e:
+                logger.error(f"Could not expand recurring event {row.get('id')}: {e}")
+        else:
+            expanded.append(row)
+    return expanded
+
+def split_instance_id(event_id: str) -> Tuple[str, Optional[datetime]]:
+    """'<master>_<UTC stamp>' -> (master id, occurrence start); plain ids -> (id, None)."""
+    master_id, _, stamp = event_id.rpartition("_")
+    if not master_id:
+        return event_id, None
+    try:
+        return master_id, datetime.strptime(stamp, INSTANCE_ID_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return event_id, None
+
+def with_exception(row: dict, occurrence_start: datetime) -> List[str]:
+    """The master's exception list with one more cancelled occurrence."""
+    exceptions = list(row.get("recurrence_exceptions") or [])
+    stamp = _parse_utc(occurrence_start).isoformat()
+    if stamp not in exceptions:
+        exceptions.append(stamp)
+    return exceptions
+
+def gcal_recurrence(row: dict) -> List[str]:
+    """The RRULE plus EXDATE lines Google expects on the master event."""
+    lines = [row["recurrence"]]
+    exceptions = row.get("recurrence_exceptions") or []
+    if exceptions:
+        lines.append("EXDATE:" + ",".join(sorted(_utc_stamp(_parse_utc(e)) for e in exceptions)))
+    return lines
+
+def cancel_occurrence(db, user_id: str, event_id: str) -> Optional[dict]:
+    """
+    Adds an occurrence id's start to its master's exceptions (EXDATE).
+    Returns the updated master row, or None if event_id is not an occurrence
+    of one of the user's series.
+    """
+    master_id, occurrence = split_instance_id(event_id)
+    if not occurrence:
+        return None
+    master = db.table("events").select("*").eq("id", master_id).eq("user_id", user_id).execute()
+    if not master.data or not master.data[0].get("recurrence"):
+        return None
+    result = db.table("events") \
+        .update({"recurrence_exceptions": with_exception(master.data[0], occurrence)}) \
+        .eq("id", master_id) \
+        .eq("user_id", user_id) \
+        .execute()
+    return result.data[0] if result.data else None
@@ -1,79 +1,83 @@
-import json
 import os
+import logging
 from typing import List, Dict
 from app.schemas.event import EventSchema
 from app.db import get_db
 from app.services.storage_supabase import SupabaseStorage
+from app.services.storage_sqlite import SQLiteStorage
+from app.services.invalidation import events_changed
+from app.services.syllabus_index import syllabus_index
 
-DATA_FILE = "backend/data/events.json"
+logger = logging.getLogger(__name__)
+
+# Events file written by the old JSON fallback (backend/data/events.json,
+# wherever the server is started from); imported into SQLite once
+DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "data", "events.json")
 
 # Set to True to enable Supabase as primary storage
 USE_SUPABASE = True
 
+def _use_supabase() -> bool:
+    return bool(USE_SUPABASE and get_db())
+
+def _local() -> SQLiteStorage:
+    if os.path.exists(DATA_FILE):
+        try:
+            # The file is left in place; the database records that it was imported
+            count = SQLiteStorage.import_json(DATA_FILE)
+            if count is not None:
+                logger.info(f"Imported {count} events from {DATA_FILE} into local storage")
+        except Exception as e:
+            logger.error(f"Could not import {DATA_FILE}: {e}")
+    return SQLiteStorage
+
 def load_events(user_id: str = None) -> List[EventSchema]:
-    if USE_SUPABASE and get_db():
+    if _use_supabase():
         return SupabaseStorage.load_events(user_id=user_id)
-        
-    if not os.path.exists(DATA_FILE):
-        return []
-    try:
-        with open(DATA_FILE, "r") as f:
-            data = json.load(f)
-            return [EventSchema(**item) for item in data]
-    except Exception:
-        return []
+    return _local().load_events(user_id=user_id)
 
 def save_events(new_events: List[EventSchema], user_id: str = None):
-    if USE_SUPABASE and get_db():
+    if _use_supabase():
         SupabaseStorage.save_events(new_events, user_id=user_id)
-        return
-
-    # Fallback to JSON
-    existing = load_events()
-    all_events = [e.model_dump() for e in existing] + [e.model_dump() for e in new_events]
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, "w") as f:
-        json.dump(all_events, f, default=str, indent=4)
+    else:
+        _local().save_events(new_events, user_id=user_id)
+    events_changed(user_id)
 
 def update_event(event_id: str, updates: Dict) -> bool:
-    if USE_SUPABASE and get_db():
+    if _use_supabase():
         return SupabaseStorage.update_event(event_id, updates)
-    # JSON update logic (simplified replacement)
-    events = load_events()
-    for i, e in enumerate(events):
-        if e.id == event_id:
-            data = e.model_dump()
-            data.update(updates)
-            events[i] = EventSchema(**data)
-            _save_all_json(events)
-            return True
-    return False
+    return _local().update_event(event_id, updates)
 
 def delete_event(event_id: str) -> bool:
-    if USE_SUPABASE and get_db():
+    if _use_supabase():
         return SupabaseStorage.delete_event(event_id)
-    events = load_events()
-    new_events = [e for e in events if e.id != event_id]
-    if len(new_events) < len(events):
-        _save_all_json(new_events)
-        return True
-    return False
-
-def _save_all_json(events: List[EventSchema]):
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    with open(DATA_FILE, "w") as f:
-        json.dump([e.model_dump() for e in events], f, default=str, indent=4)
+    return _local().delete_event(event_id)
 
 def clear_events():
-    if os.path.exists(DATA_FILE):
-        os.remove(DATA_FILE)
     # Supabase clear not implemented for safety
+    _local().clear_events()
 
 def save_syllabus(user_id: str, course_name: str, raw_text: str, insights: Dict, pdf_url: str = None):
-    if USE_SUPABASE and get_db():
+    if _use_supabase():
         SupabaseStorage.save_syllabus(user_id, course_name, raw_text, insights, pdf_url=pdf_url)
+    else:
+        _local().save_syllabus(user_id, course_name, raw_text, insights, pdf_url=pdf_url)
+    # Syllabus imports come with extracted deadlines
+    events_changed(user_id)
+    syllabus_index.invalidate(user_id)
 
 def get_syllabi(user_id: str):
-    if USE_SUPABASE and get_db():
+    """Metadata of the user's syllabi, without raw text or insights."""
+    if _use_supabase():
         return SupabaseStorage.get_syllabi(user_id)
-    return []
\ No newline at end of file
+    return _local().get_syllabi(user_id)
+
+def get_syllabus(user_id: str, syllabus_id: str):
+    if _use_supabase():
+        return SupabaseStorage.get_syllabus(user_id, syllabus_id)
+    return _local().get_syllabus(user_id, syllabus_id)
+
+def get_syllabus_texts(user_id: str):
+    if _use_supabase():
+        return SupabaseStorage.get_syllabus_texts(user_id)
+    return _local().get_syllabus_texts(user_id)
@@ -0,0 +1,53 @@
+from typing import Optional
+from app.core.config import settings
+from app.db_local import LocalClient, connect
+from app.schemas.event import EventSchema
+from app.services.storage_supabase import SupabaseStorage
+import json
+import os
+
+# Files already recorded in local_imports by this process
+_imported = set()
+
+class SQLiteStorage(SupabaseStorage):
+    """
+    Local storage with the same surface as SupabaseStorage, used when no
+    Supabase project is configured. It runs SupabaseStorage's queries
+    through LocalClient on LOCAL_DB_PATH, so it shares the schema, indexes
+    and compressed syllabus text of the DB_BACKEND=sqlite database.
+    """
+    @staticmethod
+    def _client() -> LocalClient:
+        return LocalClient(settings.LOCAL_DB_PATH)
+
+    @classmethod
+    def clear_events(cls):
+        cls._client().table("events").delete().neq("id", "").execute()
+
+    @classmethod
+    def upload_syllabus_pdf(cls, user_id: str, course_name: str, pdf_content: bytes) -> Optional[str]:
+        # No object storage locally; the extracted text is what gets kept
+        return None
+
+    @classmethod
+    def import_json(cls, path: str) -> Optional[int]:
+        """
+        Copies events from the old events.json fallback file once per
+        database; returns how many, or None if it was imported before.
+        """
+        key = (settings.LOCAL_DB_PATH, os.path.realpath(path))
+        if key in _imported:
+            return None
+        conn = connect(settings.LOCAL_DB_PATH)
+        conn.execute("CREATE TABLE IF NOT EXISTS local_imports (path TEXT PRIMARY KEY, imported_at TEXT)")
+        if conn.execute("SELECT 1 FROM local_imports WHERE path = ?", (key[1],)).fetchone() is None:
+            with open(path, "r") as f:
+                events = [EventSchema(**item) for item in json.load(f)]
+            # Upsert: a second process importing at the same time writes the same rows
+            if events:
+                cls._client().table("events").upsert([e.model_dump(mode='json') for e in events]).execute()
+            conn.execute("INSERT OR IGNORE INTO local_imports (path, imported_at) VALUES (?, datetime('now'))", (key[1],))
+            _imported.add(key)
+            return len(events)
+        _imported.add(key)
+        return None
@@ -1,10 +1,16 @@
 from typing import List, Optional, Dict
 from app.db import get_service_db
 from app.schemas.event import EventSchema
+from app.services.write_behind import WriteBehind
+import base64
 import logging
+import zlib
 
 logger = logging.getLogger("SupabaseStorage")
 
+# What the syllabus list returns; text and insights come from get_syllabus
+SYLLABUS_SUMMARY_COLUMNS = "id,course_name,pdf_url,created_at,updated_at"
+
 def get_color_for_course(course_id: str) -> str:
     """
     Returns a deterministic color for a given course ID.
@@ -15,15 +21,35 @@ def get_color_for_course(course_id: str) -> str:
     index = sum(ord(c) for c in str(course_id)) % len(colors)
     return colors[index]
 
+def compress_text(text: Optional[str]) -> Optional[str]:
+    """zlib-compressed, base64-encoded so it fits a text column and a JSON body."""
+    if text is None:
+        return None
+    return base64.b64encode(zlib.compress(text.encode("utf-8"), 9)).decode("ascii")
+
+def syllabus_text(row: Dict) -> Optional[str]:
+    """Raw text of a syllabus row; rows saved before compression keep it in raw_text."""
+    if row.get("raw_text_compressed"):
+        return zlib.decompress(base64.b64decode(row["raw_text_compressed"])).decode("utf-8")
+    return row.get("raw_text")
+
 class SupabaseStorage:
+    """
+    Event and syllabus storage over the supabase table API. SQLiteStorage
+    runs the same queries against the local SQLite client.
+    """
     @staticmethod
-    def load_events(user_id: str = None) -> List[EventSchema]:
-        supabase = get_service_db()
+    def _client():
+        return get_service_db()
+
+    @classmethod
+    def load_events(cls, user_id: str = None) -> List[EventSchema]:
+        supabase = cls._client()
         if not supabase:
             return []
         
         try:
-            query = supabase.table("events").select("*")
+            query = supabase.table("events").select("*").order("start_time")
             if user_id:
                 query = query.eq("user_id", user_id)
             
@@ -34,12 +60,12 @@ class SupabaseStorage:
             logger.error(f"Error loading events from Supabase: {e}")
             return []
 
-    @staticmethod
-    def save_events(new_events: List[EventSchema], user_id: str = None):
+    @classmethod
+    def save_events(cls, new_events: List[EventSchema], user_id: str = None):
         """
         Inserts multiple events into the DB.
         """
-        supabase = get_service_db()
+        supabase = cls._client()
         if not supabase or not new_events:
             return
 
@@ -54,43 +80,47 @@ class SupabaseStorage:
                     d['color_hex'] = get_color_for_course(d['course_id'])
                 data_to_insert.append(d)
 
-            supabase.table("events").insert(data_to_insert).execute()
+            # Chunked multi-row inserts; a bad row is retried alone instead of failing the rest
+            with WriteBehind(supabase) as writes:
+                writes.table("events").insert(data_to_insert).execute()
         except Exception as e:
             logger.error(f"Error saving events to Supabase: {e}")
 
-    @staticmethod
-    def update_event(event_id: str, updates: Dict) -> bool:
-        supabase = get_service_db()
+    @classmethod
+    def update_event(cls, event_id: str, updates: Dict) -> bool:
+        supabase = cls._client()
         if not supabase:
             return False
         try:
-            supabase.table("events").update(updates).eq("id", event_id).execute()
-            return True
+            result = supabase.table("events").update(updates).eq("id", event_id).execute()
+            return bool(result.data)
         except Exception as e:
             logger.error(f"Error updating event {event_id}: {e}")
             return False
 
-    @staticmethod
-    def delete_event(event_id: str) -> bool:
-        supabase = get_service_db()
+    @classmethod
+    def delete_event(cls, event_id: str) -> bool:
+        supabase = cls._client()
         if not supabase:
             return False
         try:
-            supabase.table("events").delete().eq("id", event_id).execute()
-            return True
+            result = supabase.table("events").delete().eq("id", event_id).execute()
+            return bool(result.data)
         except Exception as e:
             logger.error(f"Error deleting event {event_id}: {e}")
             return False
 
-    @staticmethod
-    def save_syllabus(user_id: str, course_name: str, raw_text: str, insights: Dict, pdf_url: str = None):
-        supabase = get_service_db()
+    @classmethod
+    def save_syllabus(cls, user_id: str, course_name: str, raw_text: str, insights: Dict, pdf_url: str = None):
+        supabase = cls._client()
         if not supabase: return
         try:
             data = {
                 "user_id": user_id,
                 "course_name": course_name,
-                "raw_text": raw_text,
+                # Clears any uncompressed copy left from before
+                "raw_text": None,
+                "raw_text_compressed": compress_text(raw_text),
                 "ai_insights": insights,
                 "updated_at": "now()"
             }
@@ -101,13 +131,13 @@ class SupabaseStorage:
         except Exception as e:
             logger.error(f"Error saving syllabus: {e}")
 
-    @staticmethod
-    def upload_syllabus_pdf(user_id: str, course_name: str, pdf_content: bytes) -> Optional[str]:
+    @classmethod
+    def upload_syllabus_pdf(cls, user_id: str, course_name: str, pdf_content: bytes) -> Optional[str]:
         """
         Uploads a PDF to Supabase Storage bucket 'syllabi'.
         Returns the public URL.
         """
-        supabase = get_service_db()
+        supabase = cls._client()
         if not supabase: return None
         
         try:
@@ -136,13 +166,42 @@ class SupabaseStorage:
             logger.error(f"Error uploading PDF to storage: {e}")
             return None
 
-    @staticmethod
-    def get_syllabi(user_id: str):
-        supabase = get_service_db()
+    @classmethod
+    def get_syllabi(cls, user_id: str):
+        supabase = cls._client()
         if not supabase: return []
         try:
-            res = supabase.table("syllabi").select("*").eq("user_id", user_id).execute()
+            res = supabase.table("syllabi").select(SYLLABUS_SUMMARY_COLUMNS).eq("user_id", user_id).order("course_name").execute()
             return res.data
         except Exception as e:
             logger.error(f"Error fetching syllabi: {e}")
             return []
+
+    @classmethod
+    def get_syllabus(cls, user_id: str, syllabus_id: str) -> Optional[Dict]:
+        """One syllabus with its raw text and insights, or None."""
+        supabase = cls._client()
+        if not supabase: return None
+        try:
+            res = supabase.table("syllabi").select(f"{SYLLABUS_SUMMARY_COLUMNS},raw_text,raw_text_compressed,ai_insights").eq("user_id", user_id).eq("id", syllabus_id).limit(1).execute()
+            if not res.data:
+                return None
+            row = res.data[0]
+            row["raw_text"] = syllabus_text(row)
+            row.pop("raw_text_compressed", None)
+            return row
+        except Exception as e:
+            logger.error(f"Error fetching syllabus {syllabus_id}: {e}")
+            return None
+
+    @classmethod
+    def get_syllabus_texts(cls, user_id: str) -> List[Dict]:
+        """course_name and raw_text of every syllabus, for the search index."""
+        supabase = cls._client()
+        if not supabase: return []
+        try:
+            res = supabase.table("syllabi").select("course_name,raw_text,raw_text_compressed").eq("user_id", user_id).execute()
+            return [{"course_name": row["course_name"], "raw_text": syllabus_text(row)} for row in res.data]
+        except Exception as e:
+            logger.error(f"Error fetching syllabus text: {e}")
+            return []
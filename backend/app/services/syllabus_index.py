@@ -0,0 +1,145 @@
+from collections import Counter, OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+import math
+import re
+import threading
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Passages are overlapping word windows, so a policy sentence is never split
+# across two passages without also appearing whole in one of them
+PASSAGE_WORDS = 120
+PASSAGE_OVERLAP = 30
+
+# BM25 parameters (the usual defaults)
+K1 = 1.5
+B = 0.75
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from",
+    "how", "i", "if", "in", "is", "it", "my", "of", "on", "or", "the", "this", "to",
+    "what", "when", "will", "with", "you", "your",
+}
+
+def tokenize(text: str) -> List[str]:
+    tokens = []
+    for token in re.findall(r"[a-z0-9]+", text.lower()):
+        if token in STOPWORDS:
+            continue
+        # Cheap plural folding: "exams" and "exam" should match
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+def split_passages(raw_text: str) -> List[str]:
+    words = raw_text.split()
+    if not words:
+        return []
+    step = PASSAGE_WORDS - PASSAGE_OVERLAP
+    return [
+        " ".join(words[i:i + PASSAGE_WORDS])
+        for i in range(0, max(len(words) - PASSAGE_OVERLAP, 1), step)
+    ]
+
+class UserIndex:
+    """BM25 inverted index over one user's syllabus passages."""
+    def __init__(self):
+        self.passages: Dict[Tuple[str, int], str] = {}
+        self.lengths: Dict[Tuple[str, int], int] = {}
+        self.postings: Dict[str, Dict[Tuple[str, int], int]] = {}
+        self.total_length = 0
+
+    def add_course(self, course_name: str, raw_text: str):
+        for n, passage in enumerate(split_passages(raw_text)):
+            key = (course_name, n)
+            terms = tokenize(passage)
+            self.passages[key] = passage
+            self.lengths[key] = len(terms)
+            self.total_length += len(terms)
+            for term, tf in Counter(terms).items():
+                self.postings.setdefault(term, {})[key] = tf
+
+    def search(self, query: str, top_k: int, course_name: Optional[str] = None) -> List[dict]:
+        n_docs = len(self.passages)
+        if not n_docs:
+            return []
+        avg_length = self.total_length / n_docs
+        scores: Dict[Tuple[str, int], float] = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, tf in postings.items():
+                if course_name and key[0].lower() != course_name.lower():
+                    continue
+                norm = tf + K1 * (1 - B + B * self.lengths[key] / avg_length)
+                scores[key] = scores.get(key, 0.0) + idf * tf * (K1 + 1) / norm
+
+        best = sorted(scores.items(), key=lambda item: -item[1])[:top_k]
+        return [
+            {"course_name": key[0], "passage": self.passages[key], "score": round(score, 3)}
+            for key, score in best
+        ]
+
+class SyllabusIndex:
+    """
+    Per-user full-text index over syllabus raw text.
+
+    A user's index is built from the DB on their first search, then kept in
+    memory until one of their syllabi is saved or it is evicted to make room
+    for more recently searched users.
+    """
+    def __init__(self, load_syllabi: Callable[[str], List[dict]] = None, max_users: int = None):
+        self._load_syllabi = load_syllabi
+        self._max_users = max_users or settings.SYLLABUS_INDEX_MAX_USERS
+        self._users: "OrderedDict[str, UserIndex]" = OrderedDict()
+        # Bumped by every invalidation, so a build that read the DB before it is not kept
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def search(self, user_id: str, query: str, top_k: int = 3, course_name: Optional[str] = None) -> List[dict]:
+        index = self._get_index(user_id)
+        with self._lock:
+            return index.search(query, top_k, course_name)
+
+    def _get_index(self, user_id: str) -> UserIndex:
+        with self._lock:
+            index = self._users.get(user_id)
+            if index is not None:
+                self._users.move_to_end(user_id)
+                return index
+            generation = self._generation
+
+        index = UserIndex()
+        load = self._load_syllabi or _load_syllabi
+        for row in load(user_id) or []:
+            if row.get("raw_text"):
+                index.add_course(row["course_name"], row["raw_text"])
+
+        with self._lock:
+            if self._generation != generation:
+                # A save raced the load; use this build once and rebuild next time
+                return index
+            # Another request may have built it meanwhile
+            index = self._users.setdefault(user_id, index)
+            self._users.move_to_end(user_id)
+            while len(self._users) > self._max_users:
+                self._users.popitem(last=False)
+            return index
+
+    def invalidate(self, user_id: str):
+        """Drops the user's index; their next search rebuilds it from the DB."""
+        with self._lock:
+            self._users.pop(user_id, None)
+            self._generation += 1
+
+def _load_syllabi(user_id: str) -> List[dict]:
+    from app.services.storage import get_syllabus_texts
+    return get_syllabus_texts(user_id)
+
+syllabus_index = SyllabusIndex()
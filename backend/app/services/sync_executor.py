@@ -0,0 +1,206 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from googleapiclient.errors import HttpError
+from app.core.config import settings
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 403 reasons Google uses for quota exhaustion (as opposed to real permission errors)
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded"}
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+def is_retryable(error: Exception) -> bool:
+    """True for quota (403 rate limit / 429) and transient 5xx Google errors."""
+    if not isinstance(error, HttpError):
+        return False
+    status = error.resp.status
+    if status in RETRYABLE_STATUSES:
+        return True
+    if status == 403:
+        details = error.error_details if isinstance(error.error_details, list) else []
+        return any(isinstance(d, dict) and d.get("reason") in RATE_LIMIT_REASONS for d in details)
+    return False
+
+class TokenBucket:
+    """
+    Thread-safe token bucket pacing callers at `rate` requests/second with
+    bursts up to `capacity`. `acquire` blocks until a token is available;
+    `try_acquire` never blocks.
+    """
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self) -> float:
+        """Takes a token and returns 0, or returns the seconds until one is available."""
+        with self.lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait_for = self.try_acquire()
+            if not wait_for:
+                return
+            time.sleep(wait_for)
+
+    def drain(self):
+        """Empties the bucket after a quota error so concurrent pushes back off too."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, 0.0)
+
+@dataclass
+class SyncReport:
+    synced: int = 0
+    skipped: int = 0
+    retried: int = 0
+    failed: int = 0
+    failed_ids: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "synced": self.synced,
+            "skipped": self.skipped,
+            "retried": self.retried,
+            "failed": self.failed,
+            "failed_ids": self.failed_ids,
+        }
+
+class SyncExecutor:
+    """
+    Pushes events to Google with bounded parallelism across events and users.
+    - each user is paced by their own token bucket (Google quotas are per user),
+      checked before submitting so workers never sleep waiting for tokens
+    - quota and transient errors go to a retry queue with exponential backoff
+    - everything else fails fast and is reported
+    """
+    def __init__(
+        self,
+        max_workers: int = None,
+        user_rate: float = None,
+        user_burst: int = None,
+        max_attempts: int = None,
+        base_delay: float = 1.0,
+        max_delay: float = 32.0,
+    ):
+        self.max_workers = max_workers or settings.GOOGLE_SYNC_MAX_WORKERS
+        self.user_rate = user_rate or settings.GOOGLE_USER_QPS
+        self.user_burst = user_burst or settings.GOOGLE_USER_BURST
+        self.max_attempts = max_attempts or settings.GOOGLE_SYNC_MAX_ATTEMPTS
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _bucket(self, user_id: str) -> TokenBucket:
+        with self._lock:
+            if user_id not in self._buckets:
+                self._buckets[user_id] = TokenBucket(self.user_rate, self.user_burst)
+            return self._buckets[user_id]
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # Shared across runs so the bound holds for concurrent syncs too
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="gcal-sync")
+            return self._pool
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay + random.uniform(0, self.base_delay)
+
+    def run(
+        self,
+        jobs: List[Tuple[object, List[dict]]],
+        on_progress: Optional[Callable[[str, SyncReport], None]] = None,
+    ) -> Dict[str, SyncReport]:
+        """
+        Runs a batch of (GoogleCalendarService, events) jobs, possibly for
+        several users, and returns a SyncReport per user_id.
+        """
+        reports: Dict[str, SyncReport] = {}
+        per_user = []
+        for service, events in jobs:
+            reports.setdefault(service.user_id, SyncReport())
+            per_user.append(deque((service, event, 0) for event in events))
+
+        # Interleave users so one large push does not starve the others
+        ready = deque()
+        for group in itertools.zip_longest(*per_user):
+            ready.extend(task for task in group if task is not None)
+
+        retry_queue = []
+        sequence = itertools.count()
+        in_flight = {}
+        pool = self._get_pool()
+
+        while ready or retry_queue or in_flight:
+            now = time.monotonic()
+            while retry_queue and retry_queue[0][0] <= now:
+                ready.append(heapq.heappop(retry_queue)[2])
+
+            while ready and len(in_flight) < self.max_workers:
+                task = ready.popleft()
+                wait_for = self._bucket(task[0].user_id).try_acquire()
+                if wait_for:
+                    # Out of tokens: park it rather than hold a worker that
+                    # other users' pushes could use
+                    heapq.heappush(retry_queue, (now + wait_for, next(sequence), task))
+                    continue
+                in_flight[pool.submit(task[0].push_event, task[1])] = task
+
+            timeout = max(0.0, retry_queue[0][0] - now) if retry_queue else None
+            if not in_flight:
+                time.sleep(timeout or 0)
+                continue
+
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                service, event, attempt = in_flight.pop(future)
+                report = reports[service.user_id]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    if is_retryable(e) and attempt + 1 < self.max_attempts:
+                        report.retried += 1
+                        self._bucket(service.user_id).drain()
+                        retry_at = time.monotonic() + self._backoff(attempt)
+                        heapq.heappush(retry_queue, (retry_at, next(sequence), (service, event, attempt + 1)))
+                        logger.warning(f"Retrying event {event.get('id', 'unknown')} (attempt {attempt + 1}): {e}")
+                    else:
+                        report.failed += 1
+                        report.failed_ids.append(event.get("id", "unknown"))
+                        logger.error(f"Failed to sync event {event.get('id', 'unknown')}: {e}")
+                else:
+                    if outcome == "skipped":
+                        report.skipped += 1
+                    else:
+                        report.synced += 1
+
+                if on_progress:
+                    on_progress(service.user_id, report)
+
+        return reports
+
+sync_executor = SyncExecutor()
@@ -0,0 +1,115 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from app.services.sync_executor import sync_executor, SyncExecutor, SyncReport
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Finished jobs stay queryable this long
+JOB_RETENTION_SECONDS = 3600
+# Concurrent sync jobs; each one fans out through the shared sync executor
+MAX_RUNNING_JOBS = 4
+
+class SyncJob:
+    """Progress of one background push of a user's unsynced events to Google."""
+    def __init__(self, user_id: str, total: int):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.status = "queued"  # queued -> running -> done | failed
+        self.total = total
+        self.report = SyncReport()
+        self.error: Optional[str] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.finished_at: Optional[datetime] = None
+        # Bumped on every change so pollers can tell whether anything moved
+        self.revision = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "pushed": self.report.synced + self.report.skipped,
+            **self.report.to_dict(),
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+class SyncJobManager:
+    """
+    Runs Google pushes off the request path. POST /calendar/sync enqueues a
+    job and returns its id; progress is read from here. A user has at most
+    one job in flight: syncing again while one runs returns the running job
+    instead of pushing the same events twice.
+
+    Jobs live in process memory, so progress is visible on the worker that
+    accepted the job.
+    """
+    def __init__(self, executor: SyncExecutor = None, max_running: int = MAX_RUNNING_JOBS):
+        self.executor = executor or sync_executor
+        self._jobs: Dict[str, SyncJob] = {}
+        self._active: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix="sync-job")
+
+    def submit(self, service, events: List[dict]) -> SyncJob:
+        with self._lock:
+            self._prune()
+            active = self._jobs.get(self._active.get(service.user_id))
+            if active and not active.finished:
+                return active
+            job = SyncJob(service.user_id, len(events))
+            self._jobs[job.id] = job
+            self._active[service.user_id] = job.id
+        self._pool.submit(self._run, job, service, events)
+        return job
+
+    def get(self, job_id: str, user_id: str) -> Optional[SyncJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        # Other users' job ids are indistinguishable from unknown ones
+        return job if job and job.user_id == user_id else None
+
+    def _run(self, job: SyncJob, service, events: List[dict]):
+        self._update(job, status="running")
+        try:
+            def on_progress(user_id: str, report: SyncReport):
+                self._update(job, report=report)
+            with service.buffered_writes():
+                reports = self.executor.run([(service, events)], on_progress=on_progress)
+            self._update(job, status="done", report=reports.get(service.user_id, job.report))
+            logger.info(f"Sync job {job.id} for user {job.user_id}: {job.report.to_dict()}")
+        except Exception as e:
+            logger.error(f"Sync job {job.id} for user {job.user_id} failed: {e}")
+            self._update(job, status="failed", error=str(e))
+
+    def _update(self, job: SyncJob, status: str = None, report: SyncReport = None, error: str = None):
+        with self._lock:
+            if report is not None:
+                # Copy: the executor keeps mutating its report from other threads
+                job.report = SyncReport(report.synced, report.skipped, report.retried, report.failed, list(report.failed_ids))
+            if status:
+                job.status = status
+            if error:
+                job.error = error
+            if job.finished:
+                job.finished_at = job.finished_at or datetime.now(timezone.utc)
+            job.revision += 1
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at.timestamp() < cutoff]:
+            job = self._jobs.pop(job_id)
+            if self._active.get(job.user_id) == job_id:
+                del self._active[job.user_id]
+
+sync_jobs = SyncJobManager()
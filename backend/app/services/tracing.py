@@ -0,0 +1,245 @@
+from app.core.config import settings
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    """One timed step of a trace: a model round trip, a tool call, a DB query..."""
+    def __init__(self, name: str, kind: str, parent: Optional[str] = None, attributes: Dict = None):
+        self.id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.kind = kind
+        self.parent = parent
+        self.attributes = attributes or {}
+        self.start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self, trace_start: float) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "kind": self.kind,
+            "parent": self.parent,
+            "offset_ms": round((self.start - trace_start) * 1000, 3),
+            "duration_ms": self.duration_ms,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+class Trace:
+    """All spans recorded while handling one request."""
+    def __init__(self, name: str, attributes: Dict = None):
+        self.id = uuid.uuid4().hex
+        self.root = Span(name, "request", attributes=attributes)
+        self.spans: List[Span] = []
+        self.closed = False
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            # Background work that outlives the request is not part of it
+            if not self.closed:
+                self.spans.append(span)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.id,
+            "name": self.root.name,
+            "started_at": time.time() - (time.perf_counter() - self.root.start),
+            "duration_ms": self.root.duration_ms,
+            "error": self.root.error,
+            "attributes": self.root.attributes,
+            "spans": [s.to_dict(self.root.start) for s in self.spans],
+        }
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+class Tracer:
+    """
+    Request-scoped tracing for agent turns.
+
+    `trace()` opens a trace for the current request; `span()` times a step
+    inside it and is a no-op outside one, so services can be instrumented
+    unconditionally. Finished traces are kept in a bounded in-memory buffer
+    for `stats()` and handed to a writer thread, which appends them as JSON
+    lines to a local sink rotated at `max_bytes`.
+    """
+    def __init__(self, sink_path: str = None, buffer_size: int = None, max_bytes: int = None, backups: int = None):
+        self.sink_path = settings.TRACE_SINK_PATH if sink_path is None else sink_path
+        self.max_bytes = max_bytes or settings.TRACE_SINK_MAX_BYTES
+        self.backups = settings.TRACE_SINK_BACKUPS if backups is None else backups
+        self._recent = deque(maxlen=buffer_size or settings.TRACE_BUFFER_SIZE)
+        self._lock = threading.Lock()
+        # Finished traces waiting for the sink writer thread (started on first export)
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=buffer_size or settings.TRACE_BUFFER_SIZE)
+        self._writer: Optional[threading.Thread] = None
+
+    @contextmanager
+    def trace(self, name: str, **attributes):
+        trace = Trace(name, attributes)
+        trace_token = _current_trace.set(trace)
+        span_token = _current_span.set(trace.root)
+        try:
+            yield trace
+        except BaseException as e:
+            trace.root.error = type(e).__name__
+            raise
+        finally:
+            trace.root.duration_ms = round((time.perf_counter() - trace.root.start) * 1000, 3)
+            with trace._lock:
+                trace.closed = True
+            try:
+                _current_span.reset(span_token)
+                _current_trace.reset(trace_token)
+            except ValueError:
+                # Async generators closed by the server run this from another context
+                pass
+            self._export(trace)
+
+    @contextmanager
+    def span(self, name: str, kind: str, **attributes):
+        trace = _current_trace.get()
+        if trace is None:
+            yield None
+            return
+        parent = _current_span.get()
+        span = Span(name, kind, parent.id if parent else None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = type(e).__name__
+            raise
+        finally:
+            span.duration_ms = round((time.perf_counter() - span.start) * 1000, 3)
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                pass
+            trace.add(span)
+
+    def _export(self, trace: Trace):
+        record = trace.to_dict()
+        with self._lock:
+            self._recent.append(record)
+            if not self.sink_path:
+                return
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_forever, name="trace-sink", daemon=True)
+                self._writer.start()
+        # The file is written by the writer thread, never by the traced request
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            logger.warning(f"Trace sink is behind; dropped trace {trace.id}")
+
+    def flush(self):
+        """Blocks until every exported trace has been written to the sink."""
+        if self._writer is not None:
+            self._queue.join()
+
+    def _write_forever(self):
+        while True:
+            records = [self._queue.get()]
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(records)
+            except Exception as e:
+                logger.warning(f"Failed to export {len(records)} traces: {e}")
+            finally:
+                for _ in records:
+                    self._queue.task_done()
+
+    def _write(self, records: List[dict]):
+        directory = os.path.dirname(self.sink_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        for record in records:
+            self._rotate_if_full()
+            with open(self.sink_path, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+    def _rotate_if_full(self):
+        """sink -> sink.1 -> sink.2 ...; the oldest beyond `backups` is dropped."""
+        if not os.path.exists(self.sink_path) or os.path.getsize(self.sink_path) < self.max_bytes:
+            return
+        if self.backups <= 0:
+            os.remove(self.sink_path)
+            return
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.sink_path}.{n}"):
+                os.replace(f"{self.sink_path}.{n}", f"{self.sink_path}.{n + 1}")
+        os.replace(self.sink_path, f"{self.sink_path}.1")
+
+    def stats(self, name: str = None, user_id: str = None) -> dict:
+        """
+        Latency summary over the buffered traces: p50/p95 per request and per
+        span name, plus each span name's share of the slowest 5% of requests.
+        With `user_id`, only that user's traces are included.
+        """
+        with self._lock:
+            traces = [
+                t for t in self._recent
+                if (name is None or t["name"] == name)
+                and (user_id is None or t["attributes"].get("user_id") == user_id)
+            ]
+
+        durations = [t["duration_ms"] for t in traces if t["duration_ms"] is not None]
+        p95 = _percentile(durations, 95)
+
+        by_name: Dict[str, List[float]] = {}
+        slow_share: Dict[str, float] = {}
+        slow = [t for t in traces if p95 is not None and t["duration_ms"] >= p95]
+        for t in traces:
+            for s in t["spans"]:
+                by_name.setdefault(s["name"], []).append(s["duration_ms"])
+        for t in slow:
+            span_ids = {s["id"] for s in t["spans"]}
+            for s in t["spans"]:
+                # Top-level spans only, so DB spans inside a tool are not counted twice
+                if s["parent"] not in span_ids:
+                    slow_share[s["name"]] = slow_share.get(s["name"], 0.0) + s["duration_ms"] / max(t["duration_ms"], 1e-9)
+
+        spans = {
+            span_name: {
+                "count": len(values),
+                "p50_ms": _percentile(values, 50),
+                "p95_ms": _percentile(values, 95),
+                "total_ms": round(sum(values), 3),
+                "share_of_p95_requests": round(slow_share.get(span_name, 0.0) / len(slow), 3) if slow else None,
+            }
+            for span_name, values in by_name.items()
+        }
+        return {
+            "requests": len(durations),
+            "p50_ms": _percentile(durations, 50),
+            "p95_ms": p95,
+            "errors": sum(1 for t in traces if t["error"]),
+            "spans": dict(sorted(spans.items(), key=lambda item: -(item[1]["share_of_p95_requests"] or 0))),
+        }
+
+tracer = Tracer()
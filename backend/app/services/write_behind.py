@@ -0,0 +1,315 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.services.invalidation import events_changed
+import json
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# Rows per flushed statement
+BATCH_SIZE = 100
+BUFFERED_TABLES = {"events"}
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+        self.count = None
+
+class _Pending:
+    """What is waiting to be written for one row, applied delete -> write -> update."""
+    def __init__(self):
+        self.delete: Optional[tuple] = None      # extra eq filters of the delete
+        self.write: Optional[dict] = None        # {"kind": insert|upsert, "row"}
+        self.update: Optional[Tuple[tuple, dict]] = None  # (extra eq filters, changes)
+
+class _Query:
+    """
+    Records query-builder calls. On execute, writes the buffer can hold are
+    queued; everything else flushes the buffer and runs against the real
+    client, so reads always see earlier writes.
+    """
+    def __init__(self, writes: "WriteBehind", table: str):
+        self.writes = writes
+        self.table = table
+        self.calls: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, method):
+        def record(*args, **kwargs):
+            self.calls.append((method, args, kwargs))
+            return self
+        return record
+
+    def execute(self):
+        if self.table in BUFFERED_TABLES:
+            data = self.writes._buffer(self.table, self.calls)
+            if data is not None:
+                return _Result(data)
+        self.writes.flush()
+        query = self.writes.db.table(self.table)
+        for method, args, kwargs in self.calls:
+            query = getattr(query, method)(*args, **kwargs)
+        return query.execute()
+
+class WriteBehind:
+    """
+    Write-behind buffer over a supabase client for event mutations. Callers
+    use it exactly like the client (`writes.table("events").update(...)`).
+    Inserts, upserts and id-addressed updates/deletes are held for a short
+    window, then flushed as few statements as possible:
+    - repeated updates to a row coalesce into one, and updates to a row
+      that is still waiting to be inserted fold into the insert
+    - inserts and upserts go out as one multi-row statement per column set
+    - rows receiving identical changes share one `update ... in (ids)`
+    The buffer flushes when it holds `max_pending` rows, `window` seconds
+    after the first buffered write, before any read or unbufferable write
+    (read-your-writes), and when the `with` block ends.
+    """
+    def __init__(self, db, user_id: str = None, window: float = None, max_pending: int = None):
+        self.db = db
+        self.user_id = user_id
+        self.window = settings.WRITE_BEHIND_WINDOW_SECONDS if window is None else window
+        self.max_pending = max_pending or settings.WRITE_BEHIND_MAX_PENDING
+        self._pending: Dict[str, "OrderedDict[str, _Pending]"] = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._error: Optional[Exception] = None
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Writes made before a failure would already be in the DB without
+        # the buffer, so they are flushed either way
+        try:
+            self.flush()
+        except Exception:
+            if exc_type is None:
+                raise
+            logger.exception("Write-behind flush failed while handling another error")
+        return False
+
+    # Buffering
+    def _buffer(self, table: str, calls: List[Tuple[str, tuple, dict]]) -> Optional[list]:
+        """Queues the write and returns its optimistic result, or None if it must run now."""
+        action, args, kwargs = calls[0]
+        filters = calls[1:]
+        if action in ("insert", "upsert") and not filters:
+            rows = args[0] if isinstance(args[0], list) else [args[0]]
+            on_conflict = kwargs.get("on_conflict") or "id"
+            if on_conflict != "id" or set(kwargs) - {"on_conflict"}:
+                return None
+            rows = [dict(row, id=row.get("id") or str(uuid.uuid4())) for row in rows]
+            with self._lock:
+                if not all(self._can_write(table, action, row) for row in rows):
+                    return None
+                for row in rows:
+                    self._add_write(table, action, row)
+            self._after_buffer()
+            return [dict(row) for row in rows]
+
+        if action in ("update", "delete") and not kwargs:
+            target = self._target_ids(filters)
+            if target is None:
+                return None
+            ids, extra = target
+            with self._lock:
+                if not all(self._can_filter(table, row_id, extra) for row_id in ids):
+                    return None
+                for row_id in ids:
+                    if action == "update":
+                        self._add_update(table, row_id, extra, dict(args[0]))
+                    else:
+                        self._add_delete(table, row_id, extra)
+            self._after_buffer()
+            # Affected rows are unknown until the flush
+            return []
+        return None
+
+    @staticmethod
+    def _target_ids(filters) -> Optional[Tuple[List[str], tuple]]:
+        """(ids, other eq filters) for writes addressed by id, else None."""
+        ids, extra = None, []
+        for method, args, kwargs in filters:
+            if kwargs or len(args) != 2:
+                return None
+            column, value = args
+            if method == "eq" and column == "id" and ids is None:
+                ids = [str(value)]
+            elif method == "in_" and column == "id" and ids is None:
+                ids = [str(v) for v in value]
+            elif method == "eq":
+                extra.append((column, value))
+            else:
+                return None
+        return (ids, tuple(sorted(extra))) if ids is not None else None
+
+    def _row(self, table: str, row_id: str) -> _Pending:
+        rows = self._pending.setdefault(table, OrderedDict())
+        if row_id not in rows:
+            rows[row_id] = _Pending()
+            self._size += 1
+        return rows[row_id]
+
+    # Combinations whose buffered result could differ from running the
+    # writes one by one are not coalesced: the buffer is flushed first
+
+    def _can_write(self, table: str, kind: str, row: dict) -> bool:
+        pending = self._pending.get(table, {}).get(row["id"])
+        if pending is None:
+            return True
+        if pending.update is not None:
+            # Whether the update matched depends on the row as it is now
+            return False
+        # Inserting a queued row again must fail in the DB, as it would unbuffered
+        return not (kind == "insert" and pending.write is not None)
+
+    def _can_filter(self, table: str, row_id: str, extra: tuple) -> bool:
+        pending = self._pending.get(table, {}).get(row_id)
+        if pending is None:
+            return True
+        if pending.delete is not None and pending.delete != extra:
+            # Two deletes with different filters cannot become one
+            return False
+        if pending.write is not None:
+            # The queued row decides whether the filters match
+            return all(column in pending.write["row"] for column, _ in extra)
+        if pending.update is not None:
+            previous, changes = pending.update
+            return previous == extra and not any(column in changes for column, _ in extra)
+        return True
+
+    @staticmethod
+    def _matches(row: dict, extra: tuple) -> bool:
+        return all(row.get(column) == value for column, value in extra)
+
+    def _add_write(self, table: str, kind: str, row: dict):
+        pending = self._row(table, row["id"])
+        if pending.write is not None:
+            # Upserting a queued row: still one write, later values win
+            kind = pending.write["kind"]
+            row = {**pending.write["row"], **row}
+        pending.write = {"kind": kind, "row": row}
+
+    def _add_update(self, table: str, row_id: str, extra: tuple, changes: dict):
+        pending = self._row(table, row_id)
+        if pending.write is not None:
+            if self._matches(pending.write["row"], extra):
+                pending.write["row"].update(changes)
+        elif pending.update is not None:
+            pending.update[1].update(changes)
+        else:
+            pending.update = (extra, changes)
+
+    def _add_delete(self, table: str, row_id: str, extra: tuple):
+        pending = self._row(table, row_id)
+        if pending.write is not None and not self._matches(pending.write["row"], extra):
+            # The row as queued would not match: the delete is a no-op
+            return
+        pending.write = None
+        pending.update = None
+        pending.delete = extra
+
+    def _after_buffer(self):
+        if self._size >= self.max_pending:
+            self.flush()
+            return
+        with self._lock:
+            if self._timer is None and self._size:
+                self._timer = threading.Timer(self.window, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _timed_flush(self):
+        try:
+            self.flush()
+        except Exception as e:
+            # Raised to the owner on its next flush
+            logger.error(f"Write-behind flush failed: {e}")
+            self._error = e
+
+    # Flushing
+    def flush(self):
+        """Writes everything buffered so far."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending, self._size = self._pending, {}, 0
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+            error, self._error = self._error, None
+            if pending:
+                for table, rows in pending.items():
+                    self._flush_table(table, rows)
+                if self.user_id:
+                    events_changed(self.user_id)
+            if error is not None:
+                raise error
+
+    def _flush_table(self, table: str, rows: "OrderedDict[str, _Pending]"):
+        deletes: Dict[tuple, List[str]] = {}
+        writes: Dict[tuple, List[dict]] = {}
+        updates: Dict[tuple, Tuple[tuple, dict, List[str]]] = {}
+        for row_id, pending in rows.items():
+            if pending.delete is not None:
+                deletes.setdefault(pending.delete, []).append(row_id)
+            if pending.write is not None:
+                key = (pending.write["kind"], tuple(sorted(pending.write["row"])))
+                writes.setdefault(key, []).append(pending.write["row"])
+            if pending.update is not None:
+                extra, changes = pending.update
+                key = (extra, json.dumps(changes, sort_keys=True, default=str))
+                updates.setdefault(key, (extra, changes, []))[2].append(row_id)
+
+        for extra, ids in deletes.items():
+            for chunk in _chunks(ids):
+                query = self.db.table(table).delete()
+                for column, value in extra:
+                    query = query.eq(column, value)
+                _by_ids(query, chunk).execute()
+        failed = None
+        for (kind, _), items in writes.items():
+            for chunk in _chunks(items):
+                try:
+                    self._write(table, kind, chunk)
+                except Exception as e:
+                    if len(chunk) == 1:
+                        failed = failed or e
+                        logger.error(f"Buffered {kind} into {table} failed: {e}")
+                        continue
+                    # One bad row fails the whole statement; the rest still go in
+                    logger.warning(f"Buffered {kind} of {len(chunk)} rows into {table} failed, retrying individually: {e}")
+                    for row in chunk:
+                        try:
+                            self._write(table, kind, [row])
+                        except Exception as row_error:
+                            failed = failed or row_error
+                            logger.error(f"Buffered {kind} of {table} row {row.get('id')} failed: {row_error}")
+        for extra, changes, ids in updates.values():
+            for chunk in _chunks(ids):
+                query = self.db.table(table).update(changes)
+                for column, value in extra:
+                    query = query.eq(column, value)
+                _by_ids(query, chunk).execute()
+        if failed is not None:
+            raise failed
+
+    def _write(self, table: str, kind: str, rows: List[dict]):
+        if kind == "insert":
+            self.db.table(table).insert(rows).execute()
+        else:
+            self.db.table(table).upsert(rows, on_conflict="id").execute()
+
+def _by_ids(query, ids: List[str]):
+    return query.eq("id", ids[0]) if len(ids) == 1 else query.in_("id", ids)
+
+def _chunks(items: list):
+    for i in range(0, len(items), BATCH_SIZE):
+        yield items[i:i + BATCH_SIZE]
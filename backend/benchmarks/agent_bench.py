@@ -0,0 +1,182 @@
+"""
+Offline benchmark and regression gate for the calendar agent.
+
+Replays the scripted conversations in agent_corpus.json through
+chat_with_agent against a deterministic model stand-in (it emits exactly the
+tool calls the script says), an in-memory database and a fake Google Calendar.
+For every turn it records latency, tool calls, DB round trips and Google API
+calls, then compares the run against agent_baseline.json.
+
+Usage (from backend/):
+    python -m benchmarks.agent_bench                    # run and compare
+    python -m benchmarks.agent_bench --update-baseline  # accept current numbers
+"""
+from google.genai import types
+from unittest.mock import patch
+from typing import Dict, List
+from testing.fakes import InMemoryDB, FakeGoogle
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CORPUS_PATH = os.path.join(HERE, "agent_corpus.json")
+BASELINE_PATH = os.path.join(HERE, "agent_baseline.json")
+
+# Counts are deterministic and must not grow. Latency is noisy, so it only
+# fails past both a relative and an absolute slack.
+LATENCY_TOLERANCE = 0.5
+LATENCY_SLACK_MS = 5.0
+COUNTED_METRICS = ("tool_calls", "db_round_trips", "google_calls")
+
+class _Response:
+    def __init__(self, text: str = None, calls: List[types.FunctionCall] = None):
+        self.text = text
+        self.function_calls = calls or None
+        parts = [types.Part(function_call=c) for c in calls or []] or [types.Part(text=text or "")]
+        self.candidates = [types.Candidate(content=types.Content(role="model", parts=parts))]
+
+class ScriptedModel:
+    """
+    Deterministic stand-in for the Gemini client. Each user turn in the script
+    lists the model steps for that turn: {"calls": [{"name", "args"}]} to
+    request tools, or {"text": "..."} to answer. Summary requests (plain
+    string prompts from the history manager) get a canned summary.
+    """
+    def __init__(self, model_latency_ms: float = 0.0):
+        self.steps: List[dict] = []
+        self.tool_calls = 0
+        self.model_latency_ms = model_latency_ms
+        self.aio = self
+        self.models = self
+
+    def start_turn(self, steps: List[dict]):
+        self.steps = list(steps)
+        self.tool_calls = 0
+
+    async def generate_content(self, model, contents, config=None):
+        if self.model_latency_ms:
+            await asyncio.sleep(self.model_latency_ms / 1000)
+        if isinstance(contents, str):
+            return _Response(text="Earlier the user scheduled study sessions.")
+        if not self.steps:
+            return _Response(text="Done.")
+        step = self.steps.pop(0)
+        if "calls" in step:
+            calls = [types.FunctionCall(name=c["name"], args=c.get("args", {})) for c in step["calls"]]
+            self.tool_calls += len(calls)
+            return _Response(calls=calls)
+        return _Response(text=step["text"])
+
+async def _drain_background():
+    from app.services import agent
+    while agent._background_tasks:
+        await asyncio.gather(*list(agent._background_tasks), return_exceptions=True)
+
+async def _run_conversation(conversation: dict, index: int) -> dict:
+    from app.services import agent
+    user_id = f"bench-user-{index}-{conversation['name']}"
+    tables = {"events": [dict(row, user_id=user_id) for row in conversation.get("events", [])]}
+    db = InMemoryDB(tables)
+    google = FakeGoogle(db, busy=conversation.get("google_busy"))
+    model = ScriptedModel(conversation.get("model_latency_ms", 0.0))
+
+    history, turns = [], []
+    with patch.object(agent.settings, "GEMINI_API_KEY", "offline-benchmark"), \
+         patch("app.services.agent.get_client", return_value=model), \
+         patch("app.services.agent.get_db", return_value=db), \
+         patch("app.services.agent_context.get_db", return_value=db), \
+         patch("app.services.availability.get_db", return_value=db), \
+         patch("app.services.google_calendar.get_calendar_service", return_value=google), \
+         patch.object(agent.tracer, "sink_path", ""):
+        for turn in conversation["turns"]:
+            model.start_turn(turn["model"])
+            db_before, google_before = db.round_trips, google.total_calls
+
+            started = time.perf_counter()
+            reply = await agent.chat_with_agent(turn["user"], user_id=user_id, history=list(history), timezone=conversation.get("timezone", "UTC"))
+            latency_ms = (time.perf_counter() - started) * 1000
+            # Google pushes run in the background; count them against this turn
+            await _drain_background()
+
+            turns.append({
+                "latency_ms": round(latency_ms, 3),
+                "tool_calls": model.tool_calls,
+                "db_round_trips": db.round_trips - db_before,
+                "google_calls": google.total_calls - google_before,
+            })
+            history.append({"role": "user", "parts": [{"text": turn["user"]}]})
+            history.append({"role": "model", "parts": [{"text": reply}]})
+
+    return {
+        "turns": turns,
+        "p50_latency_ms": round(statistics.median(t["latency_ms"] for t in turns), 3),
+        **{metric: sum(t[metric] for t in turns) for metric in COUNTED_METRICS},
+    }
+
+def run_corpus(corpus_path: str = CORPUS_PATH) -> Dict[str, dict]:
+    with open(corpus_path) as f:
+        corpus = json.load(f)
+
+    async def run_all():
+        return {
+            conversation["name"]: await _run_conversation(conversation, i)
+            for i, conversation in enumerate(corpus["conversations"])
+        }
+    return asyncio.run(run_all())
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], check_latency: bool = True) -> List[str]:
+    """Returns one message per regression against the baseline (empty if none)."""
+    regressions = []
+    for name, result in results.items():
+        expected = baseline.get(name)
+        if expected is None:
+            continue
+        for metric in COUNTED_METRICS:
+            if result[metric] > expected[metric]:
+                regressions.append(f"{name}: {metric} {expected[metric]} -> {result[metric]}")
+        if check_latency:
+            limit = max(expected["p50_latency_ms"] * (1 + LATENCY_TOLERANCE), expected["p50_latency_ms"] + LATENCY_SLACK_MS)
+            if result["p50_latency_ms"] > limit:
+                regressions.append(f"{name}: p50 latency {expected['p50_latency_ms']}ms -> {result['p50_latency_ms']}ms")
+    return regressions
+
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, dict]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_baseline(results: Dict[str, dict], path: str = BASELINE_PATH):
+    summary = {name: {k: v for k, v in result.items() if k != "turns"} for name, result in results.items()}
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--update-baseline", action="store_true", help="write this run as the new baseline")
+    parser.add_argument("--no-latency", action="store_true", help="only gate on deterministic counts")
+    args = parser.parse_args(argv)
+
+    results = run_corpus()
+    print(f"{'conversation':<28}{'p50 ms':>10}{'tools':>8}{'db':>8}{'google':>8}")
+    for name, result in results.items():
+        print(f"{name:<28}{result['p50_latency_ms']:>10.2f}{result['tool_calls']:>8}{result['db_round_trips']:>8}{result['google_calls']:>8}")
+
+    if args.update_baseline:
+        save_baseline(results)
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+
+    regressions = compare(results, load_baseline(), check_latency=not args.no_latency)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+"""
+Before/after benchmark for response serialization and compression.
+
+Seeds an in-memory database with a semester of events and a set of syllabi,
+then for GET /calendar/events, the GET /syllabus/syllabus list and one
+GET /syllabus/syllabus/{id} detail measures:
+
+- serialization time of the APIResponse envelope: the Pydantic model path
+  routes used before (validate + dump) against the orjson path
+- end-to-end request time with FAST_JSON_RESPONSES off and on
+- payload size uncompressed, gzip and (if installed) brotli
+
+--db sqlite runs the same requests against the local SQLite backend
+(app/db_local.py) instead of the in-memory fake, so query time is included.
+
+Usage (from backend/):
+    python -m benchmarks.response_bench [--events 2000] [--syllabi 12] [--runs 20] [--db memory|sqlite]
+"""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+from testing.fakes import InMemoryDB
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+def seed_events(n: int, user_id: str):
+    start = datetime(2026, 1, 5, 9, tzinfo=timezone.utc)
+    rows = []
+    for i in range(n):
+        begins = start + timedelta(hours=3 * i)
+        rows.append({
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "user_id": user_id,
+            "summary": f"CSE {100 + i % 7} Homework {i}",
+            "description": "Submit on Canvas. Show all work; partial credit is given for clear reasoning. " * 4,
+            "start_time": begins.isoformat(),
+            "end_time": (begins + timedelta(hours=1)).isoformat(),
+            "location": "Baskin Engineering 152",
+            "event_type": "assignment",
+            "weight": 2.5,
+            "course_id": f"CSE {100 + i % 7}",
+            "source": "ai",
+            "verified": False,
+            "color_hex": "#3b82f6",
+            "recurrence": None,
+        })
+    return rows
+
+def seed_syllabi(n: int, user_id: str):
+    from app.services.storage_supabase import compress_text
+    policy = "Late work loses 10% per day. Office hours are Tuesdays 2-4pm. Exams are closed book. "
+    return [{
+        "id": f"syllabus-{i}",
+        "user_id": user_id,
+        "course_name": f"CSE {100 + i}",
+        "raw_text_compressed": compress_text(policy * 300),
+        "ai_insights": {
+            "grading_scale": {"homework": 30, "midterm": 30, "final": 40},
+            "office_hours": ["Tue 2-4pm", "Thu 10-11am"],
+            "key_policies": [policy] * 5,
+            "summary": "Intro course covering data structures and algorithms.",
+        },
+    } for i in range(n)]
+
+def _timed(func, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def make_db(backend: str, tables: dict):
+    if backend == "sqlite":
+        from app.db_local import LocalClient
+        db = LocalClient(os.path.join(tempfile.mkdtemp(prefix="canvascal-bench-"), "bench.db"))
+        for table, rows in tables.items():
+            db.table(table).insert(rows).execute()
+        return db
+    return InMemoryDB(tables)
+
+def run(events: int = 2000, syllabi: int = 12, runs: int = 20, backend: str = "memory") -> dict:
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.core import compression
+    from app.core.config import settings
+    from app.core.responses import dumps
+    from app.core.security import get_current_user
+    from app.schemas.response import APIResponse
+
+    user_id = "bench-user"
+    db = make_db(backend, {"events": seed_events(events, user_id), "syllabi": seed_syllabi(syllabi, user_id)})
+    user = type("User", (), {"id": user_id})()
+    client = TestClient(app)
+    endpoints = {
+        "/calendar/events": {"start": "2026-01-01T00:00:00Z", "end": "2027-01-01T00:00:00Z"},
+        "/syllabus/syllabus": {},
+        "/syllabus/syllabus/syllabus-0": {},
+    }
+    encodings = ["identity", "gzip"] + (["br"] if compression.brotli is not None else [])
+
+    results = {}
+    with patch.dict(app.dependency_overrides, {get_current_user: lambda: user}), \
+         patch("app.api.calendar.get_db", return_value=db), \
+         patch("app.services.storage._use_supabase", return_value=True), \
+         patch("app.services.storage_supabase.get_service_db", return_value=db), \
+         patch("app.api.calendar._cache_validators", return_value={}):
+        for path, params in endpoints.items():
+            data = client.get(path, params=params, headers={"Accept-Encoding": "identity"}).json()["data"]
+
+            serialize_before = _timed(lambda: APIResponse(success=True, message="ok", data=data).model_dump_json().encode(), runs)
+            serialize_after = _timed(lambda: dumps({"success": True, "message": "ok", "data": data}), runs)
+
+            request_ms = {}
+            for fast in (False, True):
+                with patch.object(settings, "FAST_JSON_RESPONSES", fast):
+                    request_ms["after" if fast else "before"] = _timed(
+                        lambda: client.get(path, params=params, headers={"Accept-Encoding": "identity"}), runs)
+
+            sizes = {}
+            for encoding in encodings:
+                response = client.get(path, params=params, headers={"Accept-Encoding": encoding})
+                # httpx decodes the body; the wire size is the Content-Length
+                sizes[encoding] = int(response.headers.get("content-length") or len(response.content))
+
+            results[path] = {
+                "items": len(data) if isinstance(data, list) else 1,
+                "serialize_ms": {"before": round(serialize_before, 3), "after": round(serialize_after, 3)},
+                "request_ms": {k: round(v, 3) for k, v in request_ms.items()},
+                "bytes": sizes,
+            }
+    return results
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000)
+    parser.add_argument("--syllabi", type=int, default=12)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--db", choices=["memory", "sqlite"], default="memory")
+    args = parser.parse_args(argv)
+    # Request logs would drown the table
+    logging.disable(logging.INFO)
+
+    results = run(args.events, args.syllabi, args.runs, args.db)
+    print(f"{'endpoint':<30}{'items':>7}{'ser before':>12}{'ser after':>11}{'req before':>12}{'req after':>11}  bytes")
+    for path, r in results.items():
+        sizes = "  ".join(f"{k}={v}" for k, v in r["bytes"].items())
+        print(f"{path:<30}{r['items']:>7}{r['serialize_ms']['before']:>10.2f}ms{r['serialize_ms']['after']:>9.2f}ms"
+              f"{r['request_ms']['before']:>10.2f}ms{r['request_ms']['after']:>9.2f}ms  {sizes}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
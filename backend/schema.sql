@@ -12,6 +12,11 @@ CREATE TABLE IF NOT EXISTS events (
   event_type text NOT NULL, -- 'class', 'assignment', 'exam', 'study', 'travel'
   weight float,
   google_event_id text, -- ID of the event in Google Calendar
+  google_sync_hash jsonb, -- per-field hashes of the last payload pushed to Google
+  recurrence text, -- 'RRULE:...' line; set on series master rows only
+  recurrence_exceptions jsonb, -- UTC start times of cancelled occurrences (EXDATE)
+  recurrence_end timestamp with time zone, -- end of the last occurrence, null if open-ended
+  recurrence_timezone text, -- IANA zone the rule repeats in
   user_id uuid DEFAULT auth.uid(), -- Optional: link to Supabase Auth user
   
   -- Metadata for UX
@@ -36,6 +41,17 @@ CREATE TABLE IF NOT EXISTS user_integrations (
   google_access_token text,
   google_refresh_token text,
   google_calendar_id text DEFAULT 'primary',
+  google_token_expires_at timestamp with time zone,
+  google_sync_token text, -- nextSyncToken for incremental pulls from Google
+
+  -- Google push-notification channel on the CanvasCal calendar
+  google_channel_id text,
+  google_channel_resource_id text,
+  google_channel_token text,
+  google_channel_expires_at timestamp with time zone,
+
+  -- Secret in the ICS subscription URL (/calendar/feed/<token>.ics)
+  ics_feed_token text UNIQUE,
   
   created_at timestamp with time zone DEFAULT timezone('utc'::text, now()) NOT NULL,
   updated_at timestamp with time zone DEFAULT timezone('utc'::text, now()) NOT NULL
@@ -102,3 +118,96 @@ CREATE TRIGGER update_syllabi_updated_at
   BEFORE UPDATE ON syllabi
   FOR EACH ROW
   EXECUTE PROCEDURE handle_updated_at();
+
+-- Change log for events: one row per insert/update/delete, written by a
+-- trigger so every writer (API, agent, Google pull) is covered. A user's
+-- latest seq is their change version; 'delete' rows are the tombstones
+-- served by /calendar/changes. Each new row prunes its user's entries older
+-- than 30 days; a cursor whose own entry is gone gets a reset.
+CREATE TABLE IF NOT EXISTS event_changes (
+  seq bigserial PRIMARY KEY,
+  user_id uuid NOT NULL,
+  event_id uuid NOT NULL,
+  op text NOT NULL, -- 'upsert', 'delete'
+  changed_at timestamp with time zone DEFAULT timezone('utc'::text, now()) NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS event_changes_user_seq_idx ON event_changes (user_id, seq);
+CREATE INDEX IF NOT EXISTS event_changes_user_changed_at_idx ON event_changes (user_id, changed_at);
+
+ALTER TABLE event_changes ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can read their own event changes"
+ON event_changes
+FOR SELECT
+USING (auth.uid() = user_id);
+
+CREATE OR REPLACE FUNCTION record_event_change()
+RETURNS TRIGGER AS $$
+BEGIN
+  -- Rows without an owner have no feed to appear in
+  IF TG_OP = 'DELETE' THEN
+    IF OLD.user_id IS NOT NULL THEN
+      INSERT INTO event_changes (user_id, event_id, op) VALUES (OLD.user_id, OLD.id, 'delete');
+    END IF;
+    RETURN OLD;
+  END IF;
+  IF TG_OP = 'UPDATE' THEN
+    -- Write-backs after a Google push touch only sync bookkeeping, which no
+    -- client renders: not a change
+    IF (to_jsonb(OLD) - 'google_event_id' - 'google_sync_hash') = (to_jsonb(NEW) - 'google_event_id' - 'google_sync_hash') THEN
+      RETURN NEW;
+    END IF;
+    -- Moved to another owner: a tombstone for the previous one
+    IF OLD.user_id IS NOT NULL AND OLD.user_id IS DISTINCT FROM NEW.user_id THEN
+      INSERT INTO event_changes (user_id, event_id, op) VALUES (OLD.user_id, OLD.id, 'delete');
+    END IF;
+  END IF;
+  IF NEW.user_id IS NOT NULL THEN
+    INSERT INTO event_changes (user_id, event_id, op) VALUES (NEW.user_id, NEW.id, 'upsert');
+  END IF;
+  RETURN NEW;
+END;
+$$ language 'plpgsql' SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS record_event_changes ON events;
+CREATE TRIGGER record_event_changes
+  AFTER INSERT OR UPDATE OR DELETE ON events
+  FOR EACH ROW
+  EXECUTE PROCEDURE record_event_change();
+
+CREATE OR REPLACE FUNCTION prune_event_changes()
+RETURNS TRIGGER AS $$
+BEGIN
+  DELETE FROM event_changes
+  WHERE user_id = NEW.user_id AND changed_at < timezone('utc'::text, now()) - interval '30 days';
+  RETURN NULL;
+END;
+$$ language 'plpgsql' SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS prune_event_changes ON event_changes;
+CREATE TRIGGER prune_event_changes
+  AFTER INSERT ON event_changes
+  FOR EACH ROW
+  EXECUTE PROCEDURE prune_event_changes();
+
+-- Migrations for existing deployments
+ALTER TABLE user_integrations ADD COLUMN IF NOT EXISTS google_sync_token text;
+ALTER TABLE events ADD COLUMN IF NOT EXISTS google_sync_hash jsonb;
+ALTER TABLE user_integrations ADD COLUMN IF NOT EXISTS google_token_expires_at timestamp with time zone;
+ALTER TABLE user_integrations ADD COLUMN IF NOT EXISTS google_channel_id text;
+ALTER TABLE user_integrations ADD COLUMN IF NOT EXISTS google_channel_resource_id text;
+ALTER TABLE user_integrations ADD COLUMN IF NOT EXISTS google_channel_token text;
+ALTER TABLE user_integrations ADD COLUMN IF NOT EXISTS google_channel_expires_at timestamp with time zone;
+CREATE INDEX IF NOT EXISTS user_integrations_google_channel_id_idx ON user_integrations (google_channel_id);
+ALTER TABLE events ADD COLUMN IF NOT EXISTS recurrence text;
+ALTER TABLE events ADD COLUMN IF NOT EXISTS recurrence_exceptions jsonb;
+ALTER TABLE events ADD COLUMN IF NOT EXISTS recurrence_end timestamp with time zone;
+ALTER TABLE events ADD COLUMN IF NOT EXISTS recurrence_timezone text;
+-- Keyset pagination of /calendar/events orders by (start_time, id) per user
+CREATE INDEX IF NOT EXISTS events_user_start_id_idx ON events (user_id, start_time, id);
+ALTER TABLE user_integrations ADD COLUMN IF NOT EXISTS ics_feed_token text;
+CREATE UNIQUE INDEX IF NOT EXISTS user_integrations_ics_feed_token_idx ON user_integrations (ics_feed_token);
+-- Syllabus raw text is stored zlib-compressed and base64-encoded; raw_text
+-- only holds rows saved before that
+ALTER TABLE syllabi ADD COLUMN IF NOT EXISTS raw_text_compressed text;
@@ -0,0 +1,29 @@
+"""
+Local stand-in for Google's push-notification sender.
+
+Posts a notification to a running backend exactly as Google would, so the
+webhook -> debounced pull path can be exercised without a public URL.
+
+Usage:
+    python scripts/send_watch_notification.py <channel_id> <channel_token> [state] [url]
+"""
+import sys
+import httpx
+
+def send(channel_id: str, channel_token: str, state: str = "exists", url: str = "http://localhost:8000/calendar/webhook"):
+    headers = {
+        "X-Goog-Channel-ID": channel_id,
+        "X-Goog-Channel-Token": channel_token,
+        "X-Goog-Resource-State": state,
+        "X-Goog-Resource-ID": "local-stand-in",
+        "X-Goog-Message-Number": "1",
+    }
+    response = httpx.post(url, headers=headers)
+    print(f"{response.status_code} {response.text}")
+    return response
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    send(*sys.argv[1:5])
@@ -0,0 +1,318 @@
+"""
+In-process stand-ins for Supabase and Google Calendar, shared by the tests and
+the offline benchmarks.
+
+InMemoryDB implements the subset of the supabase-py query builder the app uses
+(select/eq/gte/lte/lt/ilike/is_/in_/or_/order/limit/insert/update/delete) and
+counts every execute() as one round trip. Writes to events are logged to
+event_changes the way the schema's trigger does. FakeGoogle counts API calls.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+from app.db_local import CHANGE_RETENTION_DAYS, SYNC_COLUMNS
+import copy
+import itertools
+import re
+import threading
+
+def _coerce(value):
+    """Compares timestamps as datetimes and everything else as-is."""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return value
+    return value
+
+def _compare(op: str, actual, expected) -> bool:
+    if op == "is":
+        return actual is None if expected in (None, "null") else actual == expected
+    if op == "in":
+        return actual in expected
+    if op in ("ilike", "like"):
+        if actual is None:
+            return False
+        pattern = "^" + re.escape(expected).replace("%", ".*") + "$"
+        return re.match(pattern, str(actual), re.IGNORECASE if op == "ilike" else 0) is not None
+    if actual is None:
+        return op == "neq" and expected is not None
+    a, b = _coerce(actual), _coerce(expected)
+    try:
+        return {
+            "eq": lambda: a == b,
+            "neq": lambda: a != b,
+            "gt": lambda: a > b,
+            "gte": lambda: a >= b,
+            "lt": lambda: a < b,
+            "lte": lambda: a <= b,
+        }[op]()
+    except TypeError:
+        return False
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, current = [], 0, ""
+    for ch in text:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+def parse_logic_tree(text: str) -> Callable[[dict], bool]:
+    """Compiles a PostgREST or()/and() filter body into a row predicate."""
+    text = text.strip()
+    for group, combine in (("and(", all), ("or(", any)):
+        if text.startswith(group) and text.endswith(")"):
+            children = [parse_logic_tree(c) for c in _split_top_level(text[len(group):-1])]
+            return lambda row, children=children, combine=combine: combine(c(row) for c in children)
+
+    column, rest = text.split(".", 1)
+    negate = rest.startswith("not.")
+    if negate:
+        rest = rest[4:]
+    op, value = rest.split(".", 1)
+    if op == "in":
+        value = [v.strip('"') for v in value.strip("()").split(",")]
+    predicate = lambda row: _compare(op, row.get(column), value)
+    return (lambda row: not predicate(row)) if negate else predicate
+
+class Result:
+    def __init__(self, data):
+        self.data = data
+        self.count = len(data)
+
+class Query:
+    def __init__(self, db: "InMemoryDB", table: str):
+        self.db = db
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.payload = None
+        self.on_conflict = None
+        self.filters: List[Callable[[dict], bool]] = []
+        self.orderings = []
+        self.row_limit = None
+
+    # Actions
+    def select(self, columns: str = "*", **kwargs):
+        self.action, self.columns = "select", columns
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.action, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict: str = None, **kwargs):
+        self.action, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload, **kwargs):
+        self.action, self.payload = "update", payload
+        return self
+
+    def delete(self, **kwargs):
+        self.action = "delete"
+        return self
+
+    # Filters
+    def _filter(self, op, column, value):
+        self.filters.append(lambda row: _compare(op, row.get(column), value))
+        return self
+
+    def eq(self, column, value): return self._filter("eq", column, value)
+    def neq(self, column, value): return self._filter("neq", column, value)
+    def gt(self, column, value): return self._filter("gt", column, value)
+    def gte(self, column, value): return self._filter("gte", column, value)
+    def lt(self, column, value): return self._filter("lt", column, value)
+    def lte(self, column, value): return self._filter("lte", column, value)
+    def ilike(self, column, value): return self._filter("ilike", column, value)
+    def is_(self, column, value): return self._filter("is", column, value)
+    def in_(self, column, values): return self._filter("in", column, list(values))
+
+    def or_(self, filters: str, **kwargs):
+        self.filters.append(parse_logic_tree(f"or({filters})"))
+        return self
+
+    def order(self, column: str, desc: bool = False, **kwargs):
+        self.orderings.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs):
+        self.row_limit = size
+        return self
+
+    def execute(self) -> Result:
+        return self.db._execute(self)
+
+class InMemoryDB:
+    """A dict-of-lists database that speaks the supabase-py query builder."""
+    def __init__(self, tables: Optional[Dict[str, List[dict]]] = None):
+        self.tables: Dict[str, List[dict]] = copy.deepcopy(tables or {})
+        self.round_trips = 0
+        self._ids = itertools.count(1)
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> Query:
+        return Query(self, name)
+
+    def _matches(self, query: Query, row: dict) -> bool:
+        return all(f(row) for f in query.filters)
+
+    def _project(self, row: dict, columns: str) -> dict:
+        if columns.strip() == "*":
+            return copy.deepcopy(row)
+        return {c.strip(): copy.deepcopy(row.get(c.strip())) for c in columns.split(",")}
+
+    def _record_changes(self, table: str, op: str, rows: List[dict]):
+        """Mirrors the record_event_changes and prune_event_changes triggers in schema.sql."""
+        if table != "events":
+            return
+        log = self.tables.setdefault("event_changes", [])
+        now = datetime.now(timezone.utc)
+        cutoff = now - timedelta(days=CHANGE_RETENTION_DAYS)
+        for row in rows:
+            if row.get("user_id") is None:
+                continue
+            # Appended in time order: the first entry is the oldest
+            if log and _coerce(log[0]["changed_at"]) < cutoff:
+                self.tables["event_changes"] = log = [
+                    entry for entry in log
+                    if entry["user_id"] != row["user_id"] or _coerce(entry["changed_at"]) >= cutoff
+                ]
+            log.append({
+                "seq": next(self._seq),
+                "user_id": row["user_id"],
+                "event_id": row["id"],
+                "op": op,
+                "changed_at": now.isoformat(),
+            })
+
+    def _execute(self, query: Query) -> Result:
+        with self._lock:
+            self.round_trips += 1
+            rows = self.tables.setdefault(query.table, [])
+
+            if query.action == "select":
+                found = [r for r in rows if self._matches(query, r)]
+                for column, desc in reversed(query.orderings):
+                    found.sort(key=lambda r: (r.get(column) is None, _coerce(r.get(column))), reverse=desc)
+                if query.row_limit is not None:
+                    found = found[:query.row_limit]
+                return Result([self._project(r, query.columns) for r in found])
+
+            if query.action in ("insert", "upsert"):
+                payload = query.payload if isinstance(query.payload, list) else [query.payload]
+                written = []
+                keys = [k.strip() for k in (query.on_conflict or "id").split(",")]
+                for item in payload:
+                    item = copy.deepcopy(item)
+                    existing = None
+                    if query.action == "upsert":
+                        existing = next((r for r in rows if all(r.get(k) == item.get(k) for k in keys)), None)
+                    if existing is not None:
+                        existing.update(item)
+                        written.append(copy.deepcopy(existing))
+                        continue
+                    item.setdefault("id", f"{query.table}-{next(self._ids)}")
+                    rows.append(item)
+                    written.append(copy.deepcopy(item))
+                self._record_changes(query.table, "upsert", written)
+                return Result(written)
+
+            if query.action == "update":
+                updated, visible = [], []
+                for r in rows:
+                    if self._matches(query, r):
+                        before = {k: v for k, v in r.items() if k not in SYNC_COLUMNS}
+                        r.update(copy.deepcopy(query.payload))
+                        updated.append(copy.deepcopy(r))
+                        if {k: v for k, v in r.items() if k not in SYNC_COLUMNS} != before:
+                            visible.append(updated[-1])
+                self._record_changes(query.table, "upsert", visible)
+                return Result(updated)
+
+            if query.action == "delete":
+                deleted = [r for r in rows if self._matches(query, r)]
+                self.tables[query.table] = [r for r in rows if not self._matches(query, r)]
+                self._record_changes(query.table, "delete", deleted)
+                return Result(deleted)
+
+        raise ValueError(f"Unsupported action {query.action}")
+
+class _Request:
+    def __init__(self, google: "FakeGoogle", name: str, response: Any):
+        self.google = google
+        self.name = name
+        self.response = response
+
+    def execute(self, **kwargs):
+        self.google.count(self.name)
+        return self.response
+
+class _Resource:
+    def __init__(self, google: "FakeGoogle", name: str, responses: Dict[str, Any]):
+        self.google = google
+        self.name = name
+        self.responses = responses
+
+    def __getattr__(self, method):
+        return lambda *args, **kwargs: _Request(self.google, f"{self.name}.{method}", self.responses.get(method, {}))
+
+class FakeGoogle:
+    """
+    Stands in for GoogleCalendarService. Every API call it would make is
+    counted; pushes write google_event_id back through `db` like the real one.
+    """
+    def __init__(self, db: InMemoryDB, busy: List[dict] = None):
+        self.db = db
+        self.calendar_id = "canvascal-calendar"
+        self.calls: Dict[str, int] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.service = self
+        self._busy = busy or []
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + n
+
+    # googleapiclient-style resources used directly by services
+    def events(self):
+        return _Resource(self, "events", {"list": {"items": []}})
+
+    def calendarList(self):
+        return _Resource(self, "calendarList", {"list": {"items": [{"id": self.calendar_id}, {"id": "primary"}]}})
+
+    def freebusy(self):
+        return _Resource(self, "freebusy", {"query": {"calendars": {"primary": {"busy": self._busy}}}})
+
+    # GoogleCalendarService surface used by the agent
+    def sync_events(self, events: List[dict]) -> int:
+        for event in events:
+            if event.get("google_event_id"):
+                self.count("events.patch")
+                continue
+            self.count("events.insert")
+            google_id = f"gcal-{next(self._ids)}"
+            self.db.table("events").update({"google_event_id": google_id}).eq("id", event["id"]).execute()
+        return len(events)
+
+    def delete_event(self, google_event_id: str):
+        self.count("events.delete")
+        return True
+
+    def delete_events(self, google_event_ids: List[str]):
+        self.count("events.delete", len(google_event_ids))
+        return list(google_event_ids), []
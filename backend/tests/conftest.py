@@ -0,0 +1,68 @@
+"""
+Shared test data and fixtures. Test modules import the helpers directly
+(`from conftest import event`); the fixtures are picked up by name.
+"""
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+import pytest
+import sys
+import threading
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+# The month `rows` falls in
+START = datetime(2026, 3, 1, tzinfo=timezone.utc)
+END = datetime(2026, 4, 1, tzinfo=timezone.utc)
+
+def event(n: int, day: int = 1, hour: int = 9, **extra) -> dict:
+    """Events row n of user123: one hour from `hour`:00 UTC on `day` March 2026."""
+    row = {
+        "id": f"00000000-0000-0000-0000-{n:012d}",
+        "user_id": "user123",
+        "summary": f"Event {n}",
+        "start_time": f"2026-03-{day:02d}T{hour:02d}:00:00+00:00",
+        "end_time": f"2026-03-{day:02d}T{hour + 1:02d}:00:00+00:00",
+        "event_type": "assignment",
+        "recurrence": None,
+    }
+    row.update(extra)
+    return row
+
+def make_service(db=None):
+    """A GoogleCalendarService for user123 built without running __init__ (no creds / network)."""
+    from app.services.google_calendar import GoogleCalendarService
+    service = GoogleCalendarService.__new__(GoogleCalendarService)
+    service.user_id = "user123"
+    service.calendar_id = "cal_123"
+    service.db = MagicMock() if db is None else db
+    service.service = MagicMock()
+    service.creds = MagicMock()
+    service._local = threading.local()
+    return service
+
+@pytest.fixture
+def rows():
+    """A March of user123 events: singles, a weekly series, and another user's event."""
+    return [
+        event(1, 3, description="x" * 500),
+        event(2, 5, description="x" * 500),
+        # Same start as event 2: the id breaks the tie
+        event(3, 5, description="x" * 500),
+        # Offset input: 12 March 17:00 UTC
+        event(4, 12, start_time="2026-03-12T09:00:00-08:00", end_time="2026-03-12T10:00:00-08:00"),
+        event(5, 20),
+        event(6, 2, 17, summary="Study block", event_type="study",
+              recurrence="RRULE:FREQ=WEEKLY;COUNT=3", recurrence_end="2026-03-16T18:00:00+00:00"),
+        event(7, 4, user_id="someone_else"),
+    ]
+
+@pytest.fixture
+def signed_in():
+    """Requests are authenticated as user123."""
+    from app.main import app
+    from app.core.security import get_current_user
+    user = type("User", (), {"id": "user123"})()
+    with patch.dict(app.dependency_overrides, {get_current_user: lambda: user}):
+        yield user
@@ -0,0 +1,158 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+from google.genai import types
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services import agent
+
+def function_call_response(name, args):
+    call = types.FunctionCall(name=name, args=args)
+    response = MagicMock()
+    response.function_calls = [call]
+    response.candidates[0].content = types.Content(role="model", parts=[types.Part(function_call=call)])
+    return response
+
+def text_response(text):
+    response = MagicMock()
+    response.function_calls = None
+    response.text = text
+    return response
+
+class FakeClient:
+    """Replays canned model responses and records what it was sent."""
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+        self.aio = MagicMock()
+        self.aio.models.generate_content = self.generate_content
+
+    async def generate_content(self, model, contents, config):
+        self.requests.append(list(contents))
+        return self.responses.pop(0)
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.table.return_value.select.return_value.eq.return_value.or_.return_value.execute.return_value.data = []
+    with patch('app.services.agent.get_db', return_value=db), \
+         patch('app.services.agent_context.get_db', return_value=db), \
+         patch.object(agent.settings, 'GEMINI_API_KEY', 'test-key'), \
+         patch.object(agent.tracer, 'sink_path', ''):
+        yield db
+
+def test_runs_tool_calls_then_answers(mock_db):
+    client = FakeClient([
+        function_call_response("get_transit_time", {"origin": "Science Hill", "destination": "Cowell"}),
+        text_response("About 10 minutes."),
+    ])
+    with patch('app.services.agent.get_client', return_value=client):
+        reply = asyncio.run(agent.chat_with_agent("How long to Cowell?", user_id="user123"))
+
+    assert reply == "About 10 minutes."
+    tool_turn = client.requests[1][-1]
+    assert tool_turn.parts[0].function_response.name == "get_transit_time"
+    assert "result" in tool_turn.parts[0].function_response.response
+
+def test_slow_tool_times_out_without_failing_turn(mock_db):
+    async def get_transit_time(origin: str, destination: str):
+        await asyncio.sleep(1)
+
+    client = FakeClient([
+        function_call_response("get_transit_time", {"origin": "a", "destination": "b"}),
+        text_response("I couldn't check that."),
+    ])
+    with patch('app.services.agent.get_client', return_value=client), \
+         patch('app.services.agent.build_agent_tools', return_value=[get_transit_time]), \
+         patch.object(agent.settings, 'AGENT_TOOL_TIMEOUT_SECONDS', 0.01):
+        reply = asyncio.run(agent.chat_with_agent("How long?", user_id="user123"))
+
+    assert reply == "I couldn't check that."
+    response = client.requests[1][-1].parts[0].function_response.response
+    assert response == {"error": "get_transit_time timed out"}
+
+def test_turn_timeout(mock_db):
+    class SlowClient(FakeClient):
+        async def generate_content(self, model, contents, config):
+            await asyncio.sleep(1)
+
+    with patch('app.services.agent.get_client', return_value=SlowClient([])), \
+         patch.object(agent.settings, 'AGENT_TURN_TIMEOUT_SECONDS', 0.01):
+        reply = asyncio.run(agent.chat_with_agent("Hi", user_id="user123"))
+
+    assert "too long" in reply
+
+def test_slow_history_summary_counts_against_the_turn(mock_db):
+    async def slow_compact(user_id, history, client):
+        await asyncio.sleep(1)
+
+    with patch('app.services.agent.get_client', return_value=FakeClient([])), \
+         patch.object(agent.history_manager, 'compact', slow_compact), \
+         patch.object(agent.settings, 'AGENT_TURN_TIMEOUT_SECONDS', 0.01):
+        reply = asyncio.run(agent.chat_with_agent("Hi", user_id="user123"))
+        events = collect(agent.stream_chat_with_agent("Hi", user_id="user123"))
+
+    assert "too long" in reply
+    assert [event for event, _ in events] == ["error"]
+
+class FakeStreamClient:
+    """Replays canned streams of chunks, one stream per model call."""
+    def __init__(self, streams):
+        self.streams = list(streams)
+        self.aio = MagicMock()
+        self.aio.models.generate_content_stream = self.generate_content_stream
+
+    async def generate_content_stream(self, model, contents, config):
+        chunks = self.streams.pop(0)
+        async def iterate():
+            for chunk in chunks:
+                yield chunk
+        return iterate()
+
+def chunk(*parts):
+    return types.GenerateContentResponse(candidates=[types.Candidate(content=types.Content(role="model", parts=list(parts)))])
+
+def collect(stream):
+    async def run():
+        return [item async for item in stream]
+    return asyncio.run(run())
+
+def test_stream_emits_tokens_tools_and_mutations(mock_db):
+    mock_db.table.return_value.insert.return_value.execute.return_value.data = [{"id": "evt1", "summary": "Study"}]
+    client = FakeStreamClient([
+        [chunk(types.Part(function_call=types.FunctionCall(name="add_calendar_event", args={
+            "summary": "Study", "start_time": "2026-01-05T10:00:00Z", "end_time": "2026-01-05T11:00:00Z"
+        })))],
+        [chunk(types.Part(text="Added ")), chunk(types.Part(text="it."))],
+    ])
+    with patch('app.services.agent.get_client', return_value=client), \
+         patch('app.services.agent._run_in_background'):
+        events = collect(agent.stream_chat_with_agent("Add study time", user_id="user123"))
+
+    names = [event for event, _ in events]
+    assert names == ["tool_start", "tool_end", "token", "token", "done"]
+    assert events[1][1] == {"name": "add_calendar_event", "ok": True}
+    done = events[-1][1]
+    assert done["response"] == "Added it."
+    assert done["mutations"] == [{"action": "created", "events": [{"id": "evt1", "summary": "Study"}]}]
+
+def test_stream_endpoint_speaks_sse(mock_db):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.core.security import get_current_user
+
+    class MockUser:
+        id = "user123"
+
+    client = FakeStreamClient([[chunk(types.Part(text="Hello"))]])
+    with patch.dict(app.dependency_overrides, {get_current_user: lambda: MockUser()}), \
+         patch('app.services.agent.get_client', return_value=client):
+        response = TestClient(app).post("/agent/chat/stream", json={"message": "Hi"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert 'event: token\ndata: {"text": "Hello"}' in response.text
+    assert "event: done" in response.text
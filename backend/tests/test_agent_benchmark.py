@@ -0,0 +1,39 @@
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.agent_bench import run_corpus, compare, load_baseline
+from testing.fakes import InMemoryDB
+
+def test_agent_corpus_does_not_regress():
+    results = run_corpus()
+    baseline = load_baseline()
+
+    assert set(results) == set(baseline)
+    # Latency is left to the CLI; counts are deterministic and gate here
+    assert compare(results, baseline, check_latency=False) == []
+
+def test_compare_flags_count_regressions():
+    baseline = {"chat": {"tool_calls": 2, "db_round_trips": 3, "google_calls": 1, "p50_latency_ms": 10.0}}
+    worse = {"chat": {"tool_calls": 2, "db_round_trips": 5, "google_calls": 1, "p50_latency_ms": 40.0}}
+
+    assert compare(worse, baseline) == [
+        "chat: db_round_trips 3 -> 5",
+        "chat: p50 latency 10.0ms -> 40.0ms",
+    ]
+
+def test_in_memory_db_query_subset():
+    db = InMemoryDB({"events": [
+        {"id": "a", "user_id": "u", "summary": "Lecture", "start_time": "2026-01-05T10:00:00+00:00", "recurrence": None},
+        {"id": "b", "user_id": "u", "summary": "Lab", "start_time": "2026-01-06T10:00:00Z", "recurrence": "RRULE:FREQ=DAILY"},
+        {"id": "c", "user_id": "other", "summary": "Lecture", "start_time": "2026-01-05T10:00:00Z", "recurrence": None},
+    ]})
+
+    rows = db.table("events").select("id").eq("user_id", "u").or_(
+        "and(recurrence.is.null,start_time.gte.2026-01-05T00:00:00Z),and(recurrence.not.is.null,summary.ilike.%lab%)"
+    ).order("start_time", desc=True).execute().data
+
+    assert rows == [{"id": "b"}, {"id": "a"}]
+    assert db.round_trips == 1
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.agent_context import AgentContextCache
+from app.services.invalidation import events_changed, on_events_changed
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    query = db.table.return_value.select.return_value.eq.return_value.or_.return_value
+    query.execute.return_value.data = [{
+        "id": "evt1",
+        "summary": "Lecture",
+        "start_time": "2026-01-05T10:00:00+00:00",
+        "end_time": "2026-01-05T11:00:00+00:00",
+        "event_type": "class",
+    }]
+    with patch('app.services.agent_context.get_db', return_value=db):
+        yield query
+
+def test_turns_in_same_bucket_share_one_query(mock_db):
+    cache = AgentContextCache()
+
+    texts = [asyncio.run(cache.get("user123")) for _ in range(5)]
+
+    assert texts[0] == "- [evt1] Monday, Jan 05 @ 10:00 AM: Lecture (class)"
+    assert len(set(texts)) == 1
+    assert mock_db.execute.call_count == 1
+
+def test_events_changed_drops_snapshot(mock_db):
+    cache = AgentContextCache()
+    on_events_changed(cache.invalidate)
+
+    asyncio.run(cache.get("user123"))
+    events_changed("user123")
+    asyncio.run(cache.get("user123"))
+    asyncio.run(cache.get("other_user"))
+    asyncio.run(cache.get("other_user"))
+
+    assert mock_db.execute.call_count == 3
+
+def test_new_bucket_rebuilds(mock_db):
+    cache = AgentContextCache(bucket_seconds=900)
+
+    with patch.object(cache, '_bucket', side_effect=[1, 1, 2]):
+        for _ in range(3):
+            asyncio.run(cache.get("user123"))
+
+    assert mock_db.execute.call_count == 2
+
+def test_errors_are_not_cached(mock_db):
+    cache = AgentContextCache()
+    mock_db.execute.side_effect = [Exception("db down"), MagicMock(data=[])]
+
+    assert asyncio.run(cache.get("user123")).startswith("Error loading context")
+    assert asyncio.run(cache.get("user123")) == "No upcoming events found."
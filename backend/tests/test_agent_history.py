@@ -0,0 +1,98 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from google.genai import types
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.agent_history import HistoryManager, content_tokens
+
+def turn(role, text):
+    return types.Content(role=role, parts=[types.Part(text=text)])
+
+def conversation(n_pairs, start=0, words=40):
+    turns = []
+    for i in range(start, start + n_pairs):
+        turns.append(turn("user", f"question {i} " + "word " * words))
+        turns.append(turn("model", f"answer {i} " + "word " * words))
+    return turns
+
+class SummaryClient:
+    def __init__(self):
+        self.prompts = []
+        self.aio = MagicMock()
+        self.aio.models.generate_content = self.generate_content
+
+    async def generate_content(self, model, contents, config):
+        self.prompts.append(contents)
+        response = MagicMock()
+        response.text = f"summary #{len(self.prompts)}"
+        return response
+
+def compact(manager, turns, client, user_id="user123"):
+    return asyncio.run(manager.compact(user_id, turns, client))
+
+def test_short_history_passes_through():
+    client = SummaryClient()
+    turns = conversation(2)
+
+    summary, recent = compact(HistoryManager(budget=1000), turns, client)
+
+    assert summary is None
+    assert recent == turns
+    assert client.prompts == []
+
+def test_long_history_folds_into_summary_under_budget():
+    client = SummaryClient()
+    manager = HistoryManager(budget=400)
+    turns = conversation(20)
+
+    summary, recent = compact(manager, turns, client)
+
+    assert summary == "summary #1"
+    assert sum(content_tokens(t) for t in recent) <= 200
+    assert recent[0].role == "user"
+    assert recent[-1] is turns[-1]
+    assert "question 0" in client.prompts[0]
+
+def test_summary_is_reused_until_new_turns_overflow():
+    client = SummaryClient()
+    manager = HistoryManager(budget=400)
+    turns = conversation(20)
+    compact(manager, turns, client)
+
+    # One more exchange still fits after the cached summary: no model call
+    turns += conversation(1, start=20)
+    summary, _ = compact(manager, turns, client)
+    assert summary == "summary #1"
+    assert len(client.prompts) == 1
+
+    # Enough new conversation to overflow again: rolls the old summary forward
+    turns += conversation(10, start=21)
+    summary, recent = compact(manager, turns, client)
+    assert summary == "summary #2"
+    assert "summary #1" in client.prompts[1]
+    assert "question 0" not in client.prompts[1]
+    assert sum(content_tokens(t) for t in recent) <= 200
+
+def test_edited_conversation_is_resummarized():
+    client = SummaryClient()
+    manager = HistoryManager(budget=400)
+    compact(manager, conversation(20), client)
+
+    other = [turn("user", "a different chat " + "word " * 40)] + conversation(20)[1:]
+    compact(manager, other, client)
+
+    assert "summary #1" not in client.prompts[1]
+
+def test_summarizer_failure_falls_back_to_truncation():
+    client = SummaryClient()
+    client.aio.models.generate_content = MagicMock(side_effect=Exception("quota"))
+    manager = HistoryManager(budget=400, summary_tokens=50)
+
+    summary, _ = compact(manager, conversation(20), client)
+
+    assert len(summary) <= 200
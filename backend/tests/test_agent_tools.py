@@ -1,55 +1,65 @@
+import asyncio
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from testing.fakes import InMemoryDB
 from app.services import agent
 
-@patch('app.db.get_db')
-def test_add_calendar_event(mock_get_db):
-    mock_client = MagicMock()
-    mock_get_db.return_value = mock_client
-    
-    # Mock the insert return
-    mock_client.table.return_value.insert.return_value.execute.return_value.data = [{
-        "id": "1", "summary": "Test Event", "start_time": "2026-01-01T10:00:00+00:00", "end_time": "2026-01-01T11:00:00+00:00"
-    }]
-    
-    result = agent.add_calendar_event(
+@pytest.fixture
+def db():
+    db = InMemoryDB({"events": [
+        {"id": "1", "user_id": "user123", "summary": "Existing Event", "google_event_id": "g1", "recurrence": None,
+         "start_time": "2026-01-01T15:00:00+00:00", "end_time": "2026-01-01T16:00:00+00:00", "event_type": "study"},
+        {"id": "2", "user_id": "someone_else", "summary": "Private", "google_event_id": None, "recurrence": None,
+         "start_time": "2026-01-01T15:00:00+00:00", "end_time": "2026-01-01T16:00:00+00:00", "event_type": "study"},
+    ]})
+    # No Google pushes or deletes from tool side effects
+    with patch("app.services.agent.get_db", return_value=db), \
+         patch("app.services.agent._run_in_background") as background:
+        db.background = background
+        yield db
+
+def tools(mutations=None):
+    return {tool.__name__: tool for tool in agent.build_agent_tools("user123", mutations)}
+
+def test_add_calendar_event(db):
+    mutations = []
+    result = asyncio.run(tools(mutations)["add_calendar_event"](
         summary="Test Event",
         start_time="2026-01-01T10:00:00Z",
         end_time="2026-01-01T11:00:00Z",
         description="Desc",
         location="Loc",
-        event_type="study",
+        event_type=None,
         repeat_frequency=None,
         repeat_count=None,
         repeat_until=None
-    )
-    
+    ))
+
     assert result["status"] == "success"
     assert result["events_created"] == 1
-    assert result["first_event"]["summary"] == "Test Event"
-
-@patch('app.db.get_db')
-def test_get_calendar_events(mock_get_db):
-    mock_client = MagicMock()
-    mock_get_db.return_value = mock_client
-    
-    mock_query = MagicMock()
-    mock_client.table.return_value.select.return_value.gte.return_value.lte.return_value = mock_query
-    mock_query.execute.return_value.data = [{"id": "1", "summary": "Existing Event"}]
-    
-    events = agent.get_calendar_events("2026-01-01T00:00:00Z", "2026-01-02T00:00:00Z")
-    
-    assert len(events) == 1
-    assert events[0]["summary"] == "Existing Event"
-
-@patch('app.db.get_db')
-def test_delete_calendar_event(mock_get_db):
-    mock_client = MagicMock()
-    mock_get_db.return_value = mock_client
-    
-    mock_client.table.return_value.delete.return_value.eq.return_value.execute.return_value.data = [{"id": "1"}]
-    
-    result = agent.delete_calendar_event("1")
-    
+    created = [r for r in db.tables["events"] if r["summary"] == "Test Event"]
+    assert created[0]["user_id"] == "user123" and created[0]["event_type"] == "study"
+    assert mutations[0]["action"] == "created"
+    db.background.assert_called_once()
+
+def test_get_calendar_events(db):
+    events = asyncio.run(tools()["get_calendar_events"]("2026-01-01T00:00:00Z", "2026-01-02T00:00:00Z"))
+
+    # Only the caller's events, whatever the model asks for
+    assert [e["summary"] for e in events] == ["Existing Event"]
+
+def test_delete_calendar_event(db):
+    delete = tools()["delete_calendar_event"]
+
+    result = asyncio.run(delete("1"))
     assert result["status"] == "success"
-    assert result["deleted"][0]["id"] == "1"
+    assert result["deleted_count"] == 1 and result["google_deleted"] is True
+    assert [r["id"] for r in db.tables["events"]] == ["2"]
+
+    assert "error" in asyncio.run(delete("2"))
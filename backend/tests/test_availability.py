@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.availability import AvailabilityService
+from app.services.invalidation import events_changed, on_events_changed
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.table.return_value.select.return_value.eq.return_value.lte.return_value.or_.return_value.execute.return_value.data = [{
+        "id": "evt1",
+        "summary": "Lecture",
+        "start_time": "2026-01-05T10:00:00+00:00",
+        "end_time": "2026-01-05T11:00:00+00:00",
+    }]
+    with patch('app.services.availability.get_db', return_value=db):
+        yield db
+
+@pytest.fixture
+def mock_google():
+    service = MagicMock()
+    service.calendar_id = "canvascal_cal"
+    service.service.calendarList().list.return_value.execute.return_value = {
+        "items": [{"id": "canvascal_cal"}, {"id": "primary@example.com"}]
+    }
+    service.service.freebusy().query.return_value.execute.return_value = {
+        "calendars": {
+            "primary@example.com": {"busy": [{"start": "2026-01-06T15:00:00Z", "end": "2026-01-06T16:00:00Z"}]}
+        }
+    }
+    with patch('app.services.google_calendar.get_calendar_service', return_value=service):
+        yield service
+
+def test_merges_db_and_freebusy(mock_db, mock_google):
+    availability = AvailabilityService()
+
+    lecture = availability.check("user123", "2026-01-05T10:30:00Z", "2026-01-05T10:45:00Z")
+    meeting = availability.check("user123", "2026-01-06T15:30:00Z", "2026-01-06T17:00:00Z")
+    free = availability.check("user123", "2026-01-07T09:00:00Z", "2026-01-07T10:00:00Z")
+
+    assert lecture["available"] is False
+    assert lecture["conflicts"][0]["summary"] == "Lecture"
+    assert meeting["available"] is False
+    assert meeting["conflicts"][0]["source"] == "primary@example.com"
+    assert free["available"] is True
+
+    # Our own calendar is excluded from FreeBusy since `events` already covers it
+    body = mock_google.service.freebusy().query.call_args.kwargs["body"]
+    assert body["items"] == [{"id": "primary@example.com"}]
+
+def test_checks_in_window_share_one_upstream_call(mock_db, mock_google):
+    availability = AvailabilityService()
+
+    for hour in range(8, 18):
+        availability.check("user123", f"2026-01-05T{hour:02d}:00:00Z", f"2026-01-05T{hour:02d}:30:00Z")
+
+    assert mock_google.service.freebusy().query.return_value.execute.call_count == 1
+    assert mock_db.table.return_value.select.call_count == 1
+
+def test_events_changed_invalidates_window(mock_db, mock_google):
+    availability = AvailabilityService()
+    on_events_changed(availability.invalidate)
+
+    availability.check("user123", "2026-01-05T08:00:00Z", "2026-01-05T09:00:00Z")
+    events_changed("user123")
+    availability.check("user123", "2026-01-05T08:00:00Z", "2026-01-05T09:00:00Z")
+
+    assert mock_db.table.return_value.select.call_count == 2
+
+def test_falls_back_to_db_when_google_unavailable(mock_db):
+    availability = AvailabilityService()
+    with patch('app.services.google_calendar.get_calendar_service', side_effect=Exception("User has not connected Google Calendar")):
+        result = availability.check("user123", "2026-01-05T10:00:00Z", "2026-01-05T12:00:00Z")
+
+    assert result["available"] is False
+    assert result["conflicting_events"] == 1
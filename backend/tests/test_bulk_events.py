@@ -0,0 +1,144 @@
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+import pytest
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import event as events_row
+from testing.fakes import InMemoryDB, FakeGoogle
+from app.main import app
+from app.services import bulk_events
+
+client = TestClient(app)
+
+def event(n: int, **extra):
+    """Bulk item n at 17:00 UTC on 2 March; the API fills in the caller's user_id."""
+    item = events_row(n, 2, 17, **extra)
+    del item["user_id"]
+    return item
+
+@pytest.fixture
+def db():
+    return InMemoryDB({"events": [
+        dict(event(1, course_id="CSE 101", google_event_id="g1"), user_id="user123"),
+        dict(event(2, course_id="CSE 101"), user_id="user123"),
+        dict(event(3), user_id="someone_else"),
+        dict(event(4, recurrence="RRULE:FREQ=WEEKLY;COUNT=3", google_event_id="g4"), user_id="user123"),
+    ]})
+
+@pytest.fixture
+def api(db, signed_in):
+    google = FakeGoogle(db)
+    with patch("app.api.calendar.get_db", return_value=db), \
+         patch("app.api.calendar.get_calendar_service", return_value=google) as get_service:
+        yield google, get_service
+
+def test_create_in_chunks_with_per_item_results(db, api):
+    google, get_service = api
+    items = [event(10 + n) for n in range(5)] + [{"summary": "no times", "event_type": "study"}]
+
+    with patch.object(bulk_events, "BULK_CHUNK_SIZE", 2):
+        before = db.round_trips
+        response = client.post("/calendar/events/bulk", json=items).json()
+        inserts = db.round_trips - before
+
+    statuses = [r["status"] for r in response["data"]["results"]]
+    assert statuses == ["created"] * 5 + ["error"]
+    assert "start_time" in response["data"]["results"][5]["error"]
+    assert response["data"]["counts"] == {"created": 5, "error": 1}
+    # 3 chunked inserts, then the single Google push writes back 5 ids
+    assert inserts == 3 + 5
+    get_service.assert_called_once_with("user123")
+    assert google.calls == {"events.insert": 5}
+    assert all(r["user_id"] == "user123" for r in db.tables["events"] if r["id"].endswith(("10", "11")))
+
+def test_failed_chunk_is_retried_row_by_row(db, api):
+    items = [event(20), event(21)]
+    real_execute = db._execute
+    def flaky(query):
+        if query.action == "insert" and isinstance(query.payload, list):
+            raise Exception("duplicate key")
+        return real_execute(query)
+
+    with patch.object(db, "_execute", side_effect=flaky):
+        response = client.post("/calendar/events/bulk", json=items).json()
+
+    assert [r["status"] for r in response["data"]["results"]] == ["created", "created"]
+
+def test_update_merges_partial_changes(db, api):
+    google, _ = api
+    response = client.patch("/calendar/events/bulk", json=[
+        {"id": event(1)["id"], "start_time": "2026-03-09T17:00:00Z", "end_time": "2026-03-09T18:00:00Z"},
+        {"id": event(2)["id"], "verified": True},
+        {"id": event(3)["id"], "verified": True},
+        {"id": event(4)["id"] + "_20260309T170000Z", "summary": "Moved"},
+        {"id": event(4)["id"], "recurrence": "RRULE:FREQ=WEEKLY;COUNT=2"},
+    ]).json()
+
+    assert [r["status"] for r in response["data"]["results"]] == ["updated", "updated", "not_found", "error", "updated"]
+    rows = {r["id"]: r for r in db.tables["events"]}
+    assert rows[event(1)["id"]]["start_time"].startswith("2026-03-09T17:00:00")
+    assert rows[event(1)["id"]]["summary"] == "Event 1"
+    assert rows[event(2)["id"]]["verified"] is True
+    assert "verified" not in rows[event(3)["id"]]
+    assert rows[event(4)["id"]]["recurrence_end"].startswith("2026-03-09T18:00:00")
+    assert google.calls == {"events.patch": 2, "events.insert": 1}
+
+def test_update_writes_only_changed_columns(db, api):
+    # Real rows carry every column, unlinked ones as null
+    for row in db.tables["events"]:
+        row.setdefault("google_event_id", None)
+    real_execute = db._execute
+    reads = []
+    def concurrent_push(query):
+        result = real_execute(query)
+        if query.action == "select" and not reads:
+            reads.append(query)
+            # A Google push links the row between our read and our write
+            for row in db.tables["events"]:
+                if row["id"] == event(2)["id"]:
+                    row["google_event_id"] = "g2"
+        return result
+
+    with patch.object(db, "_execute", side_effect=concurrent_push):
+        response = client.patch("/calendar/events/bulk", json=[
+            {"id": event(1)["id"], "verified": True},
+            {"id": event(2)["id"], "verified": True},
+            {"id": event(4)["id"], "summary": "Renamed"},
+        ]).json()
+
+    assert [r["status"] for r in response["data"]["results"]] == ["updated"] * 3
+    rows = {r["id"]: r for r in db.tables["events"]}
+    assert rows[event(2)["id"]]["google_event_id"] == "g2"
+    assert rows[event(2)["id"]]["verified"] is True and rows[event(4)["id"]]["summary"] == "Renamed"
+
+def test_delete_rows_and_occurrences_with_one_google_push(db, api):
+    google, get_service = api
+    occurrence = event(4)["id"] + "_20260309T170000Z"
+
+    response = client.post("/calendar/events/bulk/delete", json={"ids": [event(1)["id"], event(2)["id"], event(3)["id"], occurrence]}).json()
+
+    assert [r["status"] for r in response["data"]["results"]] == ["deleted", "deleted", "not_found", "deleted"]
+    remaining = {r["id"]: r for r in db.tables["events"]}
+    assert set(remaining) == {event(3)["id"], event(4)["id"]}
+    assert remaining[event(4)["id"]]["recurrence_exceptions"] == ["2026-03-09T17:00:00+00:00"]
+    get_service.assert_called_once()
+    assert google.calls == {"events.delete": 1, "events.patch": 1}
+
+def test_unsynced_delete_still_invalidates_caches(db, api):
+    google, get_service = api
+    with patch("app.api.calendar.events_changed") as changed:
+        response = client.post("/calendar/events/bulk/delete", json={"ids": [event(2)["id"]]}).json()
+
+    assert [r["status"] for r in response["data"]["results"]] == ["deleted"]
+    changed.assert_called_once_with("user123")
+    # Nothing linked to Google: no push scheduled
+    get_service.assert_not_called()
+
+def test_too_many_items_rejected(api):
+    with patch.object(bulk_events, "MAX_BULK_ITEMS", 2):
+        response = client.post("/calendar/events/bulk/delete", json={"ids": ["a", "b", "c"]})
+    assert response.status_code == 413
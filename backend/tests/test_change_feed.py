@@ -0,0 +1,120 @@
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+import pytest
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import START, END, event
+from testing.fakes import InMemoryDB
+from app.main import app
+from app.services.change_feed import changes_since, current_version, etag_matches
+
+client = TestClient(app)
+
+@pytest.fixture
+def db():
+    db = InMemoryDB()
+    db.table("events").insert([event(1, 3, id="a"), event(2, 5, id="b"), event(3, 7, id="c")]).execute()
+    db.table("events").insert(event(4, 4, id="x", user_id="someone_else")).execute()
+    return db
+
+def test_version_moves_on_every_write(db):
+    before, _ = current_version(db, "user123")
+
+    db.table("events").update({"summary": "Renamed"}).eq("id", "a").execute()
+
+    after, changed_at = current_version(db, "user123")
+    assert after > before
+    assert changed_at is not None
+    assert current_version(db, "nobody") == (0, None)
+
+def test_changes_since_returns_only_the_delta(db):
+    since, _ = current_version(db, "user123")
+
+    db.table("events").update({"summary": "Renamed"}).eq("id", "a").execute()
+    db.table("events").update({"summary": "Renamed again"}).eq("id", "a").execute()
+    db.table("events").delete().eq("id", "b").execute()
+    # Moved out of the range the client holds
+    db.table("events").update({"start_time": "2026-05-01T09:00:00+00:00", "end_time": "2026-05-01T10:00:00+00:00"}).eq("id", "c").execute()
+    db.table("events").insert(event(5, 9, id="d")).execute()
+
+    changes = changes_since(db, "user123", since, START, END)
+
+    assert [e["id"] for e in changes["upserted"]] == ["a", "d"]
+    assert changes["upserted"][0]["summary"] == "Renamed again"
+    assert changes["removed"] == ["b", "c"]
+    assert changes["cursor"] == str(current_version(db, "user123")[0])
+    assert changes_since(db, "user123", int(changes["cursor"]), START, END)["upserted"] == []
+
+def test_changed_series_replaces_its_occurrences(db):
+    since, _ = current_version(db, "user123")
+    db.table("events").insert(event(6, 2, id="s", recurrence="RRULE:FREQ=WEEKLY;COUNT=2")).execute()
+
+    changes = changes_since(db, "user123", since, START, END)
+
+    assert changes["removed"] == ["s"]
+    assert [e["recurring_event_id"] for e in changes["upserted"]] == ["s", "s"]
+
+def test_changes_are_paged_and_reset_when_ahead(db):
+    changes = changes_since(db, "user123", 0, START, END, limit=2)
+    assert changes["has_more"] is True
+    rest = changes_since(db, "user123", int(changes["cursor"]), START, END, limit=2)
+    assert rest["has_more"] is False
+    assert [e["id"] for e in changes["upserted"] + rest["upserted"]] == ["a", "b", "c"]
+
+    assert changes_since(db, "user123", 999, START, END)["reset"] is True
+
+def test_weak_etag_comparison():
+    assert etag_matches('W/"3-abc"', 'W/"3-abc"')
+    assert etag_matches('"3-abc", W/"4-abc"', 'W/"3-abc"')
+    assert etag_matches("*", 'W/"3-abc"')
+    assert not etag_matches('W/"2-abc"', 'W/"3-abc"')
+    assert not etag_matches(None, 'W/"3-abc"')
+
+def test_events_endpoint_answers_304_until_something_changes(db, signed_in):
+    params = {"start": START.isoformat(), "end": END.isoformat()}
+    with patch("app.api.calendar.get_db", return_value=db):
+        first = client.get("/calendar/events", params=params)
+        tag = first.headers["etag"]
+        reads_before = db.round_trips
+        cached = client.get("/calendar/events", params=params, headers={"If-None-Match": tag})
+        reads_for_304 = db.round_trips - reads_before
+        other_range = client.get("/calendar/events", params={"start": START.isoformat()}, headers={"If-None-Match": tag})
+
+        db.table("events").delete().eq("id", "a").execute()
+        changed = client.get("/calendar/events", params=params, headers={"If-None-Match": tag})
+        feed = client.get("/calendar/changes", params={**params, "since": 0, "compact": "true"}).json()
+
+    assert first.status_code == 200
+    assert "last-modified" in first.headers
+    assert cached.status_code == 304
+    # Only the version lookup, no event read
+    assert reads_for_304 == 1
+    assert other_range.status_code == 200
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != tag
+    assert len(changed.json()["data"]) == 2
+    assert feed["data"]["removed"] == ["a"]
+    assert "description" not in feed["data"]["upserted"][0]
+
+def test_google_write_back_is_not_a_change(db):
+    before, _ = current_version(db, "user123")
+
+    db.table("events").update({"google_event_id": "g1", "google_sync_hash": {"summary": "x"}}).eq("id", "a").execute()
+
+    assert current_version(db, "user123")[0] == before
+
+def test_pruned_cursor_resets(db):
+    since, _ = current_version(db, "user123")
+    for entry in db.tables["event_changes"]:
+        entry["changed_at"] = "2025-01-01T00:00:00+00:00"
+
+    # The next write prunes the user's entries past retention, the cursor's included
+    db.table("events").update({"summary": "Renamed"}).eq("id", "a").execute()
+
+    assert changes_since(db, "user123", since, START, END)["reset"] is True
+    latest, _ = current_version(db, "user123")
+    assert changes_since(db, "user123", latest, START, END)["reset"] is False
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from datetime import datetime, timedelta, timezone
+import sys
+import os
+import threading
+import time
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.credentials import CredentialManager
+
+def integration_row(expires_in: timedelta = None):
+    row = {"google_access_token": "enc_access", "google_refresh_token": "enc_refresh", "google_token_expires_at": None}
+    if expires_in is not None:
+        row["google_token_expires_at"] = (datetime.now(timezone.utc) + expires_in).isoformat()
+    return row
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    with patch('app.services.credentials.get_service_db', return_value=db):
+        yield db
+
+@pytest.fixture
+def mock_crypto():
+    with patch('app.services.credentials.crypto') as mock:
+        mock.decrypt.side_effect = lambda x: f"decrypted_{x}"
+        mock.encrypt.side_effect = lambda x: f"encrypted_{x}"
+        yield mock
+
+@pytest.fixture
+def refresh_calls():
+    """Patches Credentials.refresh with a slow fake that counts network calls."""
+    calls = []
+
+    def fake_refresh(creds, request):
+        calls.append(threading.get_ident())
+        time.sleep(0.05)
+        creds.token = f"fresh_{len(calls)}"
+        creds.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=1)
+
+    with patch('app.services.credentials.Credentials.refresh', autospec=True, side_effect=fake_refresh):
+        yield calls
+
+def test_valid_token_is_cached(mock_db, mock_crypto, refresh_calls):
+    mock_db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [integration_row(timedelta(hours=1))]
+    manager = CredentialManager()
+
+    first = manager.get_credentials("user123")
+    second = manager.get_credentials("user123")
+
+    assert first is second
+    assert first.token == "decrypted_enc_access"
+    assert mock_db.table.return_value.select.call_count == 1
+    assert refresh_calls == []
+
+def test_concurrent_refreshes_are_coalesced(mock_db, mock_crypto, refresh_calls):
+    mock_db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [integration_row(timedelta(minutes=-5))]
+    manager = CredentialManager()
+    results = []
+
+    def worker():
+        results.append(manager.get_credentials("user123").token)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(refresh_calls) == 1
+    assert results == ["fresh_1"] * 8
+    # one write-back for the single refresh
+    update = mock_db.table.return_value.update
+    assert update.call_count == 1
+    assert update.call_args[0][0]["google_access_token"] == "encrypted_fresh_1"
+
+def test_proactive_refresh_runs_in_background(mock_db, mock_crypto, refresh_calls):
+    mock_db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [integration_row(timedelta(minutes=5))]
+    manager = CredentialManager(refresh_margin=timedelta(minutes=1), proactive_window=timedelta(minutes=10))
+
+    creds = manager.get_credentials("user123")
+    # still-valid token is returned without waiting for the refresh
+    assert creds.token == "decrypted_enc_access"
+
+    # Wait for the refresh worker to finish before counting its calls
+    manager._executor.shutdown(wait=True)
+    assert len(refresh_calls) == 1
+    assert manager.get_credentials("user123").token == "fresh_1"
+
+def test_invalidate_reloads_from_db(mock_db, mock_crypto, refresh_calls):
+    mock_db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [integration_row(timedelta(hours=1))]
+    manager = CredentialManager()
+
+    manager.get_credentials("user123")
+    manager.invalidate("user123")
+    manager.get_credentials("user123")
+
+    assert mock_db.table.return_value.select.call_count == 2
+
+def test_missing_integration_raises(mock_db, mock_crypto):
+    mock_db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = []
+    manager = CredentialManager()
+
+    with pytest.raises(Exception) as excinfo:
+        manager.get_credentials("user123")
+    assert "User has not connected Google Calendar" in str(excinfo.value)
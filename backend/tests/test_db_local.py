@@ -0,0 +1,123 @@
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+import pytest
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import START, END, event
+from testing.fakes import InMemoryDB
+from app.main import app
+from app.db_local import LocalClient, LocalAuth, LocalDBError
+from app.services.change_feed import changes_since, current_version
+from app.services.event_listing import fetch_page
+
+client = TestClient(app)
+
+@pytest.fixture
+def db(tmp_path, rows):
+    db = LocalClient(str(tmp_path / "local.db"))
+    db.table("events").insert(rows).execute()
+    return db
+
+def test_rows_come_back_typed_like_postgrest(db):
+    row = db.table("events").insert({
+        "summary": "Quiz", "start_time": "2026-03-09T17:00:00Z", "end_time": "2026-03-09T18:00:00Z",
+        "event_type": "exam", "user_id": "user123", "weight": 5, "recurrence_exceptions": ["2026-03-16T17:00:00Z"],
+    }).execute().data[0]
+
+    assert row["id"] and row["created_at"]
+    assert row["verified"] is False and row["source"] == "manual"
+    assert row["weight"] == 5.0
+    assert row["recurrence_exceptions"] == ["2026-03-16T17:00:00Z"]
+    assert datetime.fromisoformat(row["start_time"]) == datetime(2026, 3, 9, 17, tzinfo=timezone.utc)
+
+    projected = db.table("events").select("id", "summary").eq("verified", False).ilike("summary", "%QUIZ%").execute().data
+    assert projected == [{"id": row["id"], "summary": "Quiz"}]
+    with pytest.raises(LocalDBError):
+        db.table("events").select("nope").execute()
+    with pytest.raises(LocalDBError):
+        db.table("events").insert({"start_time": "2026-03-09T17:00:00Z"}).execute()
+
+def test_listing_matches_the_in_memory_reference(db, rows):
+    # fetch_page drives or_() with nested and()/or() keyset filters
+    reference = InMemoryDB({"events": rows})
+
+    def walk(database):
+        ids, cursor = [], None
+        while True:
+            events, cursor = fetch_page(database, "user123", START, END, 2, cursor, None)
+            ids.extend(e["id"] for e in events)
+            if cursor is None:
+                return ids
+
+    assert walk(db) == walk(reference)
+    assert len(walk(db)) == 8
+
+def test_listing_query_uses_the_keyset_index(db):
+    from app.db_local import connect
+    query = db.table("events").select("*").eq("user_id", "user123").is_("recurrence", "null") \
+        .gt("start_time", "2026-03-05T00:00:00Z").order("start_time").order("id").limit(50)
+    sql, params = query._select_sql()
+    plan = " ".join(r["detail"] for r in connect(db.path).execute(f"EXPLAIN QUERY PLAN {sql}", params))
+    assert "events_user_id_start_time_id_idx" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_upsert_updates_in_place_and_triggers_feed_changes(db):
+    since = current_version(db, "user123")[0]
+
+    db.table("events").upsert({**event(1, 3), "summary": "Renamed"}, on_conflict="id").execute()
+    db.table("events").update({"user_id": "someone_else"}).eq("id", event(2, 5)["id"]).execute()
+    db.table("events").delete().eq("id", event(3, 5)["id"]).execute()
+
+    assert db.table("events").select("summary").eq("id", event(1, 3)["id"]).execute().data == [{"summary": "Renamed"}]
+    changes = changes_since(db, "user123", since, START, END, None)
+    assert [e["id"] for e in changes["upserted"]] == [event(1, 3)["id"]]
+    assert sorted(changes["removed"]) == [event(2, 5)["id"], event(3, 5)["id"]]
+
+    first = db.table("syllabi").upsert({"user_id": "user123", "course_name": "CSE 101", "raw_text": "v1"},
+                                       on_conflict="user_id,course_name").execute().data[0]
+    second = db.table("syllabi").upsert({"user_id": "user123", "course_name": "CSE 101", "raw_text": "v2"},
+                                        on_conflict="user_id,course_name").execute().data[0]
+    assert second["id"] == first["id"] and second["raw_text"] == "v2"
+    assert second["updated_at"] >= first["updated_at"]
+
+def test_feed_skips_write_backs_and_prunes_old_entries(db):
+    from app.db_local import connect
+    since = current_version(db, "user123")[0]
+
+    db.table("events").update({"google_event_id": "g1", "google_sync_hash": {"summary": "x"}}).eq("id", event(1, 3)["id"]).execute()
+    assert current_version(db, "user123")[0] == since
+
+    connect(db.path).execute("UPDATE event_changes SET changed_at = '2025-01-01T00:00:00.000000+00:00'")
+    db.table("events").update({"summary": "Renamed"}).eq("id", event(1, 3)["id"]).execute()
+
+    assert db.table("event_changes").select("event_id").eq("user_id", "user123").execute().data == [{"event_id": event(1, 3)["id"]}]
+    assert changes_since(db, "user123", since, START, END, None)["reset"] is True
+
+def test_columns_added_later_are_migrated(tmp_path):
+    import sqlite3
+    path = str(tmp_path / "old.db")
+    # A file from before syllabi.raw_text_compressed existed
+    sqlite3.connect(path).executescript("CREATE TABLE syllabi (id TEXT PRIMARY KEY, user_id TEXT, course_name TEXT NOT NULL, raw_text TEXT);")
+
+    db = LocalClient(path)
+    db.table("syllabi").insert({"user_id": "user123", "course_name": "CSE 101", "raw_text_compressed": "eJwDAAAAAAE="}).execute()
+    assert db.table("syllabi").select("raw_text_compressed").execute().data == [{"raw_text_compressed": "eJwDAAAAAAE="}]
+
+def test_app_runs_on_the_local_backend(db):
+    token = LocalAuth.issue_token("user123")
+    # Real auth: no dependency overrides left behind by other test modules
+    with patch.dict(app.dependency_overrides, clear=True), \
+         patch("app.core.security.get_db", return_value=db), \
+         patch("app.api.calendar.get_db", return_value=db):
+        ok = client.get("/calendar/events", params={"start": "2026-03-01T00:00:00Z", "end": "2026-04-01T00:00:00Z"},
+                        headers={"Authorization": f"Bearer {token}"})
+        forged = client.get("/calendar/events", headers={"Authorization": f"Bearer {token[:-2]}xx"})
+
+    assert ok.status_code == 200
+    assert len(ok.json()["data"]) == 8
+    assert forged.status_code == 401
@@ -0,0 +1,83 @@
+from datetime import datetime
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+import pytest
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import START, END
+from testing.fakes import InMemoryDB
+from app.main import app
+from app.services.event_listing import fetch_page, parse_fields, decode_cursor
+
+client = TestClient(app)
+
+@pytest.fixture
+def db(rows):
+    return InMemoryDB({"events": rows})
+
+def walk(db, limit, fields=None):
+    pages, cursor = [], None
+    while True:
+        events, cursor = fetch_page(db, "user123", START, END, limit, cursor, fields)
+        pages.append(events)
+        if cursor is None:
+            return pages
+
+def test_pages_cover_range_in_order_without_duplicates(db):
+    pages = walk(db, limit=2)
+
+    ids = [e["id"] for page in pages for e in page]
+    assert len(ids) == len(set(ids)) == 8
+    starts = [e["start_time"] for page in pages for e in page]
+    assert [datetime.fromisoformat(s) for s in starts] == sorted(datetime.fromisoformat(s) for s in starts)
+    assert all(len(page) <= 2 for page in pages)
+    # Occurrences of the series are merged in by start time
+    assert ids[0].startswith("00000000-0000-0000-0000-000000000006_")
+    assert ids[2] == "00000000-0000-0000-0000-000000000002"
+    assert ids[3] == "00000000-0000-0000-0000-000000000003"
+
+def test_page_reads_at_most_limit_plus_one_rows(db):
+    with patch.object(db, "_project", wraps=db._project) as projected:
+        fetch_page(db, "user123", START, END, 2)
+    # 3 single events (limit + 1) and 1 series master
+    assert projected.call_count == 4
+
+def test_compact_projection(db):
+    events, _ = fetch_page(db, "user123", START, END, 10, fields=parse_fields(None, compact=True))
+
+    assert "description" not in events[0]
+    assert events[0]["recurring_event_id"] == "00000000-0000-0000-0000-000000000006"
+    assert set(events[1]) == set(parse_fields(None, compact=True))
+
+def test_unknown_field_rejected():
+    with pytest.raises(ValueError):
+        parse_fields("summary,password")
+
+def test_bad_cursor_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+def test_endpoint_pagination_and_fields(db, signed_in):
+    with patch("app.api.calendar.get_db", return_value=db):
+        first = client.get("/calendar/events", params={
+            "start": START.isoformat(), "end": END.isoformat(), "limit": 3, "fields": "id,summary"
+        }).json()
+        second = client.get("/calendar/events", params={
+            "start": START.isoformat(), "end": END.isoformat(), "limit": 3, "fields": "id,summary",
+            "cursor": first["data"]["next_cursor"]
+        }).json()
+        legacy = client.get("/calendar/events", params={
+            "start": START.isoformat(), "end": END.isoformat(), "compact": "true"
+        }).json()
+        bad = client.get("/calendar/events", params={"fields": "nope"})
+
+    assert first["data"]["events"][0] == {"id": "00000000-0000-0000-0000-000000000006_20260302T170000Z", "summary": "Study block"}
+    assert len(first["data"]["events"]) == 3
+    assert second["data"]["events"][0]["id"] == "00000000-0000-0000-0000-000000000003"
+    assert len(legacy["data"]) == 8
+    assert "description" not in legacy["data"][0]
+    assert bad.status_code == 400
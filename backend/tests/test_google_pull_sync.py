@@ -0,0 +1,154 @@
+import pytest
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import make_service
+from googleapiclient.errors import HttpError
+from app.services.google_calendar import CANVASCAL_ID_PROPERTY
+
+def make_pull_service(db_rows, sync_token="tok_1"):
+    """A service whose DB holds `db_rows` and the stored sync token."""
+    service = make_service()
+
+    # select("google_sync_token") and select("id, google_event_id") share the chain
+    def select(columns):
+        query = MagicMock()
+        if columns == "google_sync_token":
+            query.eq.return_value.execute.return_value.data = [{"google_sync_token": sync_token}]
+        else:
+            query.eq.return_value.execute.return_value.data = db_rows
+        return query
+    service.db.table.return_value.select.side_effect = select
+    return service
+
+def test_pull_uses_sync_token_and_applies_delta():
+    service = make_pull_service([
+        {"id": "row1", "google_event_id": "g1"},
+        {"id": "row2", "google_event_id": "g2"},
+    ])
+    service.service.events().list.return_value.execute.return_value = {
+        "items": [
+            {
+                "id": "g1",
+                "status": "confirmed",
+                "summary": "Moved Lecture",
+                "start": {"dateTime": "2026-01-01T12:00:00Z"},
+                "end": {"dateTime": "2026-01-01T13:00:00Z"},
+            },
+            {"id": "g2", "status": "cancelled"},
+            {
+                "id": "g_new",
+                "status": "confirmed",
+                "summary": "Dentist",
+                "start": {"date": "2026-01-05"},
+                "end": {"date": "2026-01-06"},
+            },
+        ],
+        "nextSyncToken": "tok_2",
+    }
+
+    stats = service.pull_changes()
+
+    assert stats == {"updated": 1, "deleted": 1, "created": 1, "full_resync": False}
+    _, kwargs = service.service.events().list.call_args
+    assert kwargs["syncToken"] == "tok_1"
+    assert kwargs["showDeleted"] is True
+
+    service.db.table.return_value.update.assert_any_call({"google_sync_token": "tok_2"})
+    service.db.table.return_value.delete.return_value.in_.assert_called_with("id", ["row2"])
+    inserted = service.db.table.return_value.insert.call_args[0][0]
+    assert inserted[0]["google_event_id"] == "g_new"
+    assert inserted[0]["start_time"] == "2026-01-05T00:00:00+00:00"
+    assert inserted[0]["source"] == "google"
+
+def test_pull_maps_by_extended_property():
+    service = make_pull_service([{"id": "row1", "google_event_id": None}])
+    service.service.events().list.return_value.execute.return_value = {
+        "items": [{
+            "id": "g9",
+            "summary": "Linked",
+            "start": {"dateTime": "2026-01-01T12:00:00Z"},
+            "end": {"dateTime": "2026-01-01T13:00:00Z"},
+            "extendedProperties": {"private": {CANVASCAL_ID_PROPERTY: "row1"}},
+        }],
+        "nextSyncToken": "tok_2",
+    }
+
+    stats = service.pull_changes()
+
+    assert stats["updated"] == 1
+    assert stats["created"] == 0
+    update_args = [c.args[0] for c in service.db.table.return_value.update.call_args_list]
+    assert any(a.get("google_event_id") == "g9" for a in update_args)
+
+def test_pulled_series_master_is_not_pushed_back():
+    master = {"id": "row1", "google_event_id": "g1", "recurrence": "RRULE:FREQ=WEEKLY;COUNT=10",
+              "recurrence_exceptions": ["2026-01-08T12:00:00Z"], "recurrence_timezone": "America/Los_Angeles"}
+    service = make_pull_service([master])
+    service.service.events().list.return_value.execute.return_value = {
+        "items": [{
+            "id": "g1",
+            "summary": "Renamed in Google",
+            "start": {"dateTime": "2026-01-01T04:00:00-08:00", "timeZone": "America/Los_Angeles"},
+            "end": {"dateTime": "2026-01-01T05:00:00-08:00", "timeZone": "America/Los_Angeles"},
+            "recurrence": ["RRULE:FREQ=WEEKLY;COUNT=10"],
+        }],
+        "nextSyncToken": "tok_2",
+    }
+
+    service.pull_changes()
+
+    update = next(c.args[0] for c in service.db.table.return_value.update.call_args_list if "google_sync_hash" in c.args[0])
+    # The stored row after the pull hashes the same as the pull recorded
+    assert service.push_event({**master, **update}) == "skipped"
+    service.service.events().patch.assert_not_called()
+
+def test_pull_full_resync_when_token_expired():
+    service = make_pull_service([])
+    gone = HttpError(MagicMock(status=410), b"Sync token is no longer valid")
+    full_listing = {"items": [], "nextSyncToken": "fresh"}
+    service.service.events().list.return_value.execute.side_effect = [gone, full_listing]
+
+    stats = service.pull_changes()
+
+    assert stats["full_resync"] is True
+    last_call = service.service.events().list.call_args
+    assert "syncToken" not in last_call.kwargs
+    service.db.table.return_value.update.assert_any_call({"google_sync_token": None})
+    service.db.table.return_value.update.assert_any_call({"google_sync_token": "fresh"})
+
+def test_pull_reraises_other_http_errors():
+    service = make_pull_service([])
+    service.service.events().list.return_value.execute.side_effect = HttpError(MagicMock(status=500), b"boom")
+
+    with pytest.raises(HttpError):
+        service.pull_changes()
+
+def test_delete_events_batches_and_tolerates_missing():
+    service = make_pull_service([])
+    batches = []
+
+    def new_batch(callback):
+        batch = MagicMock()
+        added = []
+        batch.add.side_effect = lambda request, request_id: added.append(request_id)
+
+        def execute(http=None):
+            for request_id in added:
+                error = HttpError(MagicMock(status=404), b"gone") if request_id == "g_missing" else None
+                callback(request_id, None, error)
+        batch.execute.side_effect = execute
+        batches.append(added)
+        return batch
+    service.service.new_batch_http_request.side_effect = new_batch
+
+    ids = [f"g{i}" for i in range(60)] + ["g_missing"]
+    deleted, failed = service.delete_events(ids)
+
+    assert [len(b) for b in batches] == [50, 11]
+    assert len(deleted) == 61
+    assert failed == []
@@ -0,0 +1,142 @@
+import pytest
+from unittest.mock import MagicMock
+import json
+import sys
+import time
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import make_service
+from googleapiclient.errors import HttpError
+from app.services.google_calendar import payload_hashes
+from app.services.sync_executor import SyncExecutor, TokenBucket, is_retryable
+
+BASE_EVENT = {
+    "id": "db_uuid",
+    "summary": "Study Block",
+    "description": "",
+    "location": "Library",
+    "start_time": "2026-01-01T10:00:00Z",
+    "end_time": "2026-01-01T11:00:00Z",
+}
+
+def test_create_stores_payload_hashes():
+    service = make_service()
+    service.service.events().insert.return_value.execute.return_value = {"id": "g_1"}
+
+    count = service.sync_events([dict(BASE_EVENT, google_event_id=None)])
+
+    assert count == 1
+    update = service.db.table.return_value.update.call_args[0][0]
+    assert update["google_event_id"] == "g_1"
+    assert update["google_sync_hash"] == payload_hashes(service._build_gcal_event(BASE_EVENT))
+
+def test_unchanged_event_is_skipped():
+    service = make_service()
+    hashes = payload_hashes(service._build_gcal_event(BASE_EVENT))
+    event = dict(BASE_EVENT, google_event_id="g_1", google_sync_hash=hashes)
+
+    count = service.sync_events([event])
+
+    assert count == 0
+    service.service.events().patch.assert_not_called()
+    service.service.events().update.assert_not_called()
+    service.db.table.assert_not_called()
+
+def test_changed_event_sends_minimal_patch():
+    service = make_service()
+    hashes = payload_hashes(service._build_gcal_event(BASE_EVENT))
+    event = dict(BASE_EVENT, summary="Renamed", google_event_id="g_1", google_sync_hash=hashes)
+
+    count = service.sync_events([event])
+
+    assert count == 1
+    _, kwargs = service.service.events().patch.call_args
+    assert kwargs["eventId"] == "g_1"
+    assert kwargs["body"] == {"summary": "Renamed"}
+
+def test_equivalent_timestamps_hash_equal():
+    service = make_service()
+    a = service._build_gcal_event(BASE_EVENT)
+    b = service._build_gcal_event(dict(BASE_EVENT, start_time="2026-01-01T10:00:00+00:00", end_time="2026-01-01T03:00:00-08:00"))
+    assert payload_hashes(a) == payload_hashes(b)
+
+def rate_limited(status=403, reason="userRateLimitExceeded"):
+    content = json.dumps({"error": {"code": status, "message": "Rate Limit Exceeded", "errors": [{"reason": reason}]}})
+    return HttpError(MagicMock(status=status, reason="Rate Limit Exceeded"), content.encode())
+
+def test_is_retryable_classifies_quota_errors():
+    assert is_retryable(rate_limited(403, "rateLimitExceeded"))
+    assert is_retryable(rate_limited(403, "userRateLimitExceeded"))
+    assert is_retryable(rate_limited(429, "rateLimitExceeded"))
+    assert not is_retryable(rate_limited(403, "forbidden"))
+    assert not is_retryable(ValueError("bad time"))
+
+def test_executor_retries_rate_limited_pushes():
+    executor = SyncExecutor(max_workers=4, user_rate=1000, user_burst=100, max_attempts=3, base_delay=0.0, max_delay=0.0)
+    service = make_service()
+    service.push_event = MagicMock(side_effect=[rate_limited(), "created", "created"])
+
+    report = executor.run([(service, [{"id": "a"}, {"id": "b"}])])["user123"]
+
+    assert report.synced == 2
+    assert report.retried == 1
+    assert report.failed == 0
+
+def test_executor_reports_failures_after_max_attempts():
+    executor = SyncExecutor(max_workers=2, user_rate=1000, user_burst=100, max_attempts=2, base_delay=0.0, max_delay=0.0)
+    service = make_service()
+    errors = {"a": rate_limited(429), "b": ValueError("bad")}
+
+    def push_event(event):
+        raise errors[event["id"]]
+    service.push_event = push_event
+
+    report = executor.run([(service, [{"id": "a"}, {"id": "b"}])])["user123"]
+
+    assert report.retried == 1
+    assert report.failed == 2
+    assert sorted(report.failed_ids) == ["a", "b"]
+
+def test_executor_reports_per_user():
+    executor = SyncExecutor(max_workers=4, user_rate=1000, user_burst=100, base_delay=0.0)
+    first, second = make_service(), make_service()
+    second.user_id = "user456"
+    first.push_event = MagicMock(return_value="created")
+    second.push_event = MagicMock(return_value="skipped")
+
+    reports = executor.run([(first, [{"id": "a"}, {"id": "b"}]), (second, [{"id": "c"}])])
+
+    assert reports["user123"].synced == 2
+    assert reports["user456"].skipped == 1
+
+def test_throttled_user_does_not_hold_the_workers():
+    executor = SyncExecutor(max_workers=2, user_rate=5, user_burst=1, base_delay=0.0)
+    busy, other = make_service(), make_service()
+    other.user_id = "user456"
+    # Only user123 is short of quota
+    executor._buckets["user456"] = TokenBucket(rate=1000, capacity=100)
+    busy.push_event = MagicMock(return_value="created")
+    finished = []
+    def record(event):
+        finished.append(time.monotonic())
+        return "created"
+    other.push_event = record
+
+    start = time.monotonic()
+    reports = executor.run([(busy, [{"id": f"a{n}"} for n in range(4)]), (other, [{"id": f"b{n}"} for n in range(3)])])
+
+    assert reports["user123"].synced == 4 and reports["user456"].synced == 3
+    # user123 waits ~0.6s for tokens; user456 still goes straight through
+    assert finished[-1] - start < 0.1
+
+def test_token_bucket_paces_after_burst():
+    bucket = TokenBucket(rate=50, capacity=2)
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    # two tokens come from the burst, the next two wait ~20ms each
+    assert time.monotonic() - start >= 0.035
+    assert bucket.try_acquire() > 0
@@ -0,0 +1,123 @@
+from fastapi.testclient import TestClient
+from unittest.mock import MagicMock, patch
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.main import app
+from app.services.google_watch import PullDebouncer, start_watch
+
+client = TestClient(app)
+
+def notify(channel_id="chan_1", token="secret", state="exists"):
+    """Stand-in for Google's notification sender."""
+    return client.post("/calendar/webhook", headers={
+        "X-Goog-Channel-ID": channel_id,
+        "X-Goog-Channel-Token": token,
+        "X-Goog-Resource-State": state,
+    })
+
+@pytest.fixture
+def mock_db():
+    db = MagicMock()
+    db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+        {"user_id": "user123", "google_channel_token": "secret"}
+    ]
+    with patch("app.services.google_watch.get_service_db", return_value=db):
+        yield db
+
+@pytest.fixture
+def debouncer():
+    with patch("app.services.google_watch.pull_debouncer") as mock:
+        yield mock
+
+def test_webhook_schedules_pull_for_channel_owner(mock_db, debouncer):
+    response = notify()
+
+    assert response.status_code == 200
+    mock_db.table.return_value.select.return_value.eq.assert_called_with("google_channel_id", "chan_1")
+    debouncer.schedule.assert_called_once_with("user123")
+
+def test_webhook_ignores_sync_handshake(mock_db, debouncer):
+    response = notify(state="sync")
+
+    assert response.status_code == 200
+    debouncer.schedule.assert_not_called()
+
+def test_webhook_rejects_bad_token(mock_db, debouncer):
+    response = notify(token="forged")
+
+    assert response.status_code == 404
+    debouncer.schedule.assert_not_called()
+
+def test_webhook_rejects_unknown_channel(mock_db, debouncer):
+    mock_db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = []
+
+    assert notify(channel_id="nope").status_code == 404
+
+def test_debouncer_coalesces_bursts():
+    calls = []
+    done = threading.Event()
+
+    def pull(user_id):
+        calls.append(user_id)
+        done.set()
+
+    debouncer = PullDebouncer(delay=0.05, pull=pull)
+    for _ in range(10):
+        debouncer.schedule("user123")
+    debouncer.schedule("user456")
+
+    done.wait(1)
+    time.sleep(0.1)
+    assert sorted(calls) == ["user123", "user456"]
+
+def test_debouncer_repulls_after_change_during_pull():
+    calls = []
+    release = threading.Event()
+
+    def pull(user_id):
+        calls.append(user_id)
+        if len(calls) == 1:
+            release.wait(1)
+
+    debouncer = PullDebouncer(delay=0.01, pull=pull)
+    debouncer.schedule("user123")
+    time.sleep(0.05)
+    # Edits land while the first pull is still running
+    debouncer.schedule("user123")
+    debouncer.schedule("user123")
+    release.set()
+    time.sleep(0.1)
+
+    assert calls == ["user123", "user123"]
+
+@patch("app.services.google_watch.settings")
+def test_start_watch_replaces_previous_channel(mock_settings, mock_db):
+    mock_settings.GOOGLE_WEBHOOK_URL = "https://example.com/calendar/webhook"
+    mock_settings.GOOGLE_WATCH_TTL_SECONDS = 3600
+    mock_db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+        {"google_channel_id": "old_chan", "google_channel_resource_id": "old_res"}
+    ]
+    service = MagicMock()
+    service.calendar_id = "cal_123"
+    service._get_sync_token.return_value = "tok"
+    service.service.events().watch.return_value.execute.return_value = {
+        "id": "new_chan", "resourceId": "res_1", "expiration": "1767225600000"
+    }
+
+    with patch("app.services.google_calendar.get_calendar_service", return_value=service):
+        result = start_watch("user123")
+
+    assert result["channel_id"] == "new_chan"
+    body = service.service.events().watch.call_args.kwargs["body"]
+    assert body["address"] == "https://example.com/calendar/webhook"
+    stored = mock_db.table.return_value.update.call_args[0][0]
+    assert stored["google_channel_id"] == "new_chan"
+    assert stored["google_channel_token"] == body["token"]
+    service.service.channels().stop.assert_called_with(body={"id": "old_chan", "resourceId": "old_res"})
@@ -0,0 +1,85 @@
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+import pytest
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import event
+from testing.fakes import InMemoryDB
+from app.main import app
+from app.services import ics_feed
+from app.services.ics_feed import FeedCache, iter_feed, render_event
+
+client = TestClient(app)
+
+@pytest.fixture
+def db():
+    db = InMemoryDB({"user_integrations": [{"user_id": "user123", "ics_feed_token": "secret-token"}]})
+    db.table("events").insert([event(n, n + 1) for n in range(1, 6)]).execute()
+    db.table("events").insert(event(9, 1, user_id="someone_else")).execute()
+    ics_feed._token_cache.clear()
+    with patch("app.api.calendar.get_service_db", return_value=db), \
+         patch("app.services.ics_feed.get_service_db", return_value=db):
+        yield db
+
+def test_render_escapes_and_folds():
+    text = render_event(event(1, 2, 17, summary="Midterm; bring pencils, eraser", description="x" * 200))
+
+    assert "SUMMARY:Midterm\\; bring pencils\\, eraser\r\n" in text
+    assert all(len(line.encode()) <= 75 for line in text.split("\r\n"))
+    assert "DTSTART:20260302T170000Z" in text
+
+def test_series_repeats_in_its_timezone():
+    text = render_event(event(1, 2, 17, recurrence="RRULE:FREQ=WEEKLY;COUNT=3", recurrence_timezone="America/Los_Angeles",
+                              recurrence_exceptions=["2026-03-09T16:00:00+00:00"]))
+
+    assert "DTSTART;TZID=America/Los_Angeles:20260302T090000" in text
+    assert "RRULE:FREQ=WEEKLY;COUNT=3" in text
+    assert "EXDATE:20260309T160000Z" in text
+
+def test_feed_streams_in_pages(db):
+    chunks = list(iter_feed(db, "user123", page_size=2))
+
+    # header, 3 pages of VEVENTs, footer
+    assert len(chunks) == 5
+    body = b"".join(chunks).decode()
+    assert body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n")
+    assert body.count("BEGIN:VEVENT") == 5
+    assert "00000000-0000-0000-0000-000000000009" not in body
+
+def test_cache_keeps_latest_version_within_budget():
+    cache = FeedCache(max_bytes=10)
+    cache.put("u1", 1, b"aaaa")
+    cache.put("u1", 2, b"bbbb")
+    cache.put("u2", 1, b"cccc")
+
+    assert cache.get("u1", 1) is None
+    assert cache.get("u1", 2) == b"bbbb"
+    cache.put("u3", 1, b"dddd")
+    # u2 was least recently used
+    assert cache.get("u2", 1) is None
+
+def test_polling_is_served_from_cache_and_304(db):
+    first = client.get("/calendar/feed/secret-token.ics")
+    reads = db.round_trips
+    again = client.get("/calendar/feed/secret-token.ics")
+    reads_from_cache = db.round_trips - reads
+    unchanged = client.get("/calendar/feed/secret-token.ics", headers={"If-None-Match": first.headers["etag"]})
+
+    db.table("events").insert(event(7, 20)).execute()
+    changed = client.get("/calendar/feed/secret-token.ics", headers={"If-None-Match": first.headers["etag"]})
+
+    assert first.status_code == 200
+    assert first.headers["content-type"].startswith("text/calendar")
+    assert again.content == first.content
+    # Version lookup only: the token is cached and the body comes from memory
+    assert reads_from_cache == 1
+    assert unchanged.status_code == 304
+    assert changed.status_code == 200
+    assert changed.text.count("BEGIN:VEVENT") == 6
+
+def test_unknown_token_is_404(db):
+    assert client.get("/calendar/feed/nope.ics").status_code == 404
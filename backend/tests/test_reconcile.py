@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import event
+from testing.fakes import InMemoryDB
+from app.services.reconcile import reconcile_user
+from app.services.google_calendar import CANVASCAL_ID_PROPERTY
+
+def tagged(google_id, row_id):
+    return {"id": google_id, "extendedProperties": {"private": {CANVASCAL_ID_PROPERTY: row_id}}}
+
+def test_reconcile_diffs_db_and_google():
+    service = MagicMock()
+    service.calendar_id = "cal_123"
+    service.service.events().list.return_value.execute.return_value = {"items": [
+        tagged("g_ok", "row_ok"),          # linked, fine
+        tagged("g_orphan", "row_deleted"), # row was deleted in the DB
+        tagged("g_relink", "row_lost"),    # row lost its google_event_id
+        tagged("g_dupe", "row_ok"),        # second copy of an already linked row
+        {"id": "g_user_made"},             # created in Google, left to pulls
+    ]}
+    service.db.table.return_value.select.return_value.eq.return_value.execute.return_value.data = [
+        {"id": "row_ok", "google_event_id": "g_ok"},
+        {"id": "row_lost", "google_event_id": None},
+        {"id": "row_stale", "google_event_id": "g_gone"},
+    ]
+    service.delete_events.return_value = (["g_orphan", "g_dupe"], [])
+
+    with patch("app.services.reconcile.get_calendar_service", return_value=service):
+        report = reconcile_user("user123")
+
+    assert report == {
+        "google_events": 5,
+        "orphans_deleted": 2,
+        "orphans_failed": 0,
+        "links_fixed": 1,
+        "stale_links_cleared": 1,
+    }
+    service.delete_events.assert_called_once_with(["g_orphan", "g_dupe"])
+    service.db.table.return_value.update.assert_any_call({"google_event_id": "g_relink", "google_sync_hash": None})
+    service.db.table.return_value.update.return_value.in_.assert_called_with("id", ["row_stale"])
+    # single paged listing
+    assert service.service.events().list.return_value.execute.call_count == 1
+
+def test_pushes_during_the_listing_are_left_alone():
+    db = InMemoryDB({"events": [
+        event(1, google_event_id="g1"),
+        # Pushed while Google is being listed; the listing misses it
+        event(2, google_event_id=None),
+    ]})
+
+    def push_meanwhile():
+        db.table("events").update({"google_event_id": "g2"}).eq("id", event(2)["id"]).execute()
+        # Created and pushed after the rows were read; the listing has it
+        db.table("events").insert(event(3, google_event_id="g3")).execute()
+        return {"items": [tagged("g1", event(1)["id"]), tagged("g3", event(3)["id"])]}
+
+    service = MagicMock()
+    service.db = db
+    service.service.events().list.return_value.execute.side_effect = push_meanwhile
+
+    with patch("app.services.reconcile.get_calendar_service", return_value=service):
+        report = reconcile_user("user123")
+
+    assert report["stale_links_cleared"] == 0 and report["orphans_deleted"] == 0
+    service.delete_events.assert_not_called()
+    rows = {r["id"]: r["google_event_id"] for r in db.tables["events"]}
+    assert rows[event(2)["id"]] == "g2" and rows[event(3)["id"]] == "g3"
@@ -0,0 +1,99 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import make_service
+from app.services import recurrence
+
+def master(**overrides):
+    row = {
+        "id": "series1",
+        "summary": "Study block",
+        "start_time": "2026-03-02T17:00:00+00:00",
+        "end_time": "2026-03-02T18:00:00+00:00",
+        "event_type": "study",
+        "recurrence": "RRULE:FREQ=WEEKLY;COUNT=4",
+        "recurrence_exceptions": None,
+        "recurrence_timezone": "America/Los_Angeles",
+    }
+    row.update(overrides)
+    return row
+
+def test_build_rrule():
+    assert recurrence.build_rrule("daily", count=100) == "RRULE:FREQ=DAILY;COUNT=100"
+    assert recurrence.build_rrule("weekly", until="2026-06-01T00:00:00-07:00") == "RRULE:FREQ=WEEKLY;UNTIL=20260601T070000Z"
+    assert recurrence.build_rrule(None) is None
+
+def test_expand_keeps_wall_clock_across_dst():
+    instances = recurrence.expand(master())
+
+    # 9am Pacific on both sides of the March 8 DST change
+    assert [i["start_time"] for i in instances] == [
+        "2026-03-02T17:00:00+00:00",
+        "2026-03-09T16:00:00+00:00",
+        "2026-03-16T16:00:00+00:00",
+        "2026-03-23T16:00:00+00:00",
+    ]
+    assert instances[1]["id"] == "series1_20260309T160000Z"
+    assert instances[1]["recurring_event_id"] == "series1"
+    assert recurrence.series_end(master()) == "2026-03-23T17:00:00+00:00"
+
+def test_expand_skips_exceptions_and_clips_to_range():
+    row = master(recurrence_exceptions=["2026-03-09T16:00:00+00:00"])
+
+    instances = recurrence.expand(row, "2026-03-05T00:00:00Z", "2026-03-20T00:00:00Z")
+
+    assert [i["id"] for i in instances] == ["series1_20260316T160000Z"]
+
+def test_open_ended_series_has_no_end():
+    assert recurrence.series_end(master(recurrence="RRULE:FREQ=DAILY")) is None
+
+def test_cancel_occurrence_adds_exdate():
+    db = MagicMock()
+    db.table.return_value.select.return_value.eq.return_value.eq.return_value.execute.return_value.data = [master()]
+    db.table.return_value.update.return_value.eq.return_value.eq.return_value.execute.return_value.data = [master()]
+
+    assert recurrence.cancel_occurrence(db, "user123", "plain-event-id") is None
+    recurrence.cancel_occurrence(db, "user123", "series1_20260309T160000Z")
+
+    update = db.table.return_value.update.call_args.args[0]
+    assert update == {"recurrence_exceptions": ["2026-03-09T16:00:00+00:00"]}
+
+def test_series_pushes_as_one_google_event():
+    service = make_service()
+    row = master(recurrence_exceptions=["2026-03-09T16:00:00+00:00"])
+
+    body = service._build_gcal_event(row)
+
+    assert body["recurrence"] == ["RRULE:FREQ=WEEKLY;COUNT=4", "EXDATE:20260309T160000Z"]
+    assert body["start"]["timeZone"] == "America/Los_Angeles"
+
+def test_agent_creates_series_with_one_insert():
+    from app.services import agent
+    db = MagicMock()
+    db.table.return_value.insert.return_value.execute.return_value.data = [master()]
+    tools = {t.__name__: t for t in agent.build_agent_tools("user123", timezone="America/Los_Angeles")}
+
+    with patch('app.services.agent.get_db', return_value=db), \
+         patch('app.services.agent._run_in_background') as background:
+        result = asyncio.run(tools["add_calendar_event"](
+            summary="Study block",
+            start_time="2026-03-02T09:00:00-08:00",
+            end_time="2026-03-02T10:00:00-08:00",
+            repeat_frequency="daily",
+            repeat_count=100,
+        ))
+
+    assert result["status"] == "success"
+    assert db.table.return_value.insert.call_count == 1
+    inserted = db.table.return_value.insert.call_args.args[0]
+    assert inserted["recurrence"] == "RRULE:FREQ=DAILY;COUNT=100"
+    assert inserted["recurrence_timezone"] == "America/Los_Angeles"
+    assert inserted["recurrence_end"].startswith("2026-06-09T17:00:00")
+    # One Google push for the whole series
+    background.assert_called_once()
@@ -0,0 +1,88 @@
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+import json
+import pytest
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.core.compression import CompressionMiddleware, negotiate
+from app.core.config import settings
+from app.core.responses import api_response
+
+BIG = [{"id": str(i), "summary": "Homework", "description": "x" * 50} for i in range(100)]
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+@app.get("/big")
+def big():
+    return api_response(True, "ok", BIG, headers={"ETag": '"v1"'})
+
+@app.get("/small")
+def small():
+    return api_response(True, "ok", [1, 2, 3])
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse(iter([b"data: " + b"x" * 2000 + b"\n\n"] * 2), media_type="text/event-stream")
+
+client = TestClient(app)
+
+def test_negotiate():
+    assert negotiate("gzip, deflate, br", ["br", "gzip"]) == "br"
+    assert negotiate("gzip;q=1.0, br;q=0", ["br", "gzip"]) == "gzip"
+    assert negotiate("identity", ["br", "gzip"]) is None
+    assert negotiate("*", ["gzip"]) == "gzip"
+    assert negotiate("", ["gzip"]) is None
+
+def test_large_json_is_gzipped():
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(json.dumps({"data": BIG})) / 5
+    assert "Accept-Encoding" in response.headers["vary"]
+    # Compressed bytes no longer match a strong tag
+    assert response.headers["etag"] == 'W/"v1"'
+    assert response.json()["data"] == BIG
+
+def test_brotli_preferred_when_installed():
+    pytest.importorskip("brotli")
+    local = FastAPI()
+    local.add_middleware(CompressionMiddleware, minimum_size=1024)
+    local.get("/big")(big)
+
+    response = TestClient(local).get("/big", headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.headers["content-encoding"] == "br"
+
+def test_small_and_streamed_bodies_pass_through():
+    small_response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    streamed = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in small_response.headers
+    assert "content-encoding" not in streamed.headers
+    assert streamed.text.count("data: ") == 2
+
+def test_fast_and_model_paths_render_the_same_envelope():
+    fast = client.get("/big", headers={"Accept-Encoding": "identity"}).json()
+    with patch.object(settings, "FAST_JSON_RESPONSES", False):
+        slow = client.get("/big", headers={"Accept-Encoding": "identity"}).json()
+
+    assert fast == slow == {"success": True, "message": "ok", "data": BIG}
+
+def test_response_benchmark_runs():
+    from benchmarks.response_bench import run
+
+    results = run(events=50, syllabi=2, runs=1)
+
+    for path in ("/calendar/events", "/syllabus/syllabus/syllabus-0"):
+        assert results[path]["items"] > 0
+        assert results[path]["bytes"]["gzip"] < results[path]["bytes"]["identity"]
+    # Metadata only: small enough to go out uncompressed
+    assert results["/syllabus/syllabus"]["items"] == 2
+    assert results["/syllabus/syllabus"]["bytes"]["identity"] < 1024
@@ -0,0 +1,127 @@
+from unittest.mock import patch
+import pytest
+import threading
+import json
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import event as events_row
+from app.core.config import settings
+from app.schemas.event import EventSchema
+from app.services import storage
+from app.db_local import connect
+from app.services.storage_sqlite import SQLiteStorage
+
+def _connect():
+    return connect(settings.LOCAL_DB_PATH)
+
+def event(n: int, day: int = 1, **extra) -> EventSchema:
+    row = events_row(n, day, 17, id=f"evt{n}", **extra)
+    del row["user_id"]
+    return EventSchema(**row)
+
+@pytest.fixture(autouse=True)
+def local_db(tmp_path):
+    with patch.object(settings, "LOCAL_DB_PATH", str(tmp_path / "local.db")):
+        yield tmp_path
+
+def test_events_round_trip_in_start_order_per_user():
+    SQLiteStorage.save_events([event(1, day=5), event(2, day=2, course_id="CSE 101")], user_id="alice")
+    SQLiteStorage.save_events([event(3, day=1)], user_id="bob")
+
+    loaded = SQLiteStorage.load_events(user_id="alice")
+    assert [e.id for e in loaded] == ["evt2", "evt1"]
+    assert loaded[0].color_hex is not None
+    assert [e.id for e in SQLiteStorage.load_events()] == ["evt3", "evt2", "evt1"]
+
+def test_update_and_delete_touch_one_row():
+    SQLiteStorage.save_events([event(1), event(2)], user_id="alice")
+
+    assert SQLiteStorage.update_event("evt1", {"summary": "Renamed", "google_event_id": "g1"}) is True
+    assert SQLiteStorage.update_event("missing", {"summary": "x"}) is False
+    row = _connect().execute("SELECT google_event_id, summary FROM events WHERE id = 'evt1'").fetchone()
+    assert row["google_event_id"] == "g1" and row["summary"] == "Renamed"
+
+    assert SQLiteStorage.delete_event("evt2") is True
+    assert SQLiteStorage.delete_event("evt2") is False
+    assert [e.id for e in SQLiteStorage.load_events("alice")] == ["evt1"]
+
+def test_lookups_use_indexes():
+    conn = _connect()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    by_user = " ".join(r["detail"] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM events WHERE user_id = ? ORDER BY start_time", ("alice",)))
+    by_google = " ".join(r["detail"] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM events WHERE google_event_id = ?", ("g1",)))
+    assert "events_user_id_start_time_id_idx" in by_user and "TEMP B-TREE" not in by_user
+    assert "events_google_event_id_idx" in by_google
+
+def test_concurrent_writers_lose_nothing():
+    SQLiteStorage.save_events([event(0)], user_id="alice")
+
+    def writer(n: int):
+        SQLiteStorage.save_events([event(100 + n * 10 + i) for i in range(10)], user_id="alice")
+        for i in range(10):
+            SQLiteStorage.update_event(f"evt{100 + n * 10 + i}", {"verified": True})
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    events = SQLiteStorage.load_events("alice")
+    assert len(events) == 1 + 8 * 10
+    # Every writer's updates landed
+    assert sum(e.verified for e in events) == 8 * 10
+
+def test_syllabus_upsert_keeps_one_row_per_course():
+    SQLiteStorage.save_syllabus("alice", "CSE 101", "v1", {"summary": "old"}, pdf_url="http://pdf")
+    SQLiteStorage.save_syllabus("alice", "CSE 101", "v2", {"summary": "new"})
+
+    syllabi = SQLiteStorage.get_syllabi("alice")
+    assert len(syllabi) == 1
+    # The list is metadata only
+    assert "raw_text" not in syllabi[0] and "ai_insights" not in syllabi[0]
+    assert syllabi[0]["pdf_url"] == "http://pdf"
+    assert SQLiteStorage.get_syllabi("bob") == []
+
+    detail = SQLiteStorage.get_syllabus("alice", syllabi[0]["id"])
+    assert detail["raw_text"] == "v2"
+    assert detail["ai_insights"] == {"summary": "new"}
+    assert SQLiteStorage.get_syllabus("bob", syllabi[0]["id"]) is None
+
+def test_syllabus_text_is_stored_compressed():
+    text = "Late work loses 10% per day. " * 500
+    SQLiteStorage.save_syllabus("alice", "CSE 101", text, {})
+    # Rows written before compression hold plain text
+    _connect().execute("INSERT INTO syllabi (id, user_id, course_name, raw_text) VALUES ('old', 'alice', 'CSE 12', 'plain')")
+
+    stored = _connect().execute("SELECT raw_text, raw_text_compressed FROM syllabi WHERE course_name = 'CSE 101'").fetchone()
+    assert stored["raw_text"] is None and len(stored["raw_text_compressed"]) < len(text) / 10
+    texts = {row["course_name"]: row["raw_text"] for row in SQLiteStorage.get_syllabus_texts("alice")}
+    assert texts == {"CSE 101": text, "CSE 12": "plain"}
+
+def test_storage_falls_back_to_sqlite_and_imports_old_json(local_db):
+    legacy = local_db / "events.json"
+    legacy.write_text(json.dumps([event(7).model_dump(mode="json")]))
+
+    with patch.object(storage, "DATA_FILE", str(legacy)), patch("app.services.storage.get_db", return_value=None), \
+         patch("app.services.storage.events_changed") as changed:
+        storage.save_events([event(8, day=9)], user_id="alice")
+        changed.assert_called_once_with("alice")
+        assert storage.update_event("evt8", {"verified": True}) is True
+        assert [e.id for e in storage.load_events()] == ["evt7", "evt8"]
+        assert storage.load_events("alice")[0].verified is True
+
+        # Imported once: the file stays, and its rows are not brought back
+        assert storage.delete_event("evt7") is True
+        assert [e.id for e in storage.load_events()] == ["evt8"]
+    assert legacy.exists()
+
+def test_legacy_file_resolves_from_the_package():
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    assert os.path.realpath(storage.DATA_FILE) == os.path.join(backend, "data", "events.json")
@@ -1,8 +1,11 @@
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, patch, AsyncMock
 from app.main import app
+from app.core.security import get_current_user
 from app.services import parser
+from app.services.storage_supabase import compress_text
 from app.schemas.event import EventSchema
+from testing.fakes import InMemoryDB
 import json
 
 client = TestClient(app)
@@ -82,3 +85,33 @@ def test_clean_json_response():
     raw_text_no_markdown = '[{"summary": "Test"}]'
     cleaned = parser.clean_json_response(raw_text_no_markdown)
     assert cleaned == raw_text_no_markdown
+
+def test_syllabus_list_is_metadata_and_detail_loads_on_demand():
+    text = "Late work loses 10% per day. Office hours are Tuesdays 2-4pm. " * 400
+    insights = {"summary": "Data structures", "key_policies": ["No late work"]}
+    db = InMemoryDB({"syllabi": [
+        {"id": "s1", "user_id": "user123", "course_name": "CSE 101", "pdf_url": None,
+         "raw_text": None, "raw_text_compressed": compress_text(text), "ai_insights": insights},
+        # Saved before compression
+        {"id": "s2", "user_id": "user123", "course_name": "CSE 12", "pdf_url": None,
+         "raw_text": "Plain text", "ai_insights": {}},
+        {"id": "s3", "user_id": "someone_else", "course_name": "CSE 101", "pdf_url": None,
+         "raw_text_compressed": compress_text("Private"), "ai_insights": {}},
+    ]})
+    user = type("User", (), {"id": "user123"})()
+    with patch.dict(app.dependency_overrides, {get_current_user: lambda: user}), \
+         patch("app.services.storage._use_supabase", return_value=True), \
+         patch("app.services.storage_supabase.get_service_db", return_value=db):
+        listing = client.get("/syllabus/syllabus", headers={"Accept-Encoding": "identity"})
+        detail = client.get("/syllabus/syllabus/s1").json()["data"]
+        legacy = client.get("/syllabus/syllabus/s2").json()["data"]
+        other = client.get("/syllabus/syllabus/s3")
+
+    rows = listing.json()["data"]
+    assert [r["course_name"] for r in rows] == ["CSE 101", "CSE 12"]
+    assert all("raw_text" not in r and "ai_insights" not in r for r in rows)
+    assert len(listing.content) < 1024
+    assert detail["raw_text"] == text and detail["ai_insights"] == insights
+    assert "raw_text_compressed" not in detail
+    assert legacy["raw_text"] == "Plain text"
+    assert other.status_code == 404
@@ -0,0 +1,115 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.syllabus_index import SyllabusIndex, split_passages
+
+MATH = (
+    "MATH 19A Calculus. Grading: homework 20%, two midterms 40%, final exam 40%. "
+    "Late homework loses 10% per day and is not accepted after three days. "
+    "Office hours are Tuesdays 2-4pm in McHenry 1250."
+)
+CHEM = (
+    "CHEM 1A General Chemistry. Lab reports are due one week after each lab. "
+    "The final exam is cumulative and must be taken in person."
+)
+
+@pytest.fixture
+def loader():
+    load = MagicMock(return_value=[
+        {"course_name": "MATH 19A", "raw_text": MATH},
+        {"course_name": "CHEM 1A", "raw_text": CHEM},
+        {"course_name": "Empty", "raw_text": None},
+    ])
+    return load
+
+def test_ranks_relevant_passage_first(loader):
+    index = SyllabusIndex(load_syllabi=loader)
+
+    results = index.search("user123", "late homework policy")
+
+    assert results[0]["course_name"] == "MATH 19A"
+    assert "Late homework" in results[0]["passage"]
+    assert all(r["course_name"] != "CHEM 1A" for r in results)
+
+def test_builds_lazily_once(loader):
+    index = SyllabusIndex(load_syllabi=loader)
+
+    index.search("user123", "exam")
+    index.search("user123", "lab reports")
+
+    loader.assert_called_once_with("user123")
+
+def test_course_filter(loader):
+    index = SyllabusIndex(load_syllabi=loader)
+
+    results = index.search("user123", "final exam", course_name="chem 1a")
+
+    assert [r["course_name"] for r in results] == ["CHEM 1A"]
+
+def test_save_drops_only_that_users_index(loader):
+    index = SyllabusIndex(load_syllabi=loader)
+    index.search("user123", "exam")
+    index.search("user456", "exam")
+
+    index.invalidate("user123")
+    loader.return_value = [{"course_name": "CHEM 1A", "raw_text": "CHEM 1A. Quizzes every Friday."}]
+
+    assert index.search("user123", "lab reports") == []
+    assert index.search("user123", "quizzes")[0]["course_name"] == "CHEM 1A"
+    assert index.search("user456", "lab reports")[0]["course_name"] == "CHEM 1A"
+    assert [call.args[0] for call in loader.call_args_list] == ["user123", "user456", "user123"]
+
+def test_evicts_least_recently_searched_user(loader):
+    index = SyllabusIndex(load_syllabi=loader, max_users=2)
+    index.search("user1", "exam")
+    index.search("user2", "exam")
+    index.search("user1", "exam")
+
+    index.search("user3", "exam")
+
+    assert list(index._users) == ["user1", "user3"]
+    index.search("user2", "exam")
+    assert [call.args[0] for call in loader.call_args_list] == ["user1", "user2", "user3", "user2"]
+
+def test_save_racing_first_build_is_not_lost():
+    index = SyllabusIndex()
+
+    def load(user_id):
+        # The save lands after the loader read the DB
+        index.invalidate(user_id)
+        return [{"course_name": "MATH 19A", "raw_text": MATH}]
+    index._load_syllabi = load
+    index.search("user123", "exam")
+
+    index._load_syllabi = MagicMock(return_value=[
+        {"course_name": "MATH 19A", "raw_text": MATH},
+        {"course_name": "CHEM 1A", "raw_text": CHEM},
+    ])
+    assert index.search("user123", "lab reports")[0]["course_name"] == "CHEM 1A"
+
+def test_long_text_splits_into_overlapping_passages():
+    words = [f"w{i}" for i in range(200)]
+
+    passages = split_passages(" ".join(words))
+
+    assert len(passages) == 2
+    assert passages[0].split()[-1] == "w119"
+    assert passages[1].split()[0] == "w90"
+
+def test_agent_tool_caps_top_k(loader):
+    from app.services.agent import build_agent_tools
+    index = SyllabusIndex(load_syllabi=loader)
+
+    with patch('app.services.agent.syllabus_index', index), \
+         patch.object(index, 'search', wraps=index.search) as search:
+        tools = {t.__name__: t for t in build_agent_tools("user123")}
+        result = asyncio.run(tools["search_syllabus"]("office hours", top_k=50))
+
+    assert result["passages"][0]["course_name"] == "MATH 19A"
+    search.assert_called_once_with("user123", "office hours", 10, None)
@@ -0,0 +1,121 @@
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from contextlib import contextmanager
+import pytest
+import threading
+import time
+import json
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from testing.fakes import InMemoryDB
+from app.main import app
+from app.core.security import get_current_user
+from app.services.sync_executor import SyncExecutor
+from app.services.sync_jobs import SyncJobManager
+
+client = TestClient(app)
+
+class GatedService:
+    """Pushes block on `gate` so the test can look at a job mid-flight."""
+    def __init__(self, user_id: str, fail_ids=()):
+        self.user_id = user_id
+        self.fail_ids = set(fail_ids)
+        self.gate = threading.Event()
+        self.pushed = []
+
+    @contextmanager
+    def buffered_writes(self):
+        yield
+
+    def push_event(self, event: dict) -> str:
+        self.gate.wait(5)
+        if event["id"] in self.fail_ids:
+            raise ValueError("bad event")
+        self.pushed.append(event["id"])
+        return "created"
+
+def as_user(user_id: str):
+    user = type("User", (), {"id": user_id})()
+    return patch.dict(app.dependency_overrides, {get_current_user: lambda: user})
+
+def wait_for(job, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.finished
+
+@pytest.fixture
+def setup():
+    db = InMemoryDB({"events": [
+        {"id": f"evt{n}", "user_id": "user123", "summary": f"Event {n}", "google_event_id": None}
+        for n in range(5)
+    ] + [{"id": "synced", "user_id": "user123", "summary": "Old", "google_event_id": "g1"}]})
+    service = GatedService("user123", fail_ids={"evt3"})
+    jobs = SyncJobManager(SyncExecutor(max_workers=2, user_rate=1000, user_burst=1000, max_attempts=1))
+    with patch("app.api.calendar.get_db", return_value=db), \
+         patch("app.api.calendar.get_calendar_service", return_value=service), \
+         patch("app.api.calendar.sync_jobs", jobs), \
+         patch("app.api.calendar.SYNC_PROGRESS_INTERVAL", 0.01):
+        yield db, service, jobs
+
+def test_sync_returns_job_before_pushing(setup):
+    db, service, jobs = setup
+    with as_user("user123"):
+        response = client.post("/calendar/sync").json()
+        job_id = response["data"]["job_id"]
+        assert response["success"] is True
+        assert response["data"]["total"] == 5
+        # Nothing has reached Google yet: the request did not wait for the push
+        assert service.pushed == []
+
+        # A second sync while the first runs joins it instead of pushing twice
+        again = client.post("/calendar/sync").json()
+        assert again["data"]["job_id"] == job_id
+
+        service.gate.set()
+        wait_for(jobs.get(job_id, "user123"))
+        progress = client.get(f"/calendar/sync/{job_id}").json()["data"]
+
+    assert progress["status"] == "done"
+    assert progress["pushed"] == 4
+    assert progress["failed"] == 1
+    assert progress["failed_ids"] == ["evt3"]
+    assert sorted(service.pushed) == ["evt0", "evt1", "evt2", "evt4"]
+
+def test_job_is_private_to_its_user(setup):
+    _, service, _ = setup
+    service.gate.set()
+    with as_user("user123"):
+        job_id = client.post("/calendar/sync").json()["data"]["job_id"]
+    with as_user("intruder"):
+        assert client.get(f"/calendar/sync/{job_id}").status_code == 404
+        assert client.get(f"/calendar/sync/{job_id}/events").status_code == 404
+    with as_user("user123"):
+        assert client.get("/calendar/sync/unknown").status_code == 404
+
+def test_event_stream_ends_with_done(setup):
+    _, service, _ = setup
+    with as_user("user123"):
+        job_id = client.post("/calendar/sync").json()["data"]["job_id"]
+        service.gate.set()
+        response = client.get(f"/calendar/sync/{job_id}/events")
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    frames = [f for f in response.text.split("\n\n") if f]
+    events = [(f.split("\n")[0][len("event: "):], json.loads(f.split("\n")[1][len("data: "):])) for f in frames]
+    assert [name for name, _ in events[:-1]] == ["progress"] * (len(events) - 1)
+    name, final = events[-1]
+    assert name == "done"
+    assert final["pushed"] == 4 and final["failed"] == 1
+
+def test_nothing_to_sync_queues_no_job(setup):
+    db, _, _ = setup
+    for row in db.tables["events"]:
+        row["google_event_id"] = row["google_event_id"] or "g"
+    with as_user("user123"):
+        response = client.post("/calendar/sync").json()
+    assert response["data"] == {"synced": 0, "job_id": None}
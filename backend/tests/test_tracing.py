@@ -0,0 +1,111 @@
+import asyncio
+import json
+import threading
+import pytest
+from unittest.mock import patch
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.services.tracing import Tracer
+
+def test_spans_nest_and_export(tmp_path):
+    sink = tmp_path / "traces.jsonl"
+    tracer = Tracer(sink_path=str(sink))
+
+    async def tool():
+        with tracer.span("get_calendar_events", "tool"):
+            with tracer.span("db", "db"):
+                await asyncio.sleep(0)
+
+    async def turn():
+        with tracer.trace("agent_turn", user_id="user123"):
+            with tracer.span("model", "model"):
+                pass
+            # Concurrent tools each get their own parent chain
+            await asyncio.gather(tool(), tool())
+
+    asyncio.run(turn())
+    tracer.flush()
+
+    record = json.loads(sink.read_text().strip())
+    spans = {s["id"]: s for s in record["spans"]}
+    db_spans = [s for s in spans.values() if s["name"] == "db"]
+    assert record["name"] == "agent_turn"
+    assert len(spans) == 5
+    assert all(spans[s["parent"]]["name"] == "get_calendar_events" for s in db_spans)
+
+def test_span_outside_trace_is_noop():
+    tracer = Tracer(sink_path="")
+    with tracer.span("db", "db") as span:
+        assert span is None
+    assert tracer.stats()["requests"] == 0
+
+def test_stats_attribute_p95_to_dominant_span():
+    tracer = Tracer(sink_path="")
+    clock = iter(range(0, 10_000))
+
+    def fake_perf_counter():
+        return next(clock) / 1000
+
+    with patch('app.services.tracing.time.perf_counter', side_effect=fake_perf_counter):
+        for slow in [False] * 18 + [True] * 2:
+            with tracer.trace("agent_turn"):
+                with tracer.span("model", "model"):
+                    pass
+                with tracer.span("add_calendar_event" if slow else "get_transit_time", "tool"):
+                    if slow:
+                        for _ in range(50):
+                            fake_perf_counter()
+
+    stats = tracer.stats("agent_turn")
+
+    assert stats["requests"] == 20
+    assert stats["p95_ms"] > stats["p50_ms"]
+    assert next(iter(stats["spans"])) == "add_calendar_event"
+    assert stats["spans"]["add_calendar_event"]["share_of_p95_requests"] > 0.5
+
+def test_sink_rotates_at_max_bytes(tmp_path):
+    sink = tmp_path / "traces.jsonl"
+    tracer = Tracer(sink_path=str(sink), max_bytes=2000, backups=2)
+
+    for _ in range(40):
+        with tracer.trace("agent_turn", user_id="user123"):
+            pass
+    tracer.flush()
+
+    files = sorted(p.name for p in tmp_path.iterdir())
+    assert files == ["traces.jsonl", "traces.jsonl.1", "traces.jsonl.2"]
+    assert all(p.stat().st_size < 2000 + 1000 for p in tmp_path.iterdir())
+
+def test_stats_are_scoped_to_one_user():
+    tracer = Tracer(sink_path="")
+    for user_id in ("alice", "alice", "bob"):
+        with tracer.trace("agent_turn", user_id=user_id):
+            pass
+
+    assert tracer.stats("agent_turn", user_id="alice")["requests"] == 2
+    assert tracer.stats("agent_turn", user_id="carol")["requests"] == 0
+
+def test_sink_is_written_off_the_request_path(tmp_path):
+    sink = tmp_path / "traces.jsonl"
+    tracer = Tracer(sink_path=str(sink))
+    disk = threading.Event()
+    write = tracer._write
+
+    def slow_write(records):
+        disk.wait(5)
+        write(records)
+
+    with patch.object(tracer, '_write', side_effect=slow_write):
+        with tracer.trace("agent_turn", user_id="user123"):
+            pass
+        # The trace closed while the sink is still blocked
+        assert tracer.stats("agent_turn")["requests"] == 1
+        assert not sink.exists()
+        disk.set()
+        tracer.flush()
+
+    assert json.loads(sink.read_text())["name"] == "agent_turn"
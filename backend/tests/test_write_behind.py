@@ -0,0 +1,155 @@
+from unittest.mock import patch
+import asyncio
+import pytest
+import time
+import sys
+import os
+
+# Ensure backend is in path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from conftest import event as events_row, make_service
+from testing.fakes import InMemoryDB, FakeGoogle
+from app.schemas.event import EventSchema
+from app.services.write_behind import WriteBehind
+
+def event(n: int, **extra):
+    return events_row(n, n, 17, id=f"evt{n}", **extra)
+
+def seeded():
+    return InMemoryDB({"events": [event(1), event(2), event(3, user_id="someone_else"), event(4), event(5)]})
+
+def test_writes_coalesce_into_few_statements():
+    db = seeded()
+    with WriteBehind(db, window=60) as writes:
+        for n in range(10, 15):
+            writes.table("events").insert(event(n)).execute()
+        # Folded into the pending insert
+        writes.table("events").update({"summary": "Renamed"}).eq("id", "evt10").execute()
+        # Same change to several rows: one update ... in (ids)
+        for n in (2, 4, 5):
+            writes.table("events").update({"verified": True}).eq("id", f"evt{n}").execute()
+        # Repeated updates to one row: one statement
+        writes.table("events").update({"summary": "a"}).eq("id", "evt1").eq("user_id", "user123").execute()
+        writes.table("events").update({"location": "b"}).eq("id", "evt1").eq("user_id", "user123").execute()
+        assert db.round_trips == 0
+
+    # 1 insert, 1 shared update, 1 coalesced update
+    assert db.round_trips == 3
+    rows = {r["id"]: r for r in db.tables["events"]}
+    assert rows["evt10"]["summary"] == "Renamed"
+    assert all(rows[f"evt{n}"].get("verified") is True for n in (2, 4, 5))
+    assert rows["evt1"]["summary"] == "a" and rows["evt1"]["location"] == "b"
+
+def test_buffered_result_matches_running_each_write():
+    steps = [
+        lambda t: t("events").insert(event(20)).execute(),
+        lambda t: t("events").delete().eq("id", "evt20").execute(),
+        lambda t: t("events").upsert(event(21, summary="first")).execute(),
+        lambda t: t("events").upsert(event(21, location="Hall")).execute(),
+        # Filter does not match the queued row: no-op
+        lambda t: t("events").update({"summary": "stolen"}).eq("id", "evt21").eq("user_id", "intruder").execute(),
+        lambda t: t("events").update({"summary": "x"}).eq("id", "evt3").eq("user_id", "user123").execute(),
+        lambda t: t("events").update({"user_id": "moved"}).eq("id", "evt2").execute(),
+        # Touches the column the previous update changed: flushes first
+        lambda t: t("events").delete().eq("id", "evt2").eq("user_id", "user123").execute(),
+        lambda t: t("events").delete().in_("id", ["evt1", "missing"]).execute(),
+        lambda t: t("events").insert(event(1, summary="again")).execute(),
+    ]
+    direct, buffered = seeded(), seeded()
+    for step in steps:
+        step(direct.table)
+    with WriteBehind(buffered, window=60) as writes:
+        for step in steps:
+            step(writes.table)
+
+    def state(db):
+        return sorted((r["id"], r["user_id"], r["summary"], r.get("location")) for r in db.tables["events"])
+    assert state(buffered) == state(direct)
+    assert buffered.round_trips < direct.round_trips
+
+def test_reads_see_buffered_writes():
+    db = seeded()
+    with WriteBehind(db, window=60) as writes:
+        writes.table("events").insert(event(13)).execute()
+        writes.table("events").update({"google_event_id": "g2"}).eq("id", "evt2").execute()
+        unsynced = writes.table("events").select("id").eq("user_id", "user123").is_("google_event_id", "null").execute()
+
+    assert sorted(r["id"] for r in unsynced.data) == ["evt1", "evt13", "evt4", "evt5"]
+
+def test_flushes_on_size_and_time():
+    db = seeded()
+    writes = WriteBehind(db, window=0.05, max_pending=3)
+    for n in (10, 11, 12):
+        writes.table("events").insert(event(n)).execute()
+    # Third row hit max_pending
+    assert len(db.tables["events"]) == 8
+
+    writes.table("events").insert(event(13)).execute()
+    deadline = time.monotonic() + 2
+    while len(db.tables["events"]) < 9 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(db.tables["events"]) == 9
+
+def test_bad_row_does_not_sink_the_batch():
+    db = seeded()
+    real_execute = db._execute
+    def reject_bad(query):
+        if query.action == "insert" and any(r.get("summary") == "bad" for r in query.payload):
+            raise Exception("violates not-null constraint")
+        return real_execute(query)
+    db._execute = reject_bad
+
+    with pytest.raises(Exception, match="not-null"):
+        with WriteBehind(db, window=60) as writes:
+            for n, summary in ((10, "ok"), (11, "bad"), (12, "ok")):
+                writes.table("events").insert(event(n, summary=summary)).execute()
+
+    assert {"evt10", "evt12"} <= {r["id"] for r in db.tables["events"]}
+    assert "evt11" not in {r["id"] for r in db.tables["events"]}
+
+def test_syllabus_events_insert_in_one_statement():
+    from app.api.canvas import process_and_save_syllabus
+    db = seeded()
+    google = FakeGoogle(db)
+    extracted = [EventSchema(**{k: v for k, v in event(n).items() if k != "user_id"}) for n in range(20, 26)]
+
+    with patch("app.api.canvas.process_syllabus_for_course", return_value=extracted), \
+         patch("app.api.canvas.get_db", return_value=db), \
+         patch("app.api.canvas.get_calendar_service", return_value=google):
+        asyncio.run(process_and_save_syllabus(object(), "user123"))
+
+    # One insert, then the Google push writes back one id per event
+    assert db.round_trips == 1 + len(extracted)
+    assert google.calls == {"events.insert": len(extracted)}
+    saved = [r for r in db.tables["events"] if r["summary"] in {e.summary for e in extracted}]
+    assert len(saved) == len(extracted) and all(r["google_event_id"] for r in saved)
+
+def test_supabase_save_events_keeps_good_rows():
+    from app.services.storage_supabase import SupabaseStorage
+    db = seeded()
+    real_execute = db._execute
+    def reject_bad(query):
+        if query.action == "insert" and any(r.get("summary") == "bad" for r in query.payload):
+            raise Exception("violates not-null constraint")
+        return real_execute(query)
+    db._execute = reject_bad
+    events = [EventSchema(**{k: v for k, v in event(n, summary=s).items() if k != "user_id"})
+              for n, s in ((10, "ok"), (11, "bad"), (12, "ok"))]
+
+    with patch("app.services.storage_supabase.get_service_db", return_value=db):
+        SupabaseStorage.save_events(events, user_id="user123")
+
+    assert {"evt10", "evt12"} <= {r["id"] for r in db.tables["events"]}
+
+def test_new_google_id_is_written_at_once():
+    db = seeded()
+    service = make_service(db)
+    service.service.events().insert.return_value.execute.return_value = {"id": "g1"}
+    service._execute = lambda request: request.execute()
+
+    with service.buffered_writes():
+        assert service.push_event(event(1)) == "created"
+        # Not held for the window: a concurrent sync must not create it again
+        rows = {r["id"]: r for r in db.tables["events"]}
+        assert rows["evt1"]["google_event_id"] == "g1"
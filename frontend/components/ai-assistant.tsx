@@ -69,22 +69,31 @@ export function AIAssistant() {
         }))
 
       const timezone = Intl.DateTimeFormat().resolvedOptions().timeZone
-      const response = await api.chatWithAgent(currentInput, history, token, timezone)
-      if (response.success && response.data) {
-        // Trigger calendar refresh just in case an event was added
-        window.dispatchEvent(new Event('calendar-updated'))
-        
-        setMessages((prev) => [
-          ...prev,
-          {
-            id: Date.now() + 1,
-            role: "assistant",
-            content: response.data.response,
-          },
-        ])
-      } else {
-        throw new Error(response.message || "Failed to get response")
-      }
+      const replyId = Date.now() + 1
+
+      // The reply bubble appears with the first token and grows in place
+      const setReply = (update: (content: string) => string) =>
+        setMessages((prev) => prev.some(m => m.id === replyId)
+          ? prev.map(m => m.id === replyId ? { ...m, content: update(m.content) } : m)
+          : [...prev, { id: replyId, role: "assistant", content: update("") }])
+
+      await api.streamChatWithAgent(currentInput, history, token, (event, data) => {
+        if (event === "token") {
+          setReply(content => content + data.text)
+        } else if (event === "done") {
+          setReply(() => data.response)
+          // Refresh the calendar only when the agent actually changed events
+          if (data.mutations?.length) {
+            window.dispatchEvent(new Event('calendar-updated'))
+          }
+        } else if (event === "error") {
+          console.error("Chat stream error:", data.message)
+          setReply(() => data.message)
+          if (data.mutations?.length) {
+            window.dispatchEvent(new Event('calendar-updated'))
+          }
+        }
+      }, timezone)
     } catch (error) {
       console.error("Chat error:", error)
       setMessages((prev) => [
@@ -136,7 +145,7 @@ export function AIAssistant() {
             )}
           </div>
         ))}
-        {isLoading && (
+        {isLoading && messages[messages.length - 1]?.role === "user" && (
           <div className="flex items-start gap-3 mb-4">
             <div className="w-7 h-7 rounded-full bg-[#2d4a5e] flex items-center justify-center flex-shrink-0">
               <Bot className="w-4 h-4 text-white" />
@@ -1,6 +1,6 @@
 "use client"
 
-import { useState, useEffect } from "react"
+import { useState, useEffect, useRef } from "react"
 import { ChevronLeft, ChevronRight, CalendarDays, Loader2 } from "lucide-react"
 import { api, EventData } from "@/lib/api"
 import { useAuth } from "@/app/providers"
@@ -20,6 +20,8 @@ export function Calendar() {
   const [currentDate, setCurrentDate] = useState(new Date()) // Default to today
   const [events, setEvents] = useState<any[]>([])
   const [isLoading, setIsLoading] = useState(false)
+  // Change cursor the loaded events are current as of
+  const changeCursor = useRef<string | null>(null)
   
   const year = currentDate.getFullYear()
   const month = currentDate.getMonth()
@@ -32,16 +34,22 @@ export function Calendar() {
   
   const monthName = currentDate.toLocaleString("default", { month: "long" })
   
+  const monthRange = () => ({
+    start: new Date(year, month, 1).toISOString(),
+    end: new Date(year, month + 1, 0).toISOString(),
+  })
+
   const fetchEvents = async () => {
     if (!token) return
     setIsLoading(true)
     try {
-      const start = new Date(year, month, 1).toISOString()
-      const end = new Date(year, month + 1, 0).toISOString()
-      const response = await api.getEvents(token, start, end)
-      if (response.success) {
-        setEvents(response.data)
-      }
+      const { start, end } = monthRange()
+      // Take the cursor first so edits landing during the fetch are replayed, not lost
+      const cursor = await api.getEventChanges(token, null)
+      // The grid only renders titles and types, so fetch compact rows page by page
+      const data = await api.getAllEventPages(token, start, end, { compact: true, limit: 500 })
+      setEvents(data)
+      changeCursor.current = cursor.success ? cursor.data.cursor : null
     } catch (error) {
       console.error("Failed to fetch events:", error)
     } finally {
@@ -49,10 +57,34 @@ export function Calendar() {
     }
   }
 
+  // Applies only what changed since the last load instead of refetching the month
+  const refreshEvents = async () => {
+    if (!token) return
+    if (changeCursor.current === null) return fetchEvents()
+    try {
+      const { start, end } = monthRange()
+      let hasMore = true
+      while (hasMore) {
+        const response = await api.getEventChanges(token, changeCursor.current, start, end, { compact: true })
+        if (!response.success || response.data.reset) return fetchEvents()
+        const { upserted, removed, cursor } = response.data
+        const dropped = new Set([...removed, ...upserted.map((e: any) => e.id)])
+        setEvents(prev => prev
+          .filter(e => !dropped.has(e.id) && !(e.recurring_event_id && dropped.has(e.recurring_event_id)))
+          .concat(upserted))
+        changeCursor.current = cursor
+        hasMore = response.data.has_more
+      }
+    } catch (error) {
+      console.error("Failed to refresh events:", error)
+    }
+  }
+
   useEffect(() => {
+    changeCursor.current = null
     fetchEvents()
 
-    const handleRefresh = () => fetchEvents()
+    const handleRefresh = () => refreshEvents()
     window.addEventListener('calendar-updated', handleRefresh)
     
     return () => {
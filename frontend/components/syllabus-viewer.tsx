@@ -1,24 +1,11 @@
 "use client"
 
 import { useState, useEffect, useRef } from "react"
-import { api } from "@/lib/api"
+import { api, SyllabusSummary, SyllabusDetail } from "@/lib/api"
 import { useAuth } from "@/app/providers"
 import { Loader2, BookOpen, Clock, FileText, X, AlertCircle, Plus, Search, Upload } from "lucide-react"
 import { toast } from "sonner"
 
-interface Syllabus {
-  id: string
-  course_name: string
-  pdf_url?: string
-  ai_insights: {
-    grading_scale?: string
-    office_hours?: string
-    key_policies?: string[]
-    summary?: string
-  }
-  raw_text: string
-}
-
 export function SyllabusViewer({ 
   courses, 
   onClose 
@@ -28,10 +15,13 @@ export function SyllabusViewer({
 }) {
   const { token } = useAuth()
   const fileInputRef = useRef<HTMLInputElement>(null)
-  const [syllabi, setSyllabi] = useState<Syllabus[]>([])
+  const [syllabi, setSyllabi] = useState<SyllabusSummary[]>([])
   const [selectedCourse, setSelectedCourse] = useState<any | null>(null)
-  const [currentSyllabus, setCurrentSyllabus] = useState<Syllabus | null>(null)
+  const [currentSyllabus, setCurrentSyllabus] = useState<SyllabusDetail | null>(null)
+  // Details already fetched, keyed by id and updated_at so re-analyzed syllabi refetch
+  const detailCache = useRef(new Map<string, SyllabusDetail>())
   const [isLoading, setIsLoading] = useState(true)
+  const [isLoadingDetail, setIsLoadingDetail] = useState(false)
   const [isProcessing, setIsProcessing] = useState(false)
   const [isUploading, setIsUploading] = useState(false)
   const [viewMode, setViewMode] = useState<'insights' | 'pdf'>('insights')
@@ -80,17 +70,40 @@ export function SyllabusViewer({
     fetchSyllabi()
   }, [token])
 
-  // When a course is selected, check if we have its syllabus data
+  // When a course is selected, fetch its syllabus text and insights if it has been analyzed
   useEffect(() => {
-    if (selectedCourse) {
-      const existing = syllabi.find(s => s.course_name === selectedCourse.name)
-      if (existing) {
-        setCurrentSyllabus(existing)
-      } else {
-        setCurrentSyllabus(null)
-      }
+    if (!selectedCourse) return
+    const existing = syllabi.find(s => s.course_name === selectedCourse.name)
+    const key = existing ? `${existing.id}:${existing.updated_at ?? ""}` : ""
+    const cached = detailCache.current.get(key)
+    if (!existing || !token || cached) {
+      setCurrentSyllabus(cached ?? null)
+      setIsLoadingDetail(false)
+      return
     }
-  }, [selectedCourse, syllabi])
+
+    let cancelled = false
+    setCurrentSyllabus(null)
+    setIsLoadingDetail(true)
+    api.getSyllabus(existing.id, token)
+      .then(res => {
+        if (cancelled) return
+        if (res.success) {
+          detailCache.current.set(key, res.data)
+          setCurrentSyllabus(res.data)
+        } else {
+          toast.error(res.message || "Failed to load syllabus")
+        }
+      })
+      .catch(err => {
+        console.error(err)
+        if (!cancelled) toast.error("Failed to load syllabus")
+      })
+      .finally(() => {
+        if (!cancelled) setIsLoadingDetail(false)
+      })
+    return () => { cancelled = true }
+  }, [selectedCourse, syllabi, token])
 
   const handleProcessCourse = async () => {
     if (!token || !selectedCourse || isProcessing) return
@@ -224,13 +237,17 @@ export function SyllabusViewer({
         <div className="flex-1 overflow-hidden bg-white/40">
           {selectedCourse ? (
             <div className="h-full overflow-y-auto p-6 custom-scrollbar">
-              {currentSyllabus ? (
+              {isLoadingDetail ? (
+                <div className="flex items-center justify-center h-full">
+                  <Loader2 className="w-8 h-8 animate-spin text-[#2d4a5e]" />
+                </div>
+              ) : currentSyllabus ? (
                 // Show AI Insights
                 viewMode === 'insights' ? (
                   <div className="space-y-8 animate-in fade-in slide-in-from-bottom-2 duration-300">
                     <div>
                       <h1 className="text-3xl font-bold text-[#2d4a5e] mb-2">{currentSyllabus.course_name}</h1>
-                      <p className="text-[#6b7c8a] italic">{currentSyllabus.ai_insights.summary || "Course summary not available."}</p>
+                      <p className="text-[#6b7c8a] italic">{currentSyllabus.ai_insights?.summary || "Course summary not available."}</p>
                     </div>
 
                     <div className="grid grid-cols-1 md:grid-cols-2 gap-4">
@@ -239,7 +256,7 @@ export function SyllabusViewer({
                           <Clock className="w-5 h-5" />
                           <h3 className="font-semibold">Office Hours</h3>
                         </div>
-                        <p className="text-sm text-[#2d4a5e]">{currentSyllabus.ai_insights.office_hours || "Not specified."}</p>
+                        <p className="text-sm text-[#2d4a5e]">{currentSyllabus.ai_insights?.office_hours || "Not specified."}</p>
                       </div>
 
                       <div className="bg-white/70 p-4 rounded-2xl shadow-sm border border-white/60">
@@ -247,7 +264,7 @@ export function SyllabusViewer({
                           <BookOpen className="w-5 h-5" />
                           <h3 className="font-semibold">Grading Scale</h3>
                         </div>
-                        <p className="text-sm text-[#2d4a5e] whitespace-pre-line">{currentSyllabus.ai_insights.grading_scale || "Not specified."}</p>
+                        <p className="text-sm text-[#2d4a5e] whitespace-pre-line">{currentSyllabus.ai_insights?.grading_scale || "Not specified."}</p>
                       </div>
                     </div>
 
@@ -257,7 +274,7 @@ export function SyllabusViewer({
                         <h3 className="font-semibold">Important Policies</h3>
                       </div>
                       <ul className="space-y-2">
-                        {currentSyllabus.ai_insights.key_policies?.map((policy, i) => (
+                        {currentSyllabus.ai_insights?.key_policies?.map((policy, i) => (
                           <li key={i} className="flex gap-2 text-sm text-[#2d4a5e]">
                             <span className="w-1.5 h-1.5 rounded-full bg-[#f4c542] mt-1.5 shrink-0" />
                             {policy}
@@ -28,7 +28,7 @@ export function UpcomingCard() {
         // Fetch next 30 days of events from our database (Single Source of Truth)
         const start = new Date().toISOString()
         const end = new Date(Date.now() + 30 * 24 * 60 * 60 * 1000).toISOString()
-        const response = await api.getEvents(token, start, end)
+        const response = await api.getEvents(token, start, end, { compact: true })
         
         if (response.success && response.data) {
           // Filter for assignments and map to UpcomingItem format
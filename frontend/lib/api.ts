@@ -16,6 +16,93 @@ export interface EventData {
   weight?: number;
 }
 
+export interface EventQueryOptions {
+  fields?: string[];
+  compact?: boolean;
+}
+
+export interface EventPage {
+  events: any[];
+  next_cursor: string | null;
+}
+
+export interface BulkResult {
+  results: { index: number; id: string | null; status: 'created' | 'updated' | 'deleted' | 'not_found' | 'error'; error?: string }[];
+  counts: Record<string, number>;
+}
+
+export interface EventChanges {
+  upserted: any[];
+  removed: string[];
+  cursor: string;
+  has_more: boolean;
+  reset: boolean;
+}
+
+export interface SyncJob {
+  job_id: string | null;
+  status?: 'queued' | 'running' | 'done' | 'failed';
+  total?: number;
+  pushed?: number;
+  synced: number;
+  skipped?: number;
+  retried?: number;
+  failed?: number;
+  failed_ids?: string[];
+  error?: string | null;
+}
+
+// Syllabus list entry; text and insights come from getSyllabus
+export interface SyllabusSummary {
+  id: string;
+  course_name: string;
+  pdf_url?: string | null;
+  created_at?: string;
+  updated_at?: string;
+}
+
+export interface SyllabusDetail extends SyllabusSummary {
+  raw_text: string | null;
+  ai_insights: {
+    grading_scale?: string;
+    office_hours?: string;
+    key_policies?: string[];
+    summary?: string;
+  } | null;
+}
+
+// Reads a Server-Sent Events body, calling onEvent once per frame
+async function readEventStream(response: Response, onEvent: (event: string, data: any) => void) {
+  if (!response.ok || !response.body) {
+    throw new Error(`API Error: ${response.statusText}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+
+    // SSE frames are separated by a blank line
+    let boundary;
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const frame = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+
+      let event = 'message';
+      let data = '';
+      for (const line of frame.split('\n')) {
+        if (line.startsWith('event: ')) event = line.slice(7);
+        else if (line.startsWith('data: ')) data += line.slice(6);
+      }
+      if (data) onEvent(event, JSON.parse(data));
+    }
+  }
+}
+
 class APIService {
   private async request<T>(
     endpoint: string,
@@ -63,6 +150,26 @@ class APIService {
     }, token);
   }
 
+  // Streaming variant: calls onEvent for each SSE event (token, tool_start, tool_end, done, error)
+  async streamChatWithAgent(
+    message: string,
+    history: any[],
+    token: string,
+    onEvent: (event: string, data: any) => void,
+    timezone?: string
+  ) {
+    const response = await fetch(`${API_BASE_URL}/agent/chat/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${token}`,
+      },
+      body: JSON.stringify({ message, history, timezone }),
+    });
+
+    await readEventStream(response, onEvent);
+  }
+
   // Canvas endpoints
   async getCanvasAssignments(canvasToken?: string, token?: string): Promise<APIResponse<any[]>> {
     const params = canvasToken ? `?canvas_token=${canvasToken}` : '';
@@ -103,19 +210,97 @@ class APIService {
   }
 
   // Calendar endpoints
-  async getEvents(token: string, start?: string, end?: string): Promise<APIResponse<any[]>> {
-    let params = '';
-    if (start || end) {
-      const query = new URLSearchParams();
-      if (start) query.append('start', start);
-      if (end) query.append('end', end);
-      params = `?${query.toString()}`;
-    }
+  async getEvents(token: string, start?: string, end?: string, options: EventQueryOptions = {}): Promise<APIResponse<any[]>> {
+    const query = new URLSearchParams();
+    if (start) query.append('start', start);
+    if (end) query.append('end', end);
+    if (options.fields) query.append('fields', options.fields.join(','));
+    if (options.compact) query.append('compact', 'true');
+    const params = query.toString() ? `?${query.toString()}` : '';
     return this.request<any[]>(`/calendar/events${params}`, {}, token);
   }
+
+  async getEventsPage(token: string, start?: string, end?: string, options: EventQueryOptions & { limit?: number; cursor?: string | null } = {}): Promise<APIResponse<EventPage>> {
+    const query = new URLSearchParams();
+    if (start) query.append('start', start);
+    if (end) query.append('end', end);
+    if (options.fields) query.append('fields', options.fields.join(','));
+    if (options.compact) query.append('compact', 'true');
+    query.append('limit', String(options.limit || 200));
+    if (options.cursor) query.append('cursor', options.cursor);
+    return this.request<EventPage>(`/calendar/events?${query.toString()}`, {}, token);
+  }
+
+  // Follows next_cursor until the range is exhausted
+  async getAllEventPages(token: string, start?: string, end?: string, options: EventQueryOptions & { limit?: number } = {}): Promise<any[]> {
+    const events: any[] = [];
+    let cursor: string | null = null;
+    do {
+      const response = await this.getEventsPage(token, start, end, { ...options, cursor });
+      if (!response.success) throw new Error(response.message);
+      events.push(...response.data.events);
+      cursor = response.data.next_cursor;
+    } while (cursor);
+    return events;
+  }
   
+  // Current change cursor when `since` is null, otherwise the delta after it
+  async getEventChanges(token: string, since: string | null, start?: string, end?: string, options: EventQueryOptions = {}): Promise<APIResponse<EventChanges>> {
+    const query = new URLSearchParams();
+    if (since !== null) query.append('since', since);
+    if (start) query.append('start', start);
+    if (end) query.append('end', end);
+    if (options.fields) query.append('fields', options.fields.join(','));
+    if (options.compact) query.append('compact', 'true');
+    return this.request<EventChanges>(`/calendar/changes?${query.toString()}`, {}, token);
+  }
+
+  // Bulk edits: one request and one Google push for many events
+  async bulkCreateEvents(events: EventData[], token: string): Promise<APIResponse<BulkResult>> {
+    return this.request<BulkResult>('/calendar/events/bulk', {
+      method: 'POST',
+      body: JSON.stringify(events),
+    }, token);
+  }
+
+  async bulkUpdateEvents(updates: ({ id: string } & Partial<EventData>)[], token: string): Promise<APIResponse<BulkResult>> {
+    return this.request<BulkResult>('/calendar/events/bulk', {
+      method: 'PATCH',
+      body: JSON.stringify(updates),
+    }, token);
+  }
+
+  async bulkDeleteEvents(ids: string[], token: string): Promise<APIResponse<BulkResult>> {
+    return this.request<BulkResult>('/calendar/events/bulk/delete', {
+      method: 'POST',
+      body: JSON.stringify({ ids }),
+    }, token);
+  }
+
+  // Private ICS subscription URL for other calendar apps
+  async getCalendarFeedUrl(token: string): Promise<APIResponse<{ url: string }>> {
+    return this.request<{ url: string }>('/calendar/feed', {}, token);
+  }
+
+  async rotateCalendarFeedUrl(token: string): Promise<APIResponse<{ url: string }>> {
+    return this.request<{ url: string }>('/calendar/feed/rotate', { method: 'POST' }, token);
+  }
+
+  // Queues a push to Google; returns the job to follow (job_id is null when nothing needs syncing)
   async syncToGoogle(token: string) {
-      return this.request('/calendar/sync', { method: 'POST' }, token);
+      return this.request<SyncJob>('/calendar/sync', { method: 'POST' }, token);
+  }
+
+  async getSyncJob(jobId: string, token: string) {
+    return this.request<SyncJob>(`/calendar/sync/${jobId}`, {}, token);
+  }
+
+  // Calls onProgress on every progress/done event until the job finishes
+  async streamSyncJob(jobId: string, token: string, onProgress: (job: SyncJob, done: boolean) => void) {
+    const response = await fetch(`${API_BASE_URL}/calendar/sync/${jobId}/events`, {
+      headers: { 'Authorization': `Bearer ${token}` },
+    });
+    await readEventStream(response, (event, data) => onProgress(data, event === 'done'));
   }
 
   // Syllabus processing
@@ -130,7 +315,13 @@ class APIService {
   }
 
   async getSyllabi(token: string) {
-    return this.request<any[]>('/syllabus/syllabus', {
+    return this.request<SyllabusSummary[]>('/syllabus/syllabus', {
+      method: 'GET',
+    }, token);
+  }
+
+  async getSyllabus(syllabusId: string, token: string) {
+    return this.request<SyllabusDetail>(`/syllabus/syllabus/${encodeURIComponent(syllabusId)}`, {
       method: 'GET',
     }, token);
   }